@@ -0,0 +1,97 @@
+"""asyncio-обёртка над привязками MD6 для асинхронных сервисов.
+
+Вызовы библиотеки выполняются в пуле потоков и не блокируют цикл событий.
+ctypes.CDLL отпускает GIL на время вызова, поэтому потоки пула хешируют
+параллельно. Модуль не зависит от PyQt5 и fitz.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from md6 import get_md6
+
+
+class AsyncMD6:
+    """Асинхронные hash_bytes, hash_file и hash_stream поверх MD6Hash.
+
+    Одновременно в пуле выполняется не больше concurrency вызовов,
+    остальные ждут на семафоре - так создаётся обратное давление на
+    вызывающих. Пул можно передать общий для нескольких экземпляров;
+    собственный пул закрывается в aclose().
+
+    При отмене задачи ожидание прерывается сразу, а ещё не начатый вызов
+    отменяется; начатый вызов библиотеки завершается в пуле, его
+    результат отбрасывается.
+    """
+
+    def __init__(self, md6=None, concurrency=None, executor=None):
+        self.md6 = md6 or get_md6()
+        self.concurrency = concurrency or min(32, os.cpu_count() or 1)
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="md6"
+        )
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def run(self, fn, *args):
+        """fn(*args) в пуле с учётом ограничения concurrency."""
+        async with self.semaphore:
+            future = self.executor.submit(fn, *args)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+
+    async def hash_bytes(self, data, key=b"", output_length=32):
+        """Сырой хеш bytes-подобного объекта; буфер не должен меняться до конца."""
+        return await self.run(self.md6.compute_md6_digest_from_input, data, key, output_length)
+
+    async def hash_file(self, file_path, key=b"", output_length=32, use_mmap=False):
+        """Сырой хеш файла; файл читается библиотекой в потоке пула."""
+        return await self.run(
+            self.md6.compute_md6_digest_from_file, file_path, key, output_length, use_mmap
+        )
+
+    async def hash_stream(self, chunks, key=b"", output_length=32):
+        """Сырой хеш данных из асинхронного итератора частей.
+
+        Следующая часть запрашивается только после того, как предыдущая
+        обработана, поэтому быстрый источник (например, тело запроса
+        aiohttp) не накапливается в памяти.
+        """
+        hasher = self.md6.stream(key, output_length)
+        # Состояние освобождается только после выполняющегося update
+        lock = threading.Lock()
+
+        def locked(method, *args):
+            with lock:
+                return method(*args)
+
+        try:
+            async for chunk in chunks:
+                await self.run(locked, hasher.update, chunk)
+            return await self.run(locked, hasher.finalize_digest)
+        finally:
+            # Закрытие в пуле не ждёт отменённый, но ещё выполняющийся update.
+            # После aclose пул не принимает задачи, зато и update в нём уже
+            # не выполняются, поэтому хешер закрывается сразу
+            try:
+                self.executor.submit(locked, hasher.close)
+            except RuntimeError:
+                locked(hasher.close)
+
+    async def aclose(self):
+        """Дождаться вызовов в пуле и закрыть его, если он собственный."""
+        if self.own_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
@@ -0,0 +1,685 @@
+"""Бенчмарки привязок MD6.
+
+Запуск:
+    python bench.py loader [--iterations N]
+    python bench.py parallel [--size-mb N] [--workers N ...]
+    python bench.py compress [--size-mb N]
+    python bench.py stress [--threads N] [--rounds N]
+    python bench.py batch [--count N] [--size N]
+    python bench.py file [--sizes 1M 64M 1G 10G] [--dir DIR]
+    python bench.py tree [--size-mb N] [--patches N] [--dir DIR]
+    python bench.py async [--count N] [--size N] [--concurrency N ...]
+    python bench.py suite [--sizes 64 64K 1G] [--workers 1 0] [-o RESULTS.json]
+                          [--baseline BASELINE.json] [--tolerance 0.1] [--no-native]
+    python bench.py oracle [--cases N] [--blocks N]
+    python bench.py keyed [--count N] [--size N]
+    python bench.py shard [--size-mb N] [--shard-size 64M] [--processes N ...] [--dir DIR]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asyncmd6 import AsyncMD6
+from md6 import (
+    MD6_PARALLEL_PER_BLOCK,
+    MD6_PARALLEL_POOLED,
+    MD6_PARALLEL_SEQUENTIAL,
+    MD6Hash,
+    find_md6_library,
+    get_md6,
+)
+from sharded import ShardedMD6
+
+# Ключ для замеров с ключом
+BENCH_KEY = b"Abcdefgh12!"
+
+
+def bench_loader(iterations):
+    """Накладные расходы на хеш: новый MD6Hash на каждый вызов против общего."""
+    library_path = find_md6_library()
+    data = b"x" * 64
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        MD6Hash(library_path).compute_md6_hash_from_input(data, b"", 32)
+    per_call_load = (time.perf_counter() - started) / iterations
+
+    md6 = get_md6()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        md6.compute_md6_hash_from_input(data, b"", 32)
+    shared = (time.perf_counter() - started) / iterations
+
+    print(f"new MD6Hash per call: {per_call_load * 1e6:.1f} us/hash")
+    print(f"shared get_md6():     {shared * 1e6:.1f} us/hash")
+    print(f"loader overhead:      {(per_call_load - shared) * 1e6:.1f} us/hash")
+
+
+def bench_parallel(size_mb, workers_list):
+    """Пропускная способность в режимах sequential, pooled и per-block."""
+    md6 = get_md6()
+    data = os.urandom(size_mb << 20)
+
+    modes = [(MD6_PARALLEL_SEQUENTIAL, 0), (MD6_PARALLEL_PER_BLOCK, 0)]
+    modes += [(MD6_PARALLEL_POOLED, workers) for workers in workers_list]
+    try:
+        for mode, workers in modes:
+            md6.set_parallelism(mode, workers)
+            started = time.perf_counter()
+            md6.compute_md6_digest_from_input(data, b"", 32)
+            elapsed = time.perf_counter() - started
+            label = f"{mode}({workers or 'auto'})" if mode == MD6_PARALLEL_POOLED else mode
+            print(f"{label:<16} {size_mb / elapsed:8.1f} MB/s")
+    finally:
+        md6.set_parallelism()
+
+
+def bench_compress(size_mb):
+    """Пропускная способность из Python.
+
+    Время и аллокации на блок в Go измеряются отдельно:
+    go test -run '^$' -bench Compress -benchmem md6hash.go md6hash_test.go
+    """
+    md6 = get_md6()
+    data = os.urandom(size_mb << 20)
+    started = time.perf_counter()
+    md6.compute_md6_digest_from_input(data, b"", 32)
+    elapsed = time.perf_counter() - started
+    print(f"python buffer API {size_mb / elapsed:8.1f} MB/s")
+
+
+def bench_stress(threads, rounds):
+    """Одновременное хеширование из многих потоков Python.
+
+    Каждый вход хешируется последовательно, затем многократно из пула
+    потоков; все результаты должны совпасть с эталоном. Входы не содержат
+    нулевых байтов, чтобы MD6FromInput (c_char_p) хешировал их целиком.
+    """
+    md6 = get_md6()
+    inputs = [
+        os.urandom(size).replace(b"\0", b"\1")
+        for size in (0, 1, 504, 512, 4096, 100_000, 1 << 20)
+    ]
+    keys = [b"", b"Abcdefgh12!"]
+    cases = [(data, key) for data in inputs for key in keys]
+    expected = [md6.compute_md6_digest_from_input(d, k, 64) for d, k in cases]
+
+    def run(index):
+        data, key = cases[index % len(cases)]
+        if index % 3 == 0:
+            result = md6.compute_md6_hash_from_input(data, key, 64)
+            return index, bytes.fromhex(result.decode())
+        if index % 3 == 1:
+            with md6.stream(key, 64) as hasher:
+                hasher.update(data)
+                return index, hasher.finalize_digest()
+        return index, md6.compute_md6_digest_from_input(data, key, 64)
+
+    started = time.perf_counter()
+    mismatches = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for index, result in executor.map(run, range(rounds * len(cases))):
+            if result != expected[index % len(cases)]:
+                mismatches += 1
+    elapsed = time.perf_counter() - started
+
+    print(f"{rounds * len(cases)} hashes in {threads} threads: {elapsed:.2f} s")
+    print(f"mismatches: {mismatches}")
+    return mismatches == 0
+
+
+def bench_batch(count, size):
+    """Много маленьких сообщений: по одному вызову на сообщение против hash_many."""
+    md6 = get_md6()
+    items = [os.urandom(size) for _ in range(count)]
+
+    started = time.perf_counter()
+    single = [md6.compute_md6_digest_from_input(item, b"", 32) for item in items]
+    per_item = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = md6.hash_many(items)
+    batched = time.perf_counter() - started
+
+    if bytes(batch) != b"".join(single):
+        raise SystemExit("hash_many results differ from per-item hashing")
+    print(f"per-item calls: {count / per_item:10.0f} msg/s")
+    print(f"hash_many:      {count / batched:10.0f} msg/s")
+
+
+def parse_size(text):
+    """Размер вида 64K, 1M, 10G в байтах."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    if text[-1].upper() in units:
+        return int(text[:-1]) * units[text[-1].upper()]
+    return int(text)
+
+
+def bench_file(sizes, directory):
+    """Чтение файла целиком в кучу, потоковое чтение и mmap на файлах разного размера."""
+    md6 = get_md6()
+    modes = [
+        ("read", lambda path: md6.compute_md6_hash_from_file(os.fsencode(path), b"", 32)),
+        ("stream", lambda path: md6.compute_md6_digest_from_file(path, b"", 32)),
+        ("mmap", lambda path: md6.compute_md6_digest_from_file(path, b"", 32, True)),
+    ]
+    for size in sizes:
+        with tempfile.NamedTemporaryFile(dir=directory) as f:
+            chunk = os.urandom(1 << 20)
+            for offset in range(0, size, len(chunk)):
+                f.write(chunk[: size - offset])
+            f.flush()
+
+            # Первый проход прогревает кэш страниц для всех режимов одинаково
+            md6.compute_md6_digest_from_file(f.name, b"", 32)
+            for mode, hash_file in modes:
+                started = time.perf_counter()
+                hash_file(f.name)
+                elapsed = time.perf_counter() - started
+                print(f"{size >> 20:>8} MB {mode:<7} {size / elapsed / (1 << 20):8.1f} MB/s")
+
+
+def bench_tree(size_mb, patches, directory):
+    """Полное хеширование с деревом против пересчёта после мелких изменений.
+
+    Файл изменяется в случайных местах, дописывается и укорачивается; после
+    каждого шага хеш из дерева сравнивается с полным хешированием.
+    """
+    md6 = get_md6()
+    key = b"Abcdefgh12!"
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        path = os.path.join(tmp, "data")
+        tree_path = os.path.join(tmp, "data.md6tree")
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1 << 20))
+
+        started = time.perf_counter()
+        md6.compute_md6_digest_with_tree(path, tree_path, key, 64)
+        full = time.perf_counter() - started
+        print(f"full hash + tree: {full:8.3f} s ({os.path.getsize(tree_path) >> 20} MB tree)")
+
+        def patch(f):
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            changed = []
+            for _ in range(patches):
+                offset = random.randrange(size)
+                data = os.urandom(random.randint(1, 4096))[: size - offset]
+                f.seek(offset)
+                f.write(data)
+                changed.append((offset, len(data)))
+            return changed
+
+        def append(f):
+            f.seek(0, os.SEEK_END)
+            f.write(os.urandom(100_000))
+            return []
+
+        def truncate(f):
+            f.truncate(f.seek(0, os.SEEK_END) - 300_007)
+            return []
+
+        steps = [("patch", patch), ("append", append), ("truncate", truncate)]
+        ok = True
+        for label, step in steps:
+            with open(path, "r+b") as f:
+                changed = step(f)
+            started = time.perf_counter()
+            digest = md6.update_md6_digest_with_tree(path, tree_path, key, 64, changed)
+            elapsed = time.perf_counter() - started
+            expected = md6.compute_md6_digest_from_file(path, key, 64)
+            ok &= digest == expected
+            print(
+                f"update after {label:<8} {elapsed:8.3f} s"
+                f" ({full / elapsed:6.1f}x) {'OK' if digest == expected else 'MISMATCH'}"
+            )
+        return ok
+
+
+def bench_async(count, size, concurrency_list):
+    """Пропускная способность AsyncMD6 и задержка цикла событий во время хеширования."""
+    md6 = get_md6()
+    items = [os.urandom(size) for _ in range(count)]
+    expected = [md6.compute_md6_digest_from_input(item, b"", 32) for item in items]
+
+    async def run(concurrency):
+        lag = 0.0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal lag
+            while not stop.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lag = max(lag, time.perf_counter() - started - 0.001)
+
+        async with AsyncMD6(md6, concurrency) as hasher:
+            tick = asyncio.create_task(ticker())
+            started = time.perf_counter()
+            results = await asyncio.gather(*(hasher.hash_bytes(item) for item in items))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await tick
+        return results == expected, elapsed, lag
+
+    ok = True
+    for concurrency in concurrency_list:
+        same, elapsed, lag = asyncio.run(run(concurrency))
+        ok &= same
+        print(
+            f"concurrency {concurrency:>3}: {count * size / elapsed / (1 << 20):8.1f} MB/s,"
+            f" max loop lag {lag * 1e3:6.1f} ms{'' if same else ' MISMATCH'}"
+        )
+    return ok
+
+
+def percentile(sorted_values, fraction):
+    """Значение по методу ближайшего ранга."""
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def run_suite_case(measure, size, seconds, max_iterations):
+    """Повторять measure() (секунды на хеш) не дольше seconds, минимум один раз."""
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_iterations and (
+        not latencies or time.perf_counter() - started < seconds
+    ):
+        latencies.append(measure())
+    latencies.sort()
+    p50 = percentile(latencies, 0.5)
+    return {
+        "iterations": len(latencies),
+        "mb_per_s": size / p50 / (1 << 20) if p50 else None,
+        "p50_ms": p50 * 1e3,
+        "p90_ms": percentile(latencies, 0.9) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+    }
+
+
+# Строка результата go test -bench: имя, число итераций и пары "значение единица"
+GO_BENCH_LINE = re.compile(r"^BenchmarkHash/(\S+?)(?:-\d+)?\s+(\d+)\s+(.*ns/op.*)$")
+
+
+def print_suite_result(result):
+    print(
+        f"{result['name']:<36} {result['mb_per_s']:10.2f} MB/s"
+        f"  p50 {result['p50_ms']:10.3f} ms"
+        f"  p99 {result['p99_ms']:10.3f} ms"
+        f"  n={result['iterations']}",
+        flush=True,
+    )
+
+
+def go_bench_result(name, iterations, metrics):
+    """Результат BenchmarkHash в формате bench_suite."""
+    path, size, keyed, workers = name.split("/")
+    values = {unit: float(value) for value, unit in re.findall(r"([\d.]+) (\S+)", metrics)}
+    p50 = values["p50-ns"] / 1e9
+    return {
+        "name": name,
+        "path": path,
+        "size": int(size),
+        "keyed": keyed == "keyed",
+        "workers": int(workers[1:]),
+        "iterations": int(iterations),
+        "mb_per_s": int(size) / p50 / (1 << 20) if p50 else None,
+        "p50_ms": p50 * 1e3,
+        "p90_ms": values["p90-ns"] / 1e6,
+        "p99_ms": values["p99-ns"] / 1e6,
+        "bytes_per_op": values.get("B/op"),
+        "allocs_per_op": values.get("allocs/op"),
+    }
+
+
+def run_go_benchmarks(sizes, workers_list, seconds):
+    """Матрица BenchmarkHash из md6hash_test.go (время внутри Go без ctypes).
+
+    go test запускается с -json; результаты печатаются по мере готовности.
+    """
+    go = shutil.which(os.environ.get("GO", "go"))
+    if go is None:
+        raise SystemExit("bench: go is not installed; use suite --no-native")
+    command = [go, "test", "-run", "^$", "-bench", "^BenchmarkHash$", "-benchmem"]
+    command += ["-benchtime", f"{seconds}s", "-json", "md6hash.go", "md6hash_test.go"]
+    command += [
+        "-args",
+        f"-md6.sizes={','.join(map(str, sizes))}",
+        f"-md6.workers={','.join(map(str, workers_list))}",
+    ]
+    results = []
+    pending = {}
+    with subprocess.Popen(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, GO111MODULE="off"),
+        stdout=subprocess.PIPE,
+        text=True,
+    ) as process:
+        for line in process.stdout:
+            if not line.startswith("{"):
+                continue
+            event = json.loads(line)
+            if event.get("Action") != "output":
+                continue
+            # Имя и результат бенчмарка приходят отдельными событиями
+            test = event.get("Test", "")
+            text = pending.pop(test, "") + event["Output"]
+            *lines, pending[test] = text.split("\n")
+            for output in lines:
+                match = GO_BENCH_LINE.match(output)
+                if match:
+                    results.append(go_bench_result(*match.groups()))
+                    print_suite_result(results[-1])
+    if process.returncode:
+        raise SystemExit(f"bench: go test failed with status {process.returncode}")
+    return results
+
+
+def bench_suite(sizes, workers_list, seconds, max_iterations, native=True):
+    """Замеры по размеру входа, ключу и числу воркеров.
+
+    python - вызов MD6HashBuffer через ctypes, время включает маршалинг;
+    native-stream и native-tree - BenchmarkHash из md6hash_test.go, время
+    внутри Go для потокового хешера и для buildTree.
+    """
+    md6 = get_md6()
+    results = []
+    try:
+        for size in sizes:
+            chunk = os.urandom(min(size, 1 << 20))
+            data = chunk * (size // len(chunk)) + chunk[: size % len(chunk)]
+            for key in (b"", BENCH_KEY):
+                paths = {
+                    "python": lambda: timed(
+                        lambda: md6.compute_md6_digest_from_input(data, key, 32)
+                    ),
+                }
+                for workers in workers_list:
+                    md6.set_parallelism(MD6_PARALLEL_POOLED, workers)
+                    for path, measure in paths.items():
+                        keyed = "keyed" if key else "nokey"
+                        result = {
+                            "name": f"{path}/{size}/{keyed}/w{workers}",
+                            "path": path,
+                            "size": size,
+                            "keyed": bool(key),
+                            "workers": workers,
+                        }
+                        result.update(run_suite_case(measure, size, seconds, max_iterations))
+                        results.append(result)
+                        print_suite_result(result)
+    finally:
+        md6.set_parallelism()
+    if native:
+        results += run_go_benchmarks(sizes, workers_list, seconds)
+
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def compare_with_baseline(report, baseline, tolerance):
+    """Замеры, у которых MB/s упали больше чем на tolerance от базовой линии."""
+    base = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = base.get(result["name"])
+        if not old or not old["mb_per_s"] or not result["mb_per_s"]:
+            continue
+        change = result["mb_per_s"] / old["mb_per_s"] - 1
+        print(f"{result['name']:<36} {change * 100:+7.1f}% vs baseline")
+        if change < -tolerance:
+            regressions.append((result["name"], old["mb_per_s"], result["mb_per_s"]))
+    return regressions
+
+
+def naive_compress(block, key):
+    """compressF пословно на чистом Python - точка отсчёта для md6numpy."""
+    from md6numpy import MASK, MD6_ROUNDS, Q, R, SHIFTS, T, U, V, precompute_si, prepare_key
+
+    A = Q + prepare_key(key) + [U, V]
+    A += [int.from_bytes(block[i : i + 8], "little") for i in range(0, len(block), 8)]
+    A += [0] * (89 - len(A))
+    si = precompute_si(MD6_ROUNDS)
+    for i in range(89, MD6_ROUNDS * 16):
+        step = (i - 89) % 16
+        x = si[step] ^ A[i - 89] ^ A[i - T[0]] ^ (A[i - T[1]] & A[i - T[2]])
+        x ^= A[i - T[3]] & A[i - T[4]]
+        x ^= x >> R[step]
+        x = (x ^ (x << SHIFTS[step])) & MASK
+        A.append(x)
+    return b"".join(word.to_bytes(8, "little") for word in A[-16:])
+
+
+def bench_oracle(cases, blocks):
+    """Сверка md6numpy с libmd6.so и скорость против пословного цикла."""
+    from md6numpy import MD6Context, MD6NumpyHash, compress_f, words_of
+
+    md6 = MD6Hash(find_md6_library())
+    reference = MD6NumpyHash()
+    mismatches = 0
+    sizes = [0, 1, 503, 504, 512, 1024, 4096, 100_000]
+    sizes += [random.randrange(1 << 20) for _ in range(cases)]
+    for size in sizes:
+        data = os.urandom(size)
+        for key in (b"", BENCH_KEY):
+            if md6.compute_md6_digest_from_input(data, key, 128) != (
+                reference.compute_md6_digest_from_input(data, key, 128)
+            ):
+                print(f"MISMATCH size={size} key={key!r}")
+                mismatches += 1
+    print(f"{len(sizes) * 2} inputs checked, mismatches: {mismatches}")
+
+    data = os.urandom(blocks * 512)
+    started = time.perf_counter()
+    for i in range(0, min(len(data), 64 * 512), 512):
+        naive_compress(data[i : i + 512], BENCH_KEY)
+    naive = (time.perf_counter() - started) / min(blocks, 64)
+    if naive_compress(data[:512], BENCH_KEY) != compress_f(data[:512], BENCH_KEY):
+        print("MISMATCH naive compressF")
+        mismatches += 1
+
+    context = MD6Context(BENCH_KEY)
+    words = words_of(data).reshape(-1, 64)
+    started = time.perf_counter()
+    context.compress(words)
+    vectorised = (time.perf_counter() - started) / blocks
+    print(f"per-word Python: {naive * 1e6:10.1f} us/block")
+    print(f"NumPy, {blocks} blocks: {vectorised * 1e6:8.1f} us/block ({naive / vectorised:.1f}x)")
+    return mismatches == 0
+
+
+def bench_keyed(count, size):
+    """Ключ в каждом вызове против контекста MD6Hash.with_key на коротких сообщениях."""
+    md6 = get_md6()
+    messages = [os.urandom(size) for _ in range(count)]
+    started = time.perf_counter()
+    expected = [md6.compute_md6_digest_from_input(m, BENCH_KEY, 32) for m in messages]
+    per_call = time.perf_counter() - started
+    with md6.with_key(BENCH_KEY) as keyed:
+        started = time.perf_counter()
+        digests = [keyed.compute_md6_digest_from_input(m, 32) for m in messages]
+        reused = time.perf_counter() - started
+    print(f"key per call: {per_call / count * 1e6:8.2f} us/message")
+    print(
+        f"with_key:     {reused / count * 1e6:8.2f} us/message ({per_call / reused:.2f}x)"
+        f" {'OK' if digests == expected else 'MISMATCH'}"
+    )
+    return digests == expected
+
+
+def bench_shard(size_mb, shard_size, processes_list, directory):
+    """Хеширование файла в одном процессе против шардов в пуле процессов."""
+    md6 = get_md6()
+    ok = True
+    with tempfile.NamedTemporaryFile(dir=directory) as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1 << 20))
+        # Неполный последний шард
+        f.write(os.urandom(12345))
+        f.flush()
+
+        md6.compute_md6_digest_from_file(f.name, BENCH_KEY, 64)
+        started = time.perf_counter()
+        expected = md6.compute_md6_digest_from_file(f.name, BENCH_KEY, 64)
+        single = time.perf_counter() - started
+        print(f"1 process:    {single:8.3f} s")
+        for processes in processes_list:
+            with ShardedMD6(md6, processes, shard_size) as sharded:
+                # Первый вызов запускает пул
+                sharded.compute_md6_digest_from_file(f.name, BENCH_KEY, 64)
+                started = time.perf_counter()
+                digest = sharded.compute_md6_digest_from_file(f.name, BENCH_KEY, 64)
+                elapsed = time.perf_counter() - started
+            ok &= digest == expected
+            print(
+                f"{processes:>2} processes: {elapsed:8.3f} s ({single / elapsed:5.2f}x)"
+                f" {'OK' if digest == expected else 'MISMATCH'}"
+            )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MD6 benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    loader = subparsers.add_parser("loader", help="library loading overhead")
+    loader.add_argument("--iterations", type=int, default=2000)
+
+    parallel = subparsers.add_parser("parallel", help="block parallelism modes")
+    parallel.add_argument("--size-mb", type=int, default=64)
+    parallel.add_argument(
+        "--workers", type=int, nargs="+", default=[0], help="pool sizes, 0 = auto"
+    )
+
+    compress = subparsers.add_parser("compress", help="buffer API throughput")
+    compress.add_argument("--size-mb", type=int, default=64)
+
+    stress = subparsers.add_parser("stress", help="concurrent determinism check")
+    stress.add_argument("--threads", type=int, default=32)
+    stress.add_argument("--rounds", type=int, default=20)
+
+    batch = subparsers.add_parser("batch", help="batch API on small messages")
+    batch.add_argument("--count", type=int, default=100_000)
+    batch.add_argument("--size", type=int, default=64)
+
+    file = subparsers.add_parser("file", help="read, streaming and mmap file input")
+    file.add_argument("--sizes", type=parse_size, nargs="+", default=[1 << 20, 64 << 20])
+    file.add_argument("--dir", default=None, help="directory for the test files")
+
+    tree = subparsers.add_parser("tree", help="incremental rehash with a saved tree")
+    tree.add_argument("--size-mb", type=int, default=256)
+    tree.add_argument("--patches", type=int, default=16)
+    tree.add_argument("--dir", default=None, help="directory for the test files")
+
+    async_parser = subparsers.add_parser("async", help="AsyncMD6 throughput and loop lag")
+    async_parser.add_argument("--count", type=int, default=256)
+    async_parser.add_argument("--size", type=int, default=1 << 20)
+    async_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+
+    suite = subparsers.add_parser("suite", help="MB/s and latency percentiles as JSON")
+    suite.add_argument(
+        "--sizes", type=parse_size, nargs="+", default=[64, 64 << 10, 1 << 30]
+    )
+    suite.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 0], help="pool sizes, 0 = auto"
+    )
+    suite.add_argument("--seconds", type=float, default=2.0, help="time budget per case")
+    suite.add_argument("--max-iterations", type=int, default=10_000)
+    suite.add_argument("-o", "--output", help="write results as JSON")
+    suite.add_argument("--baseline", help="JSON results to compare against")
+    suite.add_argument(
+        "--tolerance", type=float, default=0.1, help="allowed MB/s drop, 0.1 = 10%%"
+    )
+    suite.add_argument(
+        "--no-native", action="store_true", help="skip the Go benchmarks (needs go)"
+    )
+
+    oracle = subparsers.add_parser("oracle", help="check the NumPy backend against the library")
+    oracle.add_argument("--cases", type=int, default=20, help="random input sizes")
+    oracle.add_argument("--blocks", type=int, default=4096)
+
+    keyed = subparsers.add_parser("keyed", help="prepared key context on small messages")
+    keyed.add_argument("--count", type=int, default=100_000)
+    keyed.add_argument("--size", type=int, default=64)
+
+    shard = subparsers.add_parser("shard", help="multi-process hashing of one file")
+    shard.add_argument("--size-mb", type=int, default=512)
+    shard.add_argument("--shard-size", type=parse_size, default=64 << 20)
+    shard.add_argument("--processes", type=int, nargs="+", default=[2, os.cpu_count() or 1])
+    shard.add_argument("--dir", default=None, help="directory for the test files")
+
+    args = parser.parse_args()
+    if args.command == "loader":
+        bench_loader(args.iterations)
+    elif args.command == "parallel":
+        bench_parallel(args.size_mb, args.workers)
+    elif args.command == "compress":
+        bench_compress(args.size_mb)
+    elif args.command == "batch":
+        bench_batch(args.count, args.size)
+    elif args.command == "file":
+        bench_file(args.sizes, args.dir)
+    elif args.command == "tree":
+        if not bench_tree(args.size_mb, args.patches, args.dir):
+            sys.exit(1)
+    elif args.command == "async":
+        if not bench_async(args.count, args.size, args.concurrency):
+            sys.exit(1)
+    elif args.command == "suite":
+        report = bench_suite(
+            args.sizes, args.workers, args.seconds, args.max_iterations, not args.no_native
+        )
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+            for name, old, new in regressions:
+                print(f"REGRESSION {name}: {old:.2f} -> {new:.2f} MB/s", file=sys.stderr)
+            if regressions:
+                sys.exit(1)
+    elif args.command == "oracle":
+        if not bench_oracle(args.cases, args.blocks):
+            sys.exit(1)
+    elif args.command == "keyed":
+        if not bench_keyed(args.count, args.size):
+            sys.exit(1)
+    elif args.command == "shard":
+        if not bench_shard(args.size_mb, args.shard_size, args.processes, args.dir):
+            sys.exit(1)
+    elif args.command == "stress":
+        if not bench_stress(args.threads, args.rounds):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Постоянный кэш хешей файлов (SQLite).
+
+Запись находится по абсолютному пути, отпечатку ключа и длине хеша и
+действительна, пока у файла не изменились размер, mtime, inode и устройство.
+Сам ключ в кэше не хранится - только его отпечаток, HMAC со случайной солью
+базы: по утёкшей базе нельзя перебрать ключи по словарю заранее
+вычисленных отпечатков или связать один ключ в разных базах. При превышении
+max_entries вытесняются давно не использовавшиеся записи (LRU).
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+# Доля записей, удаляемых за одно вытеснение, чтобы не вытеснять на каждой вставке
+CACHE_EVICT_FRACTION = 0.1
+
+# Количество новых записей между фиксациями транзакции
+CACHE_COMMIT_INTERVAL = 1000
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    path TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    device INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (path, fingerprint, length)
+);
+CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+"""
+
+# Длина соли отпечатков ключей в байтах
+CACHE_SALT_SIZE = 32
+
+
+def file_signature(stat):
+    """Поля stat, при совпадении которых файл считается неизменным."""
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_dev)
+
+
+def key_fingerprint(key, salt):
+    """Отпечаток ключа для кэша; по нему нельзя восстановить ключ."""
+    return hmac.new(salt, b"md6-digest-cache\0" + key, hashlib.sha256).hexdigest()[:32]
+
+
+def cache_salt(connection):
+    """Соль отпечатков базы; создаётся при первом открытии.
+
+    Записи базы без соли сделаны с несолёными отпечатками и удаляются.
+    """
+    row = connection.execute("SELECT value FROM meta WHERE name = 'salt'").fetchone()
+    if row is not None:
+        return bytes(row[0])
+    with connection:
+        # Соль могла появиться из другого процесса: INSERT OR IGNORE и повторное чтение
+        inserted = connection.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('salt', ?)",
+            (secrets.token_bytes(CACHE_SALT_SIZE),),
+        ).rowcount
+        if inserted:
+            connection.execute("DELETE FROM digests")
+    return bytes(
+        connection.execute("SELECT value FROM meta WHERE name = 'salt'").fetchone()[0]
+    )
+
+
+class DigestCache:
+    """Кэш перед MD6Hash.compute_md6_digest_from_file.
+
+    Счётчики hits, misses, bytes_saved относятся к текущему сеансу;
+    накопленные значения сохраняются в базе при close().
+    """
+
+    COUNTERS = ("hits", "misses", "bytes_saved", "bytes_hashed", "seconds_hashing")
+
+    def __init__(self, db_path, max_entries=1_000_000):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(CACHE_SCHEMA)
+        self.salt = cache_salt(self.connection)
+        self.entries = self.connection.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+        self.clock = (
+            self.connection.execute("SELECT MAX(last_used) FROM digests").fetchone()[0] or 0
+        )
+        self.fingerprints = {}
+        self.uncommitted = 0
+        if self.entries > self.max_entries:
+            self.evict()
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.bytes_hashed = 0
+        self.seconds_hashing = 0.0
+
+    def fingerprint(self, key):
+        if key not in self.fingerprints:
+            self.fingerprints[key] = key_fingerprint(key, self.salt)
+        return self.fingerprints[key]
+
+    def lookup(self, path, stat, fingerprint, length):
+        """Сохранённый хеш или None, если файл изменился или записи нет."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT size, mtime_ns, inode, device, digest FROM digests"
+                " WHERE path = ? AND fingerprint = ? AND length = ?",
+                (path, fingerprint, length),
+            ).fetchone()
+            if row is None or tuple(row[:4]) != file_signature(stat):
+                return None
+            self.clock += 1
+            self.connection.execute(
+                "UPDATE digests SET last_used = ?"
+                " WHERE path = ? AND fingerprint = ? AND length = ?",
+                (self.clock, path, fingerprint, length),
+            )
+            return bytes(row[4])
+
+    def store(self, path, stat, fingerprint, length, digest):
+        with self.lock:
+            exists = self.connection.execute(
+                "SELECT 1 FROM digests WHERE path = ? AND fingerprint = ? AND length = ?",
+                (path, fingerprint, length),
+            ).fetchone()
+            self.clock += 1
+            self.connection.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, fingerprint, length, *file_signature(stat), digest, self.clock),
+            )
+            if not exists:
+                self.entries += 1
+            if self.entries > self.max_entries:
+                self.evict()
+
+            self.uncommitted += 1
+            if self.uncommitted >= CACHE_COMMIT_INTERVAL:
+                self.connection.commit()
+                self.uncommitted = 0
+
+    def evict(self):
+        """Удалить самые давно использованные записи сверх лимита."""
+        excess = self.entries - self.max_entries
+        count = max(excess, int(self.max_entries * CACHE_EVICT_FRACTION))
+        self.connection.execute(
+            "DELETE FROM digests WHERE rowid IN"
+            " (SELECT rowid FROM digests ORDER BY last_used LIMIT ?)",
+            (count,),
+        )
+        self.entries = self.connection.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def compute_md6_digest_from_file(
+        self, md6, file_path, key, output_length, use_mmap=False
+    ):
+        """Сырой хеш файла из кэша или, при промахе, вычисленный через md6."""
+        path = os.path.abspath(file_path)
+        fingerprint = self.fingerprint(key)
+        stat = os.stat(path)
+
+        digest = self.lookup(path, stat, fingerprint, output_length)
+        if digest is not None:
+            with self.lock:
+                self.hits += 1
+                self.bytes_saved += stat.st_size
+            return digest
+
+        started = time.perf_counter()
+        digest = md6.compute_md6_digest_from_file(path, key, output_length, use_mmap)
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.misses += 1
+            self.bytes_hashed += stat.st_size
+            self.seconds_hashing += elapsed
+
+        # Файл, изменившийся во время хеширования, в кэш не попадает
+        if file_signature(os.stat(path)) == file_signature(stat):
+            self.store(path, stat, fingerprint, output_length, digest)
+        return digest
+
+    def seconds_saved(self):
+        """Оценка сэкономленного времени по средней скорости хеширования."""
+        if not self.bytes_hashed or not self.seconds_hashing:
+            return 0.0
+        return self.bytes_saved * self.seconds_hashing / self.bytes_hashed
+
+    def stats(self):
+        """Счётчики текущего сеанса и накопленные за всё время."""
+        with self.lock:
+            totals = dict(self.connection.execute("SELECT name, value FROM counters"))
+        session = {name: getattr(self, name) for name in self.COUNTERS}
+        session["seconds_saved"] = self.seconds_saved()
+        return {
+            "entries": self.entries,
+            "session": session,
+            "total": {name: totals.get(name, 0) + session[name] for name in self.COUNTERS},
+        }
+
+    def close(self):
+        """Сохранить накопленные счётчики и закрыть базу."""
+        with self.lock:
+            self.connection.executemany(
+                "INSERT INTO counters VALUES (?, ?)"
+                " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                [(name, getattr(self, name)) for name in self.COUNTERS],
+            )
+            self.connection.commit()
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,439 @@
+"""Консольный режим: хеширование и проверка деревьев каталогов без GUI.
+
+    python main.py hash PATH... [-o MANIFEST] [--workers N]
+    python main.py verify MANIFEST [--root DIR] [--workers N]
+    python main.py match MANIFEST PATH... [--table FILE] [--workers N]
+    python main.py keygen [-n COUNT] [--length N] [-o FILE]
+
+Манифест - текстовый файл, по строке на файл: digest, size, mtime_ns и
+path через табуляцию (см. manifest.py). Модуль не импортирует PyQt5 и fitz.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from cache import DigestCache
+from keys import KEY_MAX_LENGTH, generate_keys, is_key_valid
+from manifest import (
+    MANIFEST_HEADER,
+    ManifestEntry,
+    format_manifest_line,
+    open_manifest_index,
+    read_manifest,
+)
+from md6 import get_md6
+from sharded import MD6_SHARD_SIZE, ShardedMD6
+
+COMMANDS = ("hash", "verify", "match", "keygen")
+
+
+def iter_files(paths):
+    """Файлы из списка путей; каталоги обходятся рекурсивно в порядке имён."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dir_path, dir_names, file_names in os.walk(path):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                yield os.path.join(dir_path, file_name)
+
+
+def imap_unordered(executor, fn, items, limit):
+    """Пары (item, future) для fn(item) по мере завершения.
+
+    Одновременно выполняется не больше limit заданий, поэтому обход
+    каталогов не опережает хеширование и память не растёт.
+    """
+    pending = {}
+    for item in items:
+        if len(pending) >= limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+        pending[executor.submit(fn, item)] = item
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future
+
+
+def load_key(args):
+    """Ключ из --key или --key-file, проверенный по правилам is_key_valid."""
+    if args.key_file:
+        with open(args.key_file, "r", encoding="utf-8") as f:
+            key = f.readline().rstrip("\r\n")
+    elif args.key is not None:
+        key = args.key
+    else:
+        return b""
+
+    if not is_key_valid(
+        key,
+        args.key_min_length,
+        args.exclude_digits,
+        args.exclude_lower,
+        args.exclude_upper,
+        args.exclude_special,
+    ):
+        raise ValueError("Invalid key!")
+    return key.encode("utf-8")
+
+
+def file_digest(md6, path, key, output_length, cache=None, use_mmap=False):
+    """Сырой хеш файла, через кэш, если он задан."""
+    if cache:
+        return cache.compute_md6_digest_from_file(md6, path, key, output_length, use_mmap)
+    return md6.compute_md6_digest_from_file(path, key, output_length, use_mmap)
+
+
+def hash_file(md6, path, key, output_length, cache=None, use_mmap=False):
+    stat = os.stat(path)
+    digest = file_digest(md6, path, key, output_length, cache, use_mmap)
+    return ManifestEntry(digest.hex(), stat.st_size, stat.st_mtime_ns, path)
+
+
+def verify_entry(md6, entry, root, key, cache=None, use_mmap=False):
+    """Статус файла из манифеста: OK, FAILED или MISSING."""
+    path = os.path.join(root, entry.path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "MISSING"
+    if stat.st_size != entry.size:
+        return "FAILED"
+    digest = file_digest(md6, path, key, len(entry.digest) // 2, cache, use_mmap)
+    return "OK" if digest.hex() == entry.digest else "FAILED"
+
+
+def open_cache(args):
+    return DigestCache(args.cache, args.cache_max_entries) if args.cache else None
+
+
+def report_cache(cache):
+    """Счётчики кэша в stderr по окончании команды."""
+    stats = cache.stats()
+    session, total = stats["session"], stats["total"]
+    print(
+        f"md6 cache: {session['hits']} hits, {session['misses']} misses,"
+        f" {session['bytes_saved'] / (1 << 30):.2f} GiB not re-read"
+        f" (~{session['seconds_saved'] / 3600:.2f} h);"
+        f" all time: {int(total['hits'])} hits, {int(total['misses'])} misses,"
+        f" {stats['entries']} entries",
+        file=sys.stderr,
+    )
+    cache.close()
+
+
+def open_hasher(args):
+    """MD6Hash или, с --processes, ShardedMD6 поверх него."""
+    if args.processes:
+        return ShardedMD6(get_md6(), args.processes, args.shard_size)
+    return get_md6()
+
+
+def command_hash(args, key):
+    md6 = open_hasher(args)
+    out = (
+        open(args.output, "w", encoding="utf-8", errors="surrogateescape")
+        if args.output
+        else sys.stdout
+    )
+    cache = open_cache(args)
+    errors = 0
+    try:
+        print(MANIFEST_HEADER, file=out, flush=True)
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            results = imap_unordered(
+                executor,
+                lambda path: hash_file(md6, path, key, args.length, cache, args.mmap),
+                iter_files(args.paths),
+                args.workers * 4,
+            )
+            for path, future in results:
+                try:
+                    line = format_manifest_line(future.result())
+                except Exception as e:
+                    print(f"md6: {path}: {e}", file=sys.stderr)
+                    errors += 1
+                    continue
+                print(line, file=out, flush=True)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if isinstance(md6, ShardedMD6):
+            md6.close()
+        if cache:
+            report_cache(cache)
+    return 1 if errors else 0
+
+
+def command_verify(args, key):
+    md6 = open_hasher(args)
+    cache = open_cache(args)
+    failed = total = 0
+    try:
+        with open(args.manifest, "r", encoding="utf-8", errors="surrogateescape") as f:
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                results = imap_unordered(
+                    executor,
+                    lambda entry: verify_entry(
+                        md6, entry, args.root, key, cache, args.mmap
+                    ),
+                    read_manifest(f),
+                    args.workers * 4,
+                )
+                for entry, future in results:
+                    total += 1
+                    try:
+                        status = future.result()
+                    except Exception as e:
+                        status = f"FAILED ({e})"
+                    if status != "OK":
+                        failed += 1
+                    if status != "OK" or not args.quiet:
+                        print(f"{entry.path}: {status}", flush=True)
+    finally:
+        if isinstance(md6, ShardedMD6):
+            md6.close()
+        if cache:
+            report_cache(cache)
+
+    if failed:
+        print(f"md6: {failed} of {total} files failed verification", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def command_match(args, key):
+    """Поиск хешей файлов в манифесте; неизвестные файлы выводятся по мере хеширования."""
+    md6 = open_hasher(args)
+    cache = open_cache(args)
+    unknown = total = 0
+    try:
+        with open_manifest_index(args.manifest, args.table) as index:
+            output_length = index.digest_size or 32
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                results = imap_unordered(
+                    executor,
+                    lambda path: file_digest(md6, path, key, output_length, cache, args.mmap),
+                    iter_files(args.paths),
+                    args.workers * 4,
+                )
+                for path, future in results:
+                    total += 1
+                    try:
+                        paths = index.paths(future.result())
+                    except Exception as e:
+                        paths, status = [], f"FAILED ({e})"
+                    else:
+                        status = f"OK ({', '.join(paths)})" if paths else "UNKNOWN"
+                    if not paths:
+                        unknown += 1
+                    if not paths or not args.quiet:
+                        print(f"{path}: {status}", flush=True)
+    finally:
+        if isinstance(md6, ShardedMD6):
+            md6.close()
+        if cache:
+            report_cache(cache)
+
+    if unknown:
+        print(f"md6: {unknown} of {total} files are not in the manifest", file=sys.stderr)
+    return 1 if unknown else 0
+
+
+def command_keygen(args):
+    """Ключи по одному в строке; каждый проходит is_key_valid с теми же ограничениями."""
+    keys = generate_keys(
+        args.count,
+        args.length,
+        args.key_min_length,
+        args.exclude_digits,
+        args.exclude_lower,
+        args.exclude_upper,
+        args.exclude_special,
+    )
+    if args.output:
+        # Ключи - секреты: файл создаётся доступным только владельцу
+        fd = os.open(args.output, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        out = open(fd, "w", encoding="utf-8")
+    else:
+        out = sys.stdout
+    try:
+        for key in keys:
+            print(key, file=out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def add_key_arguments(parser):
+    """Ключ и ограничения на него, как в KeySettingsDialog."""
+    group = parser.add_argument_group("key")
+    source = group.add_mutually_exclusive_group()
+    source.add_argument("--key", help="key text (visible in the process list)")
+    source.add_argument("--key-file", help="read the key from the first line of a file")
+    add_key_rule_arguments(group)
+
+
+def add_key_rule_arguments(group):
+    group.add_argument("--key-min-length", type=int, default=8)
+    group.add_argument("--exclude-digits", action="store_true")
+    group.add_argument("--exclude-lower", action="store_true")
+    group.add_argument("--exclude-upper", action="store_true")
+    group.add_argument("--exclude-special", action="store_true")
+
+
+def add_cache_arguments(parser):
+    group = parser.add_argument_group("digest cache")
+    group.add_argument(
+        "--cache", help="SQLite file with digests of unchanged files (created if missing)"
+    )
+    group.add_argument("--cache-max-entries", type=int, default=1_000_000)
+
+
+def add_shard_arguments(parser):
+    group = parser.add_argument_group("multi-process hashing")
+    group.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="hash files larger than --shard-size in N processes (default: off)",
+    )
+    group.add_argument(
+        "--shard-size",
+        type=int,
+        default=MD6_SHARD_SIZE,
+        help="bytes per process task, a power of two >= 512",
+    )
+
+
+def add_profile_arguments(parser):
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument(
+        "--stats", action="store_true", help="print library timers and counters to stderr"
+    )
+    group.add_argument("--pprof", metavar="ADDR", help="serve pprof, e.g. 127.0.0.1:6060")
+    group.add_argument("--cpu-profile", metavar="FILE", help="write a Go CPU profile")
+    group.add_argument("--heap-profile", metavar="FILE", help="write a Go heap profile")
+
+
+def run_instrumented(args, command, key):
+    """Выполнить команду со статистикой и профилированием, если они заданы."""
+    md6 = get_md6()
+    if not md6.instrumented:
+        # Таймеры и профили собирает только библиотека
+        for flag, value in (
+            ("--stats", args.stats),
+            ("--pprof", args.pprof),
+            ("--cpu-profile", args.cpu_profile),
+            ("--heap-profile", args.heap_profile),
+        ):
+            if value:
+                print(f"md6: {flag} requires libmd6.so", file=sys.stderr)
+                return 2
+    if args.stats:
+        md6.enable_stats()
+    if args.pprof or args.cpu_profile:
+        md6.start_profiling(args.pprof, args.cpu_profile)
+    try:
+        return command(args, key)
+    finally:
+        if args.cpu_profile or args.heap_profile:
+            md6.stop_profiling(args.heap_profile)
+        if args.stats:
+            print(f"md6 stats: {json.dumps(md6.stats())}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="MD6 hashing")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    workers = min(32, os.cpu_count() or 1)
+
+    hash_parser = subparsers.add_parser("hash", help="hash files and write a manifest")
+    hash_parser.add_argument("paths", nargs="+", help="files or directories")
+    hash_parser.add_argument("-o", "--output", help="manifest file (default: stdout)")
+    hash_parser.add_argument("--length", type=int, default=32, help="digest bytes")
+    hash_parser.add_argument("--workers", type=int, default=workers)
+    hash_parser.add_argument("--mmap", action="store_true", help="memory-map files")
+    add_key_arguments(hash_parser)
+    add_cache_arguments(hash_parser)
+    add_shard_arguments(hash_parser)
+    add_profile_arguments(hash_parser)
+
+    verify_parser = subparsers.add_parser("verify", help="check files against a manifest")
+    verify_parser.add_argument("manifest")
+    verify_parser.add_argument(
+        "--root", default=".", help="directory that relative paths are resolved against"
+    )
+    verify_parser.add_argument("--workers", type=int, default=workers)
+    verify_parser.add_argument("--mmap", action="store_true", help="memory-map files")
+    verify_parser.add_argument("-q", "--quiet", action="store_true", help="report only failures")
+    add_key_arguments(verify_parser)
+    add_cache_arguments(verify_parser)
+    add_shard_arguments(verify_parser)
+    add_profile_arguments(verify_parser)
+
+    match_parser = subparsers.add_parser(
+        "match", help="look up digests of files in a manifest, whatever their paths"
+    )
+    match_parser.add_argument("manifest")
+    match_parser.add_argument("paths", nargs="+", help="files or directories")
+    match_parser.add_argument(
+        "--table",
+        metavar="FILE",
+        help="memory-mapped sorted digest table for huge manifests"
+        " (built if missing or older than the manifest)",
+    )
+    match_parser.add_argument("--workers", type=int, default=workers)
+    match_parser.add_argument("--mmap", action="store_true", help="memory-map files")
+    match_parser.add_argument("-q", "--quiet", action="store_true", help="report only failures")
+    add_key_arguments(match_parser)
+    add_cache_arguments(match_parser)
+    add_shard_arguments(match_parser)
+    add_profile_arguments(match_parser)
+
+    keygen_parser = subparsers.add_parser("keygen", help="generate random keys")
+    keygen_parser.add_argument("-n", "--count", type=int, default=1)
+    keygen_parser.add_argument("--length", type=int, default=KEY_MAX_LENGTH)
+    keygen_parser.add_argument("-o", "--output", help="key file (default: stdout)")
+    add_key_rule_arguments(keygen_parser.add_argument_group("key rules"))
+
+    return parser
+
+
+def main(argv):
+    args = build_parser().parse_args(argv)
+    if args.command == "keygen":
+        try:
+            return command_keygen(args)
+        except (OSError, ValueError) as e:
+            print(f"md6: {e}", file=sys.stderr)
+            return 2
+    if args.workers < 1:
+        print("md6: --workers must be at least 1", file=sys.stderr)
+        return 2
+    if args.processes < 0:
+        print("md6: --processes must not be negative", file=sys.stderr)
+        return 2
+    if args.shard_size < 512 or args.shard_size & (args.shard_size - 1):
+        print("md6: --shard-size must be a power of two of at least 512", file=sys.stderr)
+        return 2
+    try:
+        key = load_key(args)
+    except (OSError, ValueError) as e:
+        print(f"md6: {e}", file=sys.stderr)
+        return 2
+
+    command = {"hash": command_hash, "verify": command_verify, "match": command_match}[
+        args.command
+    ]
+    try:
+        return run_instrumented(args, command, key)
+    except (OSError, ValueError) as e:
+        print(f"md6: {e}", file=sys.stderr)
+        return 2
@@ -0,0 +1,862 @@
+import os
+from PyQt5.QtWidgets import (
+    QApplication,
+    QMainWindow,
+    QVBoxLayout,
+    QHBoxLayout,
+    QPushButton,
+    QLabel,
+    QLineEdit,
+    QTextEdit,
+    QFileDialog,
+    QMessageBox,
+    QCheckBox,
+    QWidget,
+    QMenu,
+    QAction,
+    QDialog,
+    QFormLayout,
+    QProgressBar,
+    QInputDialog,
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+from collections import deque
+import time
+
+from keys import SPECIAL_CHARACTERS, generate_key, generate_keys, is_key_valid
+from manifest import MANIFEST_HEADER, ManifestIndex
+from md6 import MD6_STREAM_CHUNK_SIZE, get_md6
+from pdftext import PdfPreview, iter_pdf_text, pdf_page_count
+from preview import FilePreview
+
+
+class HashJob:
+    """Задание на хеширование: файл, текст PDF или данные ручного ввода.
+
+    expected_hash (hex-строка) или manifest (ManifestIndex) задаются для
+    сравнения и равны None для вычисления. Для текста PDF прогресс
+    считается в страницах, иначе в байтах.
+    """
+
+    def __init__(
+        self,
+        key,
+        file_path=None,
+        data=None,
+        expected_hash=None,
+        pdf_text=False,
+        manifest=None,
+    ):
+        self.key = key
+        self.file_path = file_path
+        self.data = data
+        self.expected_hash = expected_hash
+        self.manifest = manifest
+        # Длина хеша совпадает с длиной хешей в манифесте
+        self.output_length = (manifest.digest_size if manifest else None) or 32
+        self.pdf_text = pdf_text
+        self.pages_done = 0
+        if pdf_text:
+            self.total = pdf_page_count(file_path)
+        else:
+            self.total = os.path.getsize(file_path) if file_path else len(data)
+
+    def chunks(self, chunk_size=MD6_STREAM_CHUNK_SIZE):
+        if self.pdf_text:
+            # Текст страниц сразу уходит в хешер, целиком он не собирается
+            for self.pages_done, data in iter_pdf_text(self.file_path):
+                yield data
+        elif self.file_path:
+            with open(self.file_path, "rb") as f:
+                yield from iter(lambda: f.read(chunk_size), b"")
+        else:
+            for start in range(0, len(self.data), chunk_size):
+                yield self.data[start : start + chunk_size]
+
+    def processed(self, hasher):
+        return self.pages_done if self.pdf_text else hasher.processed()
+
+
+class HashWorker(QThread):
+    """Фоновое хеширование одного задания с прогрессом и отменой."""
+
+    progress = pyqtSignal(int, int)
+    hash_ready = pyqtSignal(bytes)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+
+    def run(self):
+        try:
+            with get_md6().stream(self.job.key, self.job.output_length) as hasher:
+                for chunk in self.job.chunks():
+                    if self.isInterruptionRequested():
+                        self.cancelled.emit()
+                        return
+                    hasher.update(chunk)
+                    self.progress.emit(self.job.processed(hasher), self.job.total)
+                result = hasher.finalize()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        if result:
+            self.hash_ready.emit(result)
+        else:
+            self.failed.emit("Hash computation returned no result.")
+
+
+class ManifestLoader(QThread):
+    """Фоновая загрузка манифеста в ManifestIndex."""
+
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            manifest = ManifestIndex(self.file_path)
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(manifest)
+
+
+class KeyGenWorker(QThread):
+    """Фоновая генерация партии ключей в файл, как cli.py keygen."""
+
+    keys_saved = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, count, rules, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.count = count
+        self.rules = rules
+
+    def run(self):
+        try:
+            keys = generate_keys(self.count, **self.rules)
+            # Ключи - секреты: файл создаётся доступным только владельцу
+            fd = os.open(self.file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write("\n".join(keys) + "\n")
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
+            return
+        self.keys_saved.emit(len(keys))
+
+
+class KeySettingsDialog(QDialog):
+    def __init__(
+        self,
+        parent=None,
+        key_min_length=8,
+        exclude_digits=False,
+        exclude_lower=False,
+        exclude_upper=False,
+        exclude_special=False,
+    ):
+        super().__init__(parent)
+
+        self.setWindowTitle("Key Settings")
+        self.setGeometry(300, 300, 300, 250)
+
+        self.key_min_length_input = QLineEdit(str(key_min_length))
+
+        # Чекбоксы для исключения каждого типа символа
+        self.exclude_digits_checkbox = QCheckBox("Exclude Digits", self)
+        self.exclude_digits_checkbox.setChecked(exclude_digits)
+        self.exclude_lower_checkbox = QCheckBox("Exclude Lowercase Letters", self)
+        self.exclude_lower_checkbox.setChecked(exclude_lower)
+        self.exclude_upper_checkbox = QCheckBox("Exclude Uppercase Letters", self)
+        self.exclude_upper_checkbox.setChecked(exclude_upper)
+        self.exclude_special_checkbox = QCheckBox("Exclude Special Characters", self)
+        self.exclude_special_checkbox.setChecked(exclude_special)
+
+        # QLabel для отображения доступных символов
+        self.special_characters_label = QLabel(
+            f"Special Characters: {SPECIAL_CHARACTERS}", self
+        )
+
+        self.save_button = QPushButton("Save", self)
+        self.cancel_button = QPushButton("Cancel", self)
+
+        self.save_button.clicked.connect(self.save_settings)
+        self.cancel_button.clicked.connect(self.reject)
+
+        form_layout = QFormLayout(self)
+        form_layout.addRow("Min Length:", self.key_min_length_input)
+        form_layout.addRow(self.exclude_digits_checkbox)
+        form_layout.addRow(self.exclude_lower_checkbox)
+        form_layout.addRow(self.exclude_upper_checkbox)
+        form_layout.addRow(self.exclude_special_checkbox)
+        form_layout.addRow(self.special_characters_label)
+        form_layout.addRow(self.save_button, self.cancel_button)
+
+    def save_settings(self):
+        try:
+            min_length = int(self.key_min_length_input.text())
+            exclude_digits = self.exclude_digits_checkbox.isChecked()
+            exclude_lower = self.exclude_lower_checkbox.isChecked()
+            exclude_upper = self.exclude_upper_checkbox.isChecked()
+            exclude_special = self.exclude_special_checkbox.isChecked()
+
+            # Если все условия исключены, показываем ошибку
+            if exclude_digits and exclude_lower and exclude_upper and exclude_special:
+                QMessageBox.warning(
+                    self,
+                    "Invalid Settings",
+                    "At least one type of symbol must be included in the key (e.g., digits, lowercase, uppercase, special characters).",
+                )
+                return
+
+            self.parent().update_key_settings(
+                min_length,
+                exclude_digits,
+                exclude_lower,
+                exclude_upper,
+                exclude_special,
+            )
+            self.accept()
+
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Input", f"Error: {e}")
+
+
+class HashComparerApp(QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        self.setWindowTitle("MD6")
+        self.setGeometry(100, 100, 950, 550)
+
+        self.create_menu()
+
+        self.use_file_content_checkbox = QCheckBox("Use File Content")
+        self.use_file_content_checkbox.setChecked(False)
+        self.use_file_content_checkbox.stateChanged.connect(self.toggle_input_mode)
+
+        self.pdf_text_checkbox = QCheckBox("Hash PDF Text")
+        self.pdf_text_checkbox.setToolTip(
+            "Hash the UTF-8 text extracted from a PDF instead of the file bytes"
+        )
+        self.pdf_text_checkbox.setChecked(False)
+
+        self.use_key_checkbox = QCheckBox("Use Key")
+        self.use_key_checkbox.setChecked(False)
+        self.use_key_checkbox.stateChanged.connect(self.toggle_key_input)
+
+        self.file_path_input = QLineEdit(self)
+        self.file_path_input.setReadOnly(True)
+
+        self.browse_file_button = QPushButton("Browse", self)
+        self.browse_file_button.clicked.connect(self.browse_file)
+
+        self.file_path_label = QLabel("File Path", self)
+
+        self.manual_input_text = QTextEdit(self)
+        self.manual_input_text.setReadOnly(False)
+        self.manual_input_text.verticalScrollBar().valueChanged.connect(
+            self.on_preview_scrolled
+        )
+
+        self.computed_hash_var = QLineEdit(self)
+        self.computed_hash_var.setReadOnly(True)
+
+        self.key_input_label = QLabel("Key Input")
+        self.key_input_field = QLineEdit(self)
+        self.key_input_field.setPlaceholderText("Enter key here...")
+        self.key_input_field.setReadOnly(False)
+
+        self.compute_hash_button = QPushButton("Compute Hash", self)
+        self.compute_hash_button.clicked.connect(self.compute_hash)
+        self.compare_hash_button = QPushButton("Compare Hash", self)
+        self.compare_hash_button.clicked.connect(self.compare_hash)
+
+        self.generate_key_button = QPushButton("Generate Key", self)
+        self.generate_key_button.clicked.connect(self.generate_key)
+
+        self.clear_input_button = QPushButton("Clear Input", self)
+        self.clear_input_button.setFixedSize(100, 30)
+        self.clear_input_button.clicked.connect(self.clear_manual_input)
+
+        self.hash_progress_bar = QProgressBar(self)
+        self.hash_progress_bar.setRange(0, 100)
+        self.hash_progress_label = QLabel("", self)
+
+        self.cancel_hash_button = QPushButton("Cancel", self)
+        self.cancel_hash_button.setEnabled(False)
+        self.cancel_hash_button.clicked.connect(self.cancel_hashing)
+
+        file_layout = QVBoxLayout()
+        file_layout.setContentsMargins(10, 10, 10, 0)
+        file_layout.setSpacing(10)
+
+        file_path_layout = QHBoxLayout()
+        file_path_layout.addWidget(self.file_path_input)
+        file_path_layout.addWidget(self.browse_file_button)
+
+        self.file_content_label = QLabel("File Content", self)
+        file_layout.addWidget(self.use_file_content_checkbox)
+        file_layout.addWidget(self.pdf_text_checkbox)
+        file_layout.addWidget(self.file_path_label)
+        file_layout.addLayout(file_path_layout)
+
+        file_layout.addWidget(self.file_content_label)
+        file_layout.addWidget(self.manual_input_text)
+
+        hash_layout = QVBoxLayout()
+        hash_layout.setContentsMargins(10, 0, 10, 0)
+        hash_layout.setSpacing(10)
+        clear_layout = QHBoxLayout()
+        clear_layout.addWidget(self.use_key_checkbox)
+        clear_layout.addWidget(self.clear_input_button, alignment=Qt.AlignRight)
+
+        hash_layout.addLayout(clear_layout)
+        hash_layout.addWidget(self.key_input_label)
+
+        key_layout = QHBoxLayout()
+        key_layout.addWidget(self.key_input_field)
+        key_layout.addWidget(self.generate_key_button)
+
+        hash_layout.addLayout(key_layout)
+        hash_layout.addWidget(QLabel("Computed Hash"))
+
+        compute_hash = QHBoxLayout()
+        compute_hash.addWidget(self.computed_hash_var)
+        compute_hash.addWidget(self.compare_hash_button)
+        compute_hash.addWidget(self.compute_hash_button)
+        hash_layout.addLayout(compute_hash)
+
+        progress_layout = QHBoxLayout()
+        progress_layout.addWidget(self.hash_progress_bar)
+        progress_layout.addWidget(self.hash_progress_label)
+        progress_layout.addWidget(self.cancel_hash_button)
+        hash_layout.addLayout(progress_layout)
+
+        comparison_layout = QVBoxLayout()
+        comparison_layout.setContentsMargins(10, 10, 10, 10)
+        comparison_layout.setSpacing(10)
+
+        central_widget = QWidget(self)
+        central_layout = QVBoxLayout(central_widget)
+        central_layout.setContentsMargins(10, 0, 10, 10)
+        central_layout.setSpacing(15)
+
+        central_layout.addLayout(file_layout)
+        central_layout.addLayout(hash_layout)
+        central_layout.addLayout(comparison_layout)
+
+        self.setCentralWidget(central_widget)
+
+        # Изначальные значения
+        self.key_min_length = 8
+        self.exclude_digits = False
+        self.exclude_lower = False
+        self.exclude_upper = False
+        self.exclude_special = False
+
+        # Очередь заданий хеширования и текущий фоновый поток
+        self.hash_jobs = deque()
+        self.hash_worker = None
+        self.hash_job = None
+        self.hash_started_at = 0.0
+
+        # Фоновая генерация ключей в файл
+        self.keygen_worker = None
+
+        # Фоновая загрузка манифеста из load_hash
+        self.manifest_loader = None
+
+        # Предпросмотр файла, догружаемый при прокрутке
+        self.preview = None
+
+        # Манифест из load_hash, с которым сравнивает compare_hash
+        self.manifest = None
+
+        self.toggle_input_mode()
+        self.toggle_key_input()
+
+    def create_menu(self):
+        """Создание меню."""
+        menu_bar = self.menuBar()
+
+        file_menu = QMenu("Menu", self)
+        menu_bar.addMenu(file_menu)
+
+        open_hash_action = QAction("Load Hash", self)
+        open_hash_action.triggered.connect(self.load_hash)
+        file_menu.addAction(open_hash_action)
+
+        save_hash_action = QAction("Save Hash", self)
+        save_hash_action.triggered.connect(self.save_hash)
+        file_menu.addAction(save_hash_action)
+
+        option = QMenu("Options", self)
+        menu_bar.addMenu(option)
+        settings_action = QAction("Set KeyWord restriction", self)
+        settings_action.triggered.connect(self.open_key_settings)
+        option.addAction(settings_action)
+        generate_keys_action = QAction("Generate Keys to File", self)
+        generate_keys_action.triggered.connect(self.generate_keys_to_file)
+        option.addAction(generate_keys_action)
+        quit_action = QAction("Exit", self)
+        quit_action.triggered.connect(self.quit)
+        file_menu.addAction(quit_action)
+
+        help_menu = QMenu("Help", self)
+        menu_bar.addMenu(help_menu)
+
+        about_action = QAction("About", self)
+        about_action.triggered.connect(self.show_about)
+        help_menu.addAction(about_action)
+
+    def open_key_settings(self):
+        """Открыть окно настроек ключа."""
+        dialog = KeySettingsDialog(
+            self,
+            self.key_min_length,
+            self.exclude_digits,  # Заменено require_digits на exclude_digits
+            self.exclude_lower,  # Заменено require_lower на exclude_lower
+            self.exclude_upper,  # Заменено require_upper на exclude_upper
+            self.exclude_special,  # Заменено require_special на exclude_special
+        )
+        dialog.exec_()
+
+    def update_key_settings(
+        self, min_length, exclude_digits, exclude_lower, exclude_upper, exclude_special
+    ):
+        """Обновить настройки ключа."""
+        self.key_min_length = min_length
+        self.exclude_digits = exclude_digits
+        self.exclude_lower = exclude_lower
+        self.exclude_upper = exclude_upper
+        self.exclude_special = exclude_special
+
+    def is_key_valid(self, key):
+        """Проверка валидности ключа по установленным ограничениям."""
+        return is_key_valid(
+            key,
+            self.key_min_length,
+            self.exclude_digits,
+            self.exclude_lower,
+            self.exclude_upper,
+            self.exclude_special,
+        )
+
+    def key_rules(self):
+        """Ограничения на ключ из KeySettingsDialog."""
+        return dict(
+            key_min_length=self.key_min_length,
+            exclude_digits=self.exclude_digits,
+            exclude_lower=self.exclude_lower,
+            exclude_upper=self.exclude_upper,
+            exclude_special=self.exclude_special,
+        )
+
+    def generate_key(self):
+        """Генерация случайного ключа, соответствующего ограничениям."""
+        try:
+            self.key_input_field.setText(generate_key(**self.key_rules()))
+        except ValueError as e:
+            QMessageBox.warning(
+                self, "Invalid Settings", f"{e}. Please adjust your settings."
+            )
+
+    def generate_keys_to_file(self):
+        """Сохранение партии ключей (по одному в строке) в файл в фоне."""
+        if self.keygen_worker is not None:
+            QMessageBox.warning(self, "Busy", "Keys are still being generated.")
+            return
+        count, ok = QInputDialog.getInt(
+            self, "Generate Keys", "Number of keys:", 1000, 1, 10_000_000
+        )
+        if not ok:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Keys", "", "Text Files (*.txt);;All Files (*)"
+        )
+        if not file_path:
+            return
+        worker = KeyGenWorker(file_path, count, self.key_rules(), self)
+        worker.keys_saved.connect(self.on_keys_saved)
+        worker.failed.connect(self.on_keys_failed)
+        worker.finished.connect(worker.deleteLater)
+        worker.finished.connect(self.on_keygen_finished)
+        self.keygen_worker = worker
+        worker.start()
+
+    def on_keys_saved(self, count):
+        QMessageBox.information(self, "Success", f"{count} keys saved successfully.")
+
+    def on_keys_failed(self, message):
+        QMessageBox.warning(self, "Error", f"Cannot generate keys: {message}")
+
+    def on_keygen_finished(self):
+        self.keygen_worker = None
+
+    def toggle_input_mode(self):
+        """Переключение между режимами файла и ввода вручную."""
+        # Недогруженный предпросмотр нельзя хешировать как ручной ввод
+        if self.preview is not None:
+            self.close_preview()
+            self.manual_input_text.clear()
+        if self.use_file_content_checkbox.isChecked():
+            self.manual_input_text.setReadOnly(True)
+            self.file_path_label.setVisible(True)
+            self.file_path_input.setVisible(True)
+            self.file_content_label.setText("File Content")
+            self.manual_input_text.setPlaceholderText(
+                "File content will be displayed here."
+            )
+            self.browse_file_button.setVisible(True)
+            self.pdf_text_checkbox.setVisible(True)
+        else:
+            self.manual_input_text.setReadOnly(False)
+            self.file_path_label.setVisible(False)
+            self.file_path_input.setVisible(False)
+            self.file_content_label.setText("Manual Input")
+            self.manual_input_text.setPlaceholderText("Enter text manually.")
+            self.browse_file_button.setVisible(False)
+            self.pdf_text_checkbox.setVisible(False)
+
+    def toggle_key_input(self):
+        """Показать или скрыть поле ввода ключа в зависимости от состояния чекбокса."""
+        if self.use_key_checkbox.isChecked():
+            self.key_input_label.setVisible(True)
+            self.key_input_field.setVisible(True)
+            self.generate_key_button.setVisible(True)
+        else:
+            self.key_input_label.setVisible(False)
+            self.key_input_field.setVisible(False)
+            self.generate_key_button.setVisible(False)
+
+    def load_hash(self):
+        """Загрузить хэш или манифест (см. cli.py) из файла.
+
+        Из обычного файла берётся первое слово первой строки, поэтому
+        подходят и файлы вида "хеш  имя". Манифест загружается в индекс
+        в фоне, и compare_hash ищет вычисленный хеш среди всех его записей.
+        """
+        if self.manifest_loader is not None:
+            QMessageBox.warning(self, "Busy", "A manifest is still being loaded.")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Load Hash", "", "Text Files (*.txt);;All Files (*)"
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+                first_line = file.readline().strip()
+            if first_line == MANIFEST_HEADER:
+                loader = ManifestLoader(file_path, self)
+                loader.loaded.connect(self.on_manifest_loaded)
+                loader.failed.connect(self.on_manifest_failed)
+                loader.finished.connect(loader.deleteLater)
+                loader.finished.connect(self.on_manifest_loader_finished)
+                self.manifest_loader = loader
+                self.computed_hash_var.clear()
+                self.computed_hash_var.setPlaceholderText("Loading manifest...")
+                loader.start()
+                return
+
+            hash_value = first_line.split()[0].lower() if first_line else ""
+            if not hash_value:
+                QMessageBox.warning(self, "Warning", "The file is empty.")
+                return
+            bytes.fromhex(hash_value)
+            self.clear_manifest()
+            self.computed_hash_var.setText(hash_value)
+            QMessageBox.information(self, "Success", "Hash loaded successfully.")
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error", f"An error occurred while loading the hash:\n{e}"
+            )
+
+    def on_manifest_loaded(self, manifest):
+        self.manifest = manifest
+        self.computed_hash_var.clear()
+        self.computed_hash_var.setPlaceholderText(f"Manifest: {len(manifest)} hashes")
+        QMessageBox.information(
+            self,
+            "Success",
+            f"Manifest with {len(manifest)} hashes loaded successfully.",
+        )
+
+    def on_manifest_failed(self, message):
+        self.computed_hash_var.setPlaceholderText("")
+        QMessageBox.critical(
+            self, "Error", f"An error occurred while loading the hash:\n{message}"
+        )
+
+    def on_manifest_loader_finished(self):
+        self.manifest_loader = None
+
+    def clear_manifest(self):
+        """Вернуться к сравнению с одним хешем из поля.
+
+        Индекс не закрывается: он может быть нужен заданиям в очереди.
+        """
+        self.manifest = None
+        self.computed_hash_var.setPlaceholderText("")
+
+    def save_hash(self):
+        """Сохранить вычисленный хеш в файл."""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Save Hash", "", "Text Files (*.txt);;All Files (*)"
+        )
+        if file_path:
+            with open(file_path, "w") as file:
+                file.write(self.computed_hash_var.text())
+            QMessageBox.information(self, "Success", "Hash saved successfully.")
+
+    def browse_file(self):
+        """Выбрать файл и отобразить его содержимое, если файл в UTF-8 или PDF."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Open File", "", "All Files (*)"
+        )
+        if not file_path:
+            return
+
+        self.file_path_input.setText(file_path)
+        self.close_preview()
+
+        try:
+            if file_path.lower().endswith(".pdf"):
+                # Показываются только первые страницы, остальные - при прокрутке
+                self.preview = PdfPreview(file_path)
+                text = self.preview.read_more()
+                self.manual_input_text.setPlainText(
+                    text if text else "No text found in PDF."
+                )
+            else:
+                # Файл отображается в память и декодируется окнами при прокрутке;
+                # хешируется всегда файл на диске, а не содержимое поля
+                self.preview = FilePreview(file_path)
+                try:
+                    self.manual_input_text.setPlainText(self.preview.read_more())
+                except UnicodeDecodeError:
+                    self.close_preview()
+                    self.manual_input_text.setPlainText(
+                        "The file cannot be decoded as UTF-8."
+                    )
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error", f"An error occurred while reading the file:\n{e}"
+            )
+
+    def close_preview(self):
+        """Прекратить догрузку предпросмотра; показанный текст остаётся."""
+        if self.preview is not None:
+            self.preview.close()
+            self.preview = None
+
+    def on_preview_scrolled(self, value):
+        """Догрузить следующую часть предпросмотра при прокрутке к концу."""
+        scroll_bar = self.manual_input_text.verticalScrollBar()
+        if self.preview is None or value < scroll_bar.maximum() - scroll_bar.pageStep():
+            return
+        try:
+            text = self.preview.read_more()
+        except UnicodeDecodeError:
+            text = "\n[The rest of the file cannot be decoded as UTF-8.]"
+            self.close_preview()
+        if not text:
+            self.close_preview()
+            return
+        cursor = QTextCursor(self.manual_input_text.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+
+    def create_hash_job(self, expected_hash=None, manifest=None):
+        """Проверить ввод и подготовить задание на хеширование."""
+        key = (
+            self.key_input_field.text().encode("utf-8")
+            if self.use_key_checkbox.isChecked()
+            else b""
+        )
+
+        if self.use_key_checkbox.isChecked() and not self.is_key_valid(key.decode()):
+            QMessageBox.warning(self, "Warning", "Invalid key!")
+            return None
+
+        if self.use_file_content_checkbox.isChecked():
+            file_path = self.file_path_input.text().strip()
+            if not os.path.exists(file_path):
+                QMessageBox.critical(self, "Error", "File not found!")
+                return None
+
+            pdf_text = (
+                self.pdf_text_checkbox.isChecked()
+                and file_path.lower().endswith(".pdf")
+            )
+            return HashJob(
+                key,
+                file_path=file_path,
+                expected_hash=expected_hash,
+                pdf_text=pdf_text,
+                manifest=manifest,
+            )
+
+        data = self.manual_input_text.toPlainText().encode("utf-8")
+        if not data:
+            QMessageBox.warning(self, "Warning", "Input is empty!")
+            return None
+
+        return HashJob(key, data=data, expected_hash=expected_hash, manifest=manifest)
+
+    def compute_hash(self):
+        """Вычислить хэш с использованием файла или ручного ввода."""
+        try:
+            job = self.create_hash_job()
+            if job:
+                self.enqueue_hash_job(job)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"An error occurred:\n{e}")
+
+    def compare_hash(self):
+        """Сравнить хэш ввода с хэшем из поля или с загруженным манифестом."""
+        try:
+            if self.manifest is not None:
+                job = self.create_hash_job(manifest=self.manifest)
+            else:
+                expected_hash = self.computed_hash_var.text().strip().lower()
+                if not expected_hash:
+                    QMessageBox.warning(self, "Warning", "No hash to compare with!")
+                    return
+                job = self.create_hash_job(expected_hash)
+            if job:
+                self.enqueue_hash_job(job)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"An error occurred:\n{e}")
+
+    def enqueue_hash_job(self, job):
+        """Поставить задание в очередь; задания выполняются по одному в фоне."""
+        self.hash_jobs.append(job)
+        if self.hash_worker is None:
+            self.start_next_hash_job()
+        else:
+            self.update_hash_status()
+
+    def start_next_hash_job(self):
+        """Запустить следующее задание из очереди, если оно есть."""
+        self.hash_worker = None
+        self.hash_job = None
+        if not self.hash_jobs:
+            self.cancel_hash_button.setEnabled(False)
+            return
+
+        job = self.hash_jobs.popleft()
+        worker = HashWorker(job, self)
+        worker.progress.connect(self.on_hash_progress)
+        worker.hash_ready.connect(lambda result: self.on_hash_ready(job, result))
+        worker.failed.connect(self.on_hash_failed)
+        worker.cancelled.connect(self.on_hash_cancelled)
+        worker.finished.connect(worker.deleteLater)
+        worker.finished.connect(self.start_next_hash_job)
+
+        self.hash_worker = worker
+        self.hash_job = job
+        self.hash_started_at = time.monotonic()
+        self.hash_progress_bar.setValue(0)
+        self.cancel_hash_button.setEnabled(True)
+        self.update_hash_status()
+        worker.start()
+
+    def cancel_hashing(self):
+        """Отменить текущее задание и очистить очередь."""
+        self.hash_jobs.clear()
+        if self.hash_worker is not None:
+            self.hash_worker.requestInterruption()
+
+    def update_hash_status(self, processed=0, total=0):
+        """Показать скорость, оставшееся время и длину очереди."""
+        status = []
+        elapsed = time.monotonic() - self.hash_started_at
+        if processed and elapsed > 0:
+            speed = processed / elapsed
+            if self.hash_job is not None and self.hash_job.pdf_text:
+                status.append(f"{speed:.1f} pages/s")
+            else:
+                status.append(f"{speed / (1 << 20):.1f} MB/s")
+            status.append(f"ETA {(total - processed) / speed:.0f} s")
+        if self.hash_jobs:
+            status.append(f"queued: {len(self.hash_jobs)}")
+        self.hash_progress_label.setText(", ".join(status))
+
+    def on_hash_progress(self, processed, total):
+        self.hash_progress_bar.setValue(int(processed * 100 / total) if total else 100)
+        self.update_hash_status(processed, total)
+
+    def on_hash_ready(self, job, result):
+        self.hash_progress_bar.setValue(100)
+        if job.manifest is not None:
+            paths = job.manifest.paths(bytes.fromhex(result.decode()))
+            if paths:
+                shown = "\n".join(paths[:10])
+                more = f"\n... and {len(paths) - 10} more" if len(paths) > 10 else ""
+                QMessageBox.information(
+                    self, "Match", f"The hash is in the manifest:\n{shown}{more}"
+                )
+            else:
+                QMessageBox.warning(self, "Mismatch", "The hash is not in the manifest.")
+        elif job.expected_hash is None:
+            self.clear_manifest()
+            self.computed_hash_var.setText(result.decode())
+        elif result.decode("utf-8") == job.expected_hash:
+            QMessageBox.information(self, "Match", "Hashes match!")
+        else:
+            QMessageBox.warning(self, "Mismatch", "Hashes do not match.")
+
+    def on_hash_failed(self, message):
+        QMessageBox.critical(self, "Error", f"An error occurred:\n{message}")
+
+    def on_hash_cancelled(self):
+        self.hash_progress_bar.setValue(0)
+        self.hash_progress_label.setText("Cancelled")
+
+    def closeEvent(self, event):
+        """Остановить фоновое хеширование и дождаться остальных потоков перед закрытием окна."""
+        self.cancel_hashing()
+        if self.hash_worker is not None:
+            self.hash_worker.wait()
+        if self.keygen_worker is not None:
+            self.keygen_worker.wait()
+        if self.manifest_loader is not None:
+            self.manifest_loader.wait()
+        super().closeEvent(event)
+
+    def quit(self):
+        """Выход из программы."""
+        QApplication.quit()
+
+    def show_about(self):
+        """Окно информации о программе."""
+        QMessageBox.information(
+            self,
+            "About",
+            "Ларин Анатолий Николаевич А-18-21\n"
+            "Программная реализация функции хеширования MD6.",
+        )
+
+    def clear_manual_input(self):
+        """Очистить поле ручного ввода."""
+        self.close_preview()
+        self.manual_input_text.clear()
+
+
+def run(argv):
+    """Запуск графического интерфейса; возвращает код выхода."""
+    app = QApplication(argv)
+    window = HashComparerApp()
+    window.show()
+    return app.exec_()
@@ -0,0 +1,102 @@
+"""Правила для ключей MD6 и генерация ключей, общие для GUI и CLI."""
+
+import secrets
+import string
+
+# Специальные символы, допустимые в ключе
+SPECIAL_CHARACTERS = "!#$%&'*+/=?^_`{|}~@"
+
+# Максимальная длина ключа: библиотека использует 8 слов (64 байта)
+KEY_MAX_LENGTH = 64
+
+
+def is_key_valid(
+    key,
+    key_min_length=8,
+    exclude_digits=False,
+    exclude_lower=False,
+    exclude_upper=False,
+    exclude_special=False,
+):
+    """Проверка валидности ключа по установленным ограничениям."""
+
+    # Проверка минимальной длины
+    if len(key) < key_min_length or len(key) > KEY_MAX_LENGTH:
+        return False
+
+    # Проверка, если исключены цифры, то они не могут быть в ключе
+    if exclude_digits and any(c.isdigit() for c in key):
+        return False
+
+    # Проверка, если исключены маленькие буквы, то их не может быть в ключе
+    if exclude_lower and any(c.islower() for c in key):
+        return False
+
+    # Проверка, если исключены большие буквы, то их не может быть в ключе
+    if exclude_upper and any(c.isupper() for c in key):
+        return False
+
+    # Проверка, если исключены специальные символы, то их не может быть в ключе
+    if exclude_special and any(c in SPECIAL_CHARACTERS for c in key):
+        return False
+
+    return True
+
+
+def key_alphabet(
+    exclude_digits=False, exclude_lower=False, exclude_upper=False, exclude_special=False
+):
+    """Символы, допустимые в ключе при заданных исключениях."""
+    alphabet = ""
+    if not exclude_lower:
+        alphabet += string.ascii_lowercase
+    if not exclude_upper:
+        alphabet += string.ascii_uppercase
+    if not exclude_digits:
+        alphabet += string.digits
+    if not exclude_special:
+        alphabet += SPECIAL_CHARACTERS
+    if not alphabet:
+        raise ValueError("No valid characters left for key generation")
+    return alphabet
+
+
+def generate_keys(
+    count,
+    length=KEY_MAX_LENGTH,
+    key_min_length=8,
+    exclude_digits=False,
+    exclude_lower=False,
+    exclude_upper=False,
+    exclude_special=False,
+):
+    """count случайных ключей длины length из secrets (CSPRNG).
+
+    Ключи собираются только из символов key_alphabet, поэтому каждый ключ
+    проходит is_key_valid с теми же ограничениями без повторных попыток.
+    Байты отображаются в символы через bytes.translate; байты из неполного
+    последнего круга алфавита отбрасываются, чтобы символы были
+    равновероятны.
+    """
+    if not max(key_min_length, 1) <= length <= KEY_MAX_LENGTH:
+        raise ValueError(f"Key length must be between {key_min_length} and {KEY_MAX_LENGTH}")
+    if count < 0:
+        raise ValueError("count must be >= 0")
+    alphabet = key_alphabet(exclude_digits, exclude_lower, exclude_upper, exclude_special)
+
+    limit = 256 - 256 % len(alphabet)
+    table = (alphabet * (256 // len(alphabet) + 1))[:256].encode("ascii")
+    rejected = bytes(range(limit, 256))
+    needed = count * length
+    text = b""
+    while len(text) < needed:
+        # Запас покрывает отброшенные байты, обычно хватает одного чтения
+        draw = (needed - len(text)) * 256 // limit + 64
+        text += secrets.token_bytes(draw).translate(table, rejected)
+    text = text[:needed].decode("ascii")
+    return [text[i : i + length] for i in range(0, needed, length)]
+
+
+def generate_key(length=KEY_MAX_LENGTH, **rules):
+    """Один ключ; rules - ограничения generate_keys и is_key_valid."""
+    return generate_keys(1, length, **rules)[0]
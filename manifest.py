@@ -0,0 +1,266 @@
+"""Манифесты хешей: формат строк и индексы digest -> path.
+
+Манифест - текстовый файл, по строке на файл: digest, size, mtime_ns и
+path через табуляцию. Для поиска файла по хешу манифест загружается в
+ManifestIndex (словарь в памяти) или, если он не помещается в память, в
+DigestTable - отсортированную таблицу в файле, отображённом в память.
+Модуль не зависит от PyQt5 и fitz.
+"""
+
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from collections import namedtuple
+
+MANIFEST_HEADER = "# md6 manifest: digest\tsize\tmtime_ns\tpath"
+
+ManifestEntry = namedtuple("ManifestEntry", "digest size mtime_ns path")
+
+# Число записей, сортируемых в памяти при построении DigestTable
+DIGEST_TABLE_RUN = 1 << 20
+
+DIGEST_TABLE_MAGIC = b"MD6DIGS\x00"
+
+# magic, размер хеша, число записей, размер и mtime_ns манифеста
+DIGEST_TABLE_HEADER = struct.Struct("<8sIQQQ")
+
+
+def format_manifest_line(entry):
+    if "\t" in entry.path or "\n" in entry.path:
+        raise ValueError("path contains a tab or newline")
+    return f"{entry.digest}\t{entry.size}\t{entry.mtime_ns}\t{entry.path}"
+
+
+def parse_manifest_line(line):
+    digest, size, mtime_ns, path = line.rstrip("\r\n").split("\t", 3)
+    return ManifestEntry(digest.lower(), int(size), int(mtime_ns), path)
+
+
+def read_manifest(file):
+    """Записи манифеста; пустые строки и комментарии (#) пропускаются."""
+    for line in file:
+        if line.strip() and not line.startswith("#"):
+            yield parse_manifest_line(line)
+
+
+def open_manifest(manifest_path):
+    return open(manifest_path, "r", encoding="utf-8", errors="surrogateescape")
+
+
+def checked_digest_size(digest_size, digest):
+    if digest_size is not None and len(digest) != digest_size:
+        raise ValueError("manifest mixes digests of different lengths")
+    return len(digest)
+
+
+class ManifestIndex:
+    """Словарь digest -> пути манифеста в памяти; поиск за O(1).
+
+    Занимает порядка 200 байт на запись; для манифестов, не помещающихся
+    в память, есть DigestTable.
+    """
+
+    def __init__(self, manifest_path):
+        self.index = {}
+        self.count = 0
+        self.digest_size = None
+        with open_manifest(manifest_path) as f:
+            for entry in read_manifest(f):
+                digest = bytes.fromhex(entry.digest)
+                self.digest_size = checked_digest_size(self.digest_size, digest)
+                paths = self.index.get(digest)
+                # Повторяющийся хеш встречается редко, поэтому обычно путь один
+                if paths is None:
+                    self.index[digest] = entry.path
+                elif isinstance(paths, str):
+                    self.index[digest] = [paths, entry.path]
+                else:
+                    paths.append(entry.path)
+                self.count += 1
+
+    def paths(self, digest):
+        """Пути файлов манифеста с хешем digest (сырые байты) или пустой список."""
+        paths = self.index.get(bytes(digest), ())
+        return [paths] if isinstance(paths, str) else list(paths)
+
+    def __contains__(self, digest):
+        return bytes(digest) in self.index
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.index = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_manifest_digests(manifest_path):
+    """Пары (digest, смещение строки в байтах) записей манифеста."""
+    offset = 0
+    with open(manifest_path, "rb") as f:
+        for line in f:
+            if line.strip() and not line.startswith(b"#"):
+                yield bytes.fromhex(line.split(b"\t", 1)[0].decode("ascii")), offset
+            offset += len(line)
+
+
+def write_run(records, directory):
+    """Отсортированная серия записей во временном файле."""
+    run = tempfile.TemporaryFile(dir=directory)
+    run.write(b"".join(sorted(records)))
+    run.seek(0)
+    return run
+
+
+def iter_run(run, record_size):
+    while True:
+        chunk = run.read(record_size * 4096)
+        if not chunk:
+            return
+        for start in range(0, len(chunk), record_size):
+            yield chunk[start : start + record_size]
+
+
+def build_digest_table(manifest_path, table_path, run_size=DIGEST_TABLE_RUN):
+    """Построить DigestTable для манифеста.
+
+    Записи (digest, смещение строки) сортируются сериями по run_size во
+    временных файлах рядом с таблицей и сливаются, поэтому память не
+    зависит от размера манифеста. Таблица записывается через временный
+    файл и заменяет прежнюю целиком.
+    """
+    stat = os.stat(manifest_path)
+    directory = os.path.dirname(os.path.abspath(table_path))
+    digest_size = None
+    count = 0
+    runs = []
+    try:
+        records = []
+        for digest, offset in iter_manifest_digests(manifest_path):
+            digest_size = checked_digest_size(digest_size, digest)
+            # Смещение big-endian: записи сортируются как байты
+            records.append(digest + offset.to_bytes(8, "big"))
+            count += 1
+            if len(records) >= run_size:
+                runs.append(write_run(records, directory))
+                records = []
+        records.sort()
+        record_size = (digest_size or 0) + 8
+        merged = heapq.merge(records, *(iter_run(run, record_size) for run in runs))
+
+        temp_path = table_path + ".tmp"
+        with open(temp_path, "wb") as out:
+            out.write(
+                DIGEST_TABLE_HEADER.pack(
+                    DIGEST_TABLE_MAGIC, digest_size or 0, count, stat.st_size, stat.st_mtime_ns
+                )
+            )
+            for record in merged:
+                out.write(record)
+        os.replace(temp_path, table_path)
+    finally:
+        for run in runs:
+            run.close()
+
+
+class DigestTable:
+    """Отсортированная таблица digest -> строка манифеста в памяти ОС.
+
+    Поиск двоичный, O(log n); в памяти процесса хранятся только
+    отображения таблицы и манифеста, страницы читаются по мере обращения.
+    Таблица строится build_digest_table и привязана к размеру и mtime
+    манифеста: для изменённого манифеста бросается ValueError.
+    """
+
+    def __init__(self, table_path, manifest_path):
+        with open(table_path, "rb") as f:
+            self.table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self.table) < DIGEST_TABLE_HEADER.size:
+                raise ValueError(f"{table_path!r} is not a digest table")
+            magic, digest_size, self.count, size, mtime_ns = (
+                DIGEST_TABLE_HEADER.unpack_from(self.table)
+            )
+            if magic != DIGEST_TABLE_MAGIC:
+                raise ValueError(f"{table_path!r} is not a digest table")
+            stat = os.stat(manifest_path)
+            if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                raise ValueError(f"{table_path!r} is older than {manifest_path!r}")
+            with open(manifest_path, "rb") as f:
+                self.manifest = (
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+                )
+        except (ValueError, OSError):
+            self.table.close()
+            raise
+        self.digest_size = digest_size or None
+        self.record_size = digest_size + 8
+
+    def record_digest(self, i):
+        start = DIGEST_TABLE_HEADER.size + i * self.record_size
+        return self.table[start : start + self.record_size - 8]
+
+    def offsets(self, digest):
+        """Смещения строк манифеста с хешем digest."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.record_digest(mid) < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.count and self.record_digest(lo) == digest:
+            start = DIGEST_TABLE_HEADER.size + lo * self.record_size + self.record_size - 8
+            yield int.from_bytes(self.table[start : start + 8], "big")
+            lo += 1
+
+    def paths(self, digest):
+        """Пути файлов манифеста с хешем digest (сырые байты) или пустой список."""
+        digest = bytes(digest)
+        if len(digest) != self.digest_size:
+            return []
+        paths = []
+        for offset in self.offsets(digest):
+            end = self.manifest.find(b"\n", offset)
+            line = self.manifest[offset : end if end >= 0 else len(self.manifest)]
+            paths.append(parse_manifest_line(line.decode("utf-8", "surrogateescape")).path)
+        return paths
+
+    def __contains__(self, digest):
+        digest = bytes(digest)
+        return len(digest) == self.digest_size and next(self.offsets(digest), None) is not None
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.table.close()
+        if isinstance(self.manifest, mmap.mmap):
+            self.manifest.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_manifest_index(manifest_path, table_path=None):
+    """ManifestIndex или, если задан table_path, DigestTable.
+
+    Таблица строится заново, если её нет или манифест изменился.
+    """
+    if table_path is None:
+        return ManifestIndex(manifest_path)
+    try:
+        return DigestTable(table_path, manifest_path)
+    except (FileNotFoundError, ValueError):
+        build_digest_table(manifest_path, table_path)
+        return DigestTable(table_path, manifest_path)
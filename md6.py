@@ -0,0 +1,846 @@
+"""Привязки ctypes к библиотеке MD6 (libmd6.so).
+
+Модуль не зависит от PyQt5 и fitz и используется как GUI, так и CLI.
+"""
+
+import array
+import ctypes
+import os
+import threading
+import time
+import warnings
+
+from keys import is_key_valid
+
+# Размер части файла, передаваемой в потоковый хешер за один вызов
+MD6_STREAM_CHUNK_SIZE = 1 << 20
+
+# Размеры листового блока и узла дерева MD6 в байтах
+MD6_BLOCK_SIZE = 512
+MD6_NODE_SIZE = 128
+
+# Путь к библиотеке можно переопределить переменной окружения,
+# иначе она ищется рядом с md6.py, а не в текущем каталоге
+MD6_LIBRARY_ENV = "MD6_LIBRARY"
+MD6_LIBRARY_NAME = "libmd6.so"
+
+# Выбор реализации: "native" - только libmd6.so, "numpy" - только
+# md6numpy; по умолчанию md6numpy используется, если библиотека не загружается
+MD6_BACKEND_ENV = "MD6_BACKEND"
+
+# Режимы параллельной обработки блоков в библиотеке
+MD6_PARALLEL_SEQUENTIAL = "sequential"
+MD6_PARALLEL_POOLED = "pooled"
+MD6_PARALLEL_PER_BLOCK = "per-block"
+
+# Значения MD6StatsRead в порядке записи библиотекой
+MD6_STATS_FIELDS = (
+    "calls",
+    "call_ns",
+    "io_ns",
+    "leaf_ns",
+    "tree_ns",
+    "hex_ns",
+    "bytes_read",
+    "blocks",
+    "nodes",
+    "levels",
+    "goroutines",
+    "mallocs",
+    "alloc_bytes",
+    "heap_bytes",
+    "gc_cycles",
+)
+
+_md6_instance = None
+_md6_lock = threading.Lock()
+
+
+def find_md6_library():
+    """Путь к libmd6.so: из MD6_LIBRARY или рядом с этим модулем."""
+    library_path = os.environ.get(MD6_LIBRARY_ENV)
+    if library_path:
+        return library_path
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), MD6_LIBRARY_NAME)
+
+
+def get_md6():
+    """Общий экземпляр MD6Hash: библиотека загружается один раз за процесс.
+
+    Если libmd6.so нет или её нельзя загрузить (например, на хосте
+    запрещены cgo-библиотеки), возвращается MD6NumpyHash с тем же
+    интерфейсом и теми же хешами.
+    """
+    global _md6_instance
+    if _md6_instance is None:
+        with _md6_lock:
+            if _md6_instance is None:
+                _md6_instance = load_md6_backend(os.environ.get(MD6_BACKEND_ENV, ""))
+    return _md6_instance
+
+
+def load_md6_backend(backend):
+    if backend == "numpy":
+        from md6numpy import MD6NumpyHash
+
+        return MD6NumpyHash()
+    try:
+        return MD6Hash(find_md6_library())
+    except OSError as e:
+        if backend == "native":
+            raise
+        from md6numpy import MD6NumpyHash
+
+        warnings.warn(f"{e}; using the NumPy implementation of MD6", RuntimeWarning)
+        return MD6NumpyHash()
+
+
+def validated_key(key, **rules):
+    """UTF-8 ключа (str или bytes), проверенного по правилам is_key_valid."""
+    if isinstance(key, (bytes, bytearray)):
+        key = key.decode("utf-8")
+    if not is_key_valid(key, **rules):
+        raise ValueError("Invalid key!")
+    return key.encode("utf-8")
+
+
+def as_buffer(data):
+    """Указатель и длина bytes-подобного объекта для передачи в библиотеку.
+
+    bytes передаются ctypes напрямую, изменяемые буферы (bytearray,
+    memoryview, array) - через c_char.from_buffer, тоже без копирования.
+    Копируются только буферы только для чтения, отличные от bytes.
+    """
+    if isinstance(data, bytes):
+        return data, len(data)
+    view = memoryview(data).cast("B")
+    if not view.nbytes:
+        return None, 0
+    if view.readonly:
+        return bytes(view), view.nbytes
+    return ctypes.byref(ctypes.c_char.from_buffer(view)), view.nbytes
+
+
+def as_writable_buffer(out):
+    """Указатель и длина буфера, в который библиотека запишет результат."""
+    view = memoryview(out).cast("B")
+    if view.readonly:
+        raise TypeError("output buffer must be writable")
+    if not view.nbytes:
+        return None, 0
+    return ctypes.byref(ctypes.c_char.from_buffer(view)), view.nbytes
+
+
+def offsets_buffer(offsets):
+    """memoryview смещений hash_packed; TypeError, если это не буфер uint64."""
+    offsets_view = memoryview(offsets)
+    if offsets_view.itemsize != 8 or offsets_view.format.lstrip("@=<") not in ("Q", "L"):
+        raise TypeError("offsets must be a buffer of uint64")
+    return offsets_view
+
+
+def pack_items(items):
+    """Склеенные bytes-подобные объекты и смещения для hash_packed."""
+    items = [memoryview(item).cast("B") for item in items]
+    offsets = array.array("Q", [0])
+    for item in items:
+        offsets.append(offsets[-1] + item.nbytes)
+    return b"".join(items), offsets
+
+
+def hash_packed_batch(call, data, offsets, output_length):
+    """Общая часть hash_packed обеих обёрток MD6HashBatch.
+
+    call(data_pointer, data_length, offsets_pointer, count, out_pointer)
+    вызывает экспорт и возвращает его статус.
+    """
+    offsets_view = offsets_buffer(offsets)
+    count = max(len(offsets_view) - 1, 0)
+
+    data_pointer, data_length = as_buffer(data)
+    offsets_pointer, _ = as_buffer(offsets_view)
+    out = bytearray(count * output_length)
+    out_pointer, _ = as_writable_buffer(out)
+    if call(data_pointer, data_length, offsets_pointer, count, out_pointer) < 0:
+        raise ValueError("Invalid offsets or output length for MD6 batch")
+    return out
+
+
+class MD6UnsupportedError(NotImplementedError):
+    """Операция недоступна в выбранной реализации MD6.
+
+    Статистика и профилирование есть только в libmd6.so: перед вызовом
+    enable_stats, stats, start_profiling и т.п. проверяйте атрибут
+    instrumented реализации, полученной из get_md6.
+    """
+
+
+class MD6Hash:
+    backend = "native"
+    instrumented = True
+
+    def __init__(self, library_path):
+        self.lib = ctypes.CDLL(library_path)
+        # Время вызовов библиотеки со стороны Python, пока включена статистика
+        self.stats_enabled = False
+        self.stats_lock = threading.Lock()
+        self.python_calls = 0
+        self.python_call_ns = 0
+        # Строки результата освобождаются через MD6FreeString, поэтому c_void_p
+        self.lib.MD6FromFile.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_int,
+        ]
+        self.lib.MD6FromFile.restype = ctypes.c_void_p
+
+        self.lib.MD6FromInput.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_int,
+        ]
+        self.lib.MD6FromInput.restype = ctypes.c_void_p
+
+        self.lib.MD6FreeString.argtypes = [ctypes.c_void_p]
+        self.lib.MD6FreeString.restype = None
+
+        self.lib.MD6HashBuffer.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6HashBuffer.restype = ctypes.c_int
+
+        self.lib.MD6HashFile.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6HashFile.restype = ctypes.c_int
+
+        self.lib.MD6HashFileMmap.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6HashFileMmap.restype = ctypes.c_int
+
+        self.lib.MD6TreeHashFile.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6TreeHashFile.restype = ctypes.c_int
+
+        self.lib.MD6TreeUpdateFile.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6TreeUpdateFile.restype = ctypes.c_int
+
+        self.lib.MD6HashFileShard.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_uint64,
+            ctypes.c_uint64,
+            ctypes.c_int,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6HashFileShard.restype = ctypes.c_int
+
+        self.lib.MD6CombineNodes.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6CombineNodes.restype = ctypes.c_int
+
+        self.lib.MD6KeyInit.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        self.lib.MD6KeyInit.restype = ctypes.c_size_t
+
+        self.lib.MD6KeyFree.argtypes = [ctypes.c_size_t]
+        self.lib.MD6KeyFree.restype = None
+
+        self.lib.MD6KeyHashBuffer.argtypes = [
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6KeyHashBuffer.restype = ctypes.c_int
+
+        self.lib.MD6KeyHashFile.argtypes = [
+            ctypes.c_size_t,
+            ctypes.c_char_p,
+            ctypes.c_int,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6KeyHashFile.restype = ctypes.c_int
+
+        self.lib.MD6KeyHashBatch.argtypes = [
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6KeyHashBatch.restype = ctypes.c_int
+
+        self.lib.MD6KeyStreamInit.argtypes = [ctypes.c_size_t]
+        self.lib.MD6KeyStreamInit.restype = ctypes.c_size_t
+
+        self.lib.MD6HashBatch.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6HashBatch.restype = ctypes.c_int
+
+        self.lib.MD6StreamInit.argtypes = [ctypes.c_char_p]
+        self.lib.MD6StreamInit.restype = ctypes.c_size_t
+
+        self.lib.MD6StreamUpdate.argtypes = [
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6StreamUpdate.restype = None
+
+        self.lib.MD6StreamFinal.argtypes = [ctypes.c_size_t, ctypes.c_int]
+        self.lib.MD6StreamFinal.restype = ctypes.c_void_p
+
+        self.lib.MD6StreamFinalBuffer.argtypes = [
+            ctypes.c_size_t,
+            ctypes.c_void_p,
+            ctypes.c_size_t,
+        ]
+        self.lib.MD6StreamFinalBuffer.restype = ctypes.c_int
+
+        self.lib.MD6StreamProcessed.argtypes = [ctypes.c_size_t]
+        self.lib.MD6StreamProcessed.restype = ctypes.c_ulonglong
+
+        self.lib.MD6StreamFree.argtypes = [ctypes.c_size_t]
+        self.lib.MD6StreamFree.restype = None
+
+        self.lib.MD6SetParallelism.argtypes = [ctypes.c_int]
+        self.lib.MD6SetParallelism.restype = None
+
+        self.lib.MD6StatsEnable.argtypes = [ctypes.c_int]
+        self.lib.MD6StatsEnable.restype = None
+
+        self.lib.MD6StatsReset.argtypes = []
+        self.lib.MD6StatsReset.restype = None
+
+        self.lib.MD6StatsRead.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        self.lib.MD6StatsRead.restype = ctypes.c_int
+
+        self.lib.MD6ProfileStart.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
+        self.lib.MD6ProfileStart.restype = ctypes.c_int
+
+        self.lib.MD6ProfileStop.argtypes = [ctypes.c_char_p]
+        self.lib.MD6ProfileStop.restype = ctypes.c_int
+
+    def set_parallelism(self, mode=MD6_PARALLEL_POOLED, workers=0):
+        """Выбрать режим обработки блоков для всех последующих хешей.
+
+        sequential - в одном потоке; pooled - пул из workers воркеров
+        (0 - по числу GOMAXPROCS); per-block - горутина на каждый блок.
+        """
+        if mode == MD6_PARALLEL_SEQUENTIAL:
+            value = 1
+        elif mode == MD6_PARALLEL_POOLED:
+            if workers < 0:
+                raise ValueError("workers must be >= 0")
+            value = workers
+        elif mode == MD6_PARALLEL_PER_BLOCK:
+            value = -1
+        else:
+            raise ValueError(f"Unknown parallelism mode: {mode!r}")
+        self.lib.MD6SetParallelism(ctypes.c_int(value))
+
+    def call(self, fn, *args):
+        """Вызов функции библиотеки; при включённой статистике учитывается время."""
+        if not self.stats_enabled:
+            return fn(*args)
+        started = time.perf_counter_ns()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter_ns() - started
+            with self.stats_lock:
+                self.python_calls += 1
+                self.python_call_ns += elapsed
+
+    def enable_stats(self, enabled=True):
+        """Включить сбор статистики (со сбросом) или выключить его.
+
+        Пока статистика выключена, библиотека не замеряет время фаз.
+        """
+        self.reset_stats()
+        self.stats_enabled = enabled
+        self.lib.MD6StatsEnable(ctypes.c_int(1 if enabled else 0))
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.python_calls = 0
+            self.python_call_ns = 0
+        self.lib.MD6StatsReset()
+
+    def stats(self):
+        """Счётчики и таймеры с момента enable_stats или reset_stats.
+
+        Времена в наносекундах, суммарно по всем потокам: *_ns фаз
+        библиотеки (io - чтение файлов, leaf - сжатие листьев, tree - свёртка
+        дерева, hex - кодирование), call_ns - время внутри вызовов
+        библиотеки, ctypes_ns - остаток времени вызовов из Python
+        (подготовка аргументов и переход через ctypes). mallocs, alloc_bytes
+        и gc_cycles - для кучи Go с момента сброса, heap_bytes - текущий размер.
+        """
+        values = (ctypes.c_uint64 * len(MD6_STATS_FIELDS))()
+        count = self.lib.MD6StatsRead(values, len(values))
+        stats = dict(zip(MD6_STATS_FIELDS[:count], values[:count]))
+        with self.stats_lock:
+            stats["python_calls"] = self.python_calls
+            stats["python_call_ns"] = self.python_call_ns
+        stats["ctypes_ns"] = max(stats["python_call_ns"] - stats["call_ns"], 0)
+        return stats
+
+    def start_profiling(self, http_address=None, cpu_profile=None):
+        """Запустить обработчики pprof на http_address и/или профиль CPU в файл.
+
+        http_address должен быть локальным, например "127.0.0.1:6060":
+        обработчики pprof не требуют авторизации.
+        """
+        status = self.lib.MD6ProfileStart(
+            (http_address or "").encode(), os.fsencode(cpu_profile or "")
+        )
+        if status < 0:
+            raise OSError("MD6: cannot start profiling")
+
+    def stop_profiling(self, heap_profile=None):
+        """Завершить профиль CPU и записать профиль кучи в heap_profile."""
+        if self.lib.MD6ProfileStop(os.fsencode(heap_profile or "")) < 0:
+            raise OSError("MD6: cannot write heap profile")
+
+    def take_string(self, pointer):
+        """Скопировать строку результата и освободить её на стороне Go."""
+        if not pointer:
+            return None
+        try:
+            return ctypes.string_at(pointer)
+        finally:
+            self.lib.MD6FreeString(pointer)
+
+    def compute_md6_hash_from_file(self, file_path, key, output_length):
+        return self.take_string(
+            self.call(
+                self.lib.MD6FromFile,
+                ctypes.c_char_p(file_path),
+                ctypes.c_char_p(key),
+                ctypes.c_int(output_length),
+            )
+        )
+
+    def compute_md6_hash_from_input(self, data, key, output_length):
+        return self.take_string(
+            self.call(
+                self.lib.MD6FromInput,
+                ctypes.c_char_p(data),
+                ctypes.c_char_p(key),
+                ctypes.c_int(output_length),
+            )
+        )
+
+    def compute_md6_digest_into(self, data, key, out):
+        """Записать сырой хеш данных в out (bytearray, memoryview...).
+
+        Длина хеша равна len(out), но не больше 128 байт. data может
+        содержать нулевые байты и передаётся без копирования.
+        """
+        data_pointer, data_length = as_buffer(data)
+        key_pointer, key_length = as_buffer(key)
+        out_pointer, out_length = as_writable_buffer(out)
+        return self.call(
+            self.lib.MD6HashBuffer,
+            data_pointer,
+            data_length,
+            key_pointer,
+            key_length,
+            out_pointer,
+            out_length,
+        )
+
+    def compute_md6_digest_from_input(self, data, key, output_length):
+        """Сырой хеш двоичных данных (bytes, bytearray, memoryview)."""
+        out = bytearray(output_length)
+        written = self.compute_md6_digest_into(data, key, out)
+        return bytes(out[:written])
+
+    def compute_md6_digest_from_file(self, file_path, key, output_length, use_mmap=False):
+        """Сырой хеш файла.
+
+        По умолчанию файл читается по частям на стороне Go. С use_mmap=True
+        файл отображается в память и блоки сжимаются прямо из отображения;
+        файл не должен укорачиваться во время хеширования.
+        """
+        key_pointer, key_length = as_buffer(key)
+        out = bytearray(output_length)
+        out_pointer, out_length = as_writable_buffer(out)
+        hash_file = self.lib.MD6HashFileMmap if use_mmap else self.lib.MD6HashFile
+        written = self.call(
+            hash_file,
+            os.fsencode(file_path),
+            key_pointer,
+            key_length,
+            out_pointer,
+            out_length,
+        )
+        if written < 0:
+            raise OSError(f"MD6: cannot read file {file_path!r}")
+        return bytes(out[:written])
+
+    def compute_md6_digest_with_tree(self, file_path, tree_path, key, output_length):
+        """Сырой хеш файла с сохранением узлов дерева в tree_path.
+
+        Дерево занимает около половины размера файла и позволяет затем
+        пересчитать хеш изменённого файла через update_md6_digest_with_tree.
+        """
+        key_pointer, key_length = as_buffer(key)
+        out = bytearray(output_length)
+        out_pointer, out_length = as_writable_buffer(out)
+        written = self.call(
+            self.lib.MD6TreeHashFile,
+            os.fsencode(file_path),
+            os.fsencode(tree_path),
+            key_pointer,
+            key_length,
+            out_pointer,
+            out_length,
+        )
+        if written < 0:
+            raise OSError(f"MD6: cannot hash {file_path!r} into tree {tree_path!r}")
+        return bytes(out[:written])
+
+    def update_md6_digest_with_tree(
+        self, file_path, tree_path, key, output_length, changed=()
+    ):
+        """Пересчитать хеш изменённого файла по дереву из tree_path.
+
+        changed - пары (смещение, длина) байт, изменённых с построения
+        дерева; байты после прежней длины файла (дописанные или обрезанные)
+        учитываются сами. Сжимаются заново только затронутые листья и пути
+        от них к корню, дерево обновляется. Результат совпадает с полным
+        хешированием, если changed покрывает все изменения. Если дерева нет,
+        оно построено с другим ключом или повреждено, файл хешируется
+        полностью и дерево строится заново.
+        """
+        ranges = array.array("Q")
+        for offset, length in changed:
+            ranges.extend((offset, length))
+        ranges_pointer, _ = as_buffer(ranges)
+        key_pointer, key_length = as_buffer(key)
+        out = bytearray(output_length)
+        out_pointer, out_length = as_writable_buffer(out)
+        written = self.call(
+            self.lib.MD6TreeUpdateFile,
+            os.fsencode(file_path),
+            os.fsencode(tree_path),
+            key_pointer,
+            key_length,
+            ranges_pointer,
+            len(ranges) // 2,
+            out_pointer,
+            out_length,
+        )
+        if written < 0:
+            raise OSError(f"MD6: cannot update tree {tree_path!r} for {file_path!r}")
+        return bytes(out[:written])
+
+    def hash_file_shard(self, file_path, key, length, first, level):
+        """Узел уровня level над листьями [first, first + 2**level) файла.
+
+        length - длина всего файла, first кратен 2**level. Узлы всех
+        шардов по порядку сворачиваются в хеш через combine_nodes. Если
+        файл умещается в один шард, возвращается корень его дерева.
+        """
+        key_pointer, key_length = as_buffer(key)
+        out = bytearray(MD6_NODE_SIZE)
+        out_pointer, out_length = as_writable_buffer(out)
+        written = self.call(
+            self.lib.MD6HashFileShard,
+            os.fsencode(file_path),
+            key_pointer,
+            key_length,
+            length,
+            first,
+            level,
+            out_pointer,
+            out_length,
+        )
+        if written < 0:
+            raise OSError(f"MD6: cannot hash leaves {first}.. of {file_path!r}")
+        return bytes(out[:written])
+
+    def combine_nodes(self, nodes, key, output_length):
+        """Сырой хеш из узлов одного уровня (по MD6_NODE_SIZE байт подряд)."""
+        nodes_pointer, nodes_length = as_buffer(nodes)
+        if not nodes_length or nodes_length % MD6_NODE_SIZE:
+            raise ValueError(f"nodes must be a non-empty multiple of {MD6_NODE_SIZE} bytes")
+        key_pointer, key_length = as_buffer(key)
+        out = bytearray(output_length)
+        out_pointer, out_length = as_writable_buffer(out)
+        written = self.call(
+            self.lib.MD6CombineNodes,
+            nodes_pointer,
+            nodes_length // MD6_NODE_SIZE,
+            key_pointer,
+            key_length,
+            out_pointer,
+            out_length,
+        )
+        return bytes(out[:written])
+
+    def hash_packed(self, data, offsets, key=b"", output_length=32):
+        """Сырые хеши сообщений data[offsets[i]:offsets[i + 1]] за один вызов.
+
+        offsets - буфер uint64 (array("Q"), numpy.uint64) из count + 1
+        смещений. Возвращает bytearray из count * output_length байт:
+        хеш сообщения i лежит в [i * output_length, (i + 1) * output_length).
+        """
+        key_pointer, key_length = as_buffer(key)
+        return hash_packed_batch(
+            lambda data_pointer, data_length, offsets_pointer, count, out_pointer: (
+                self.call(
+                    self.lib.MD6HashBatch,
+                    data_pointer,
+                    data_length,
+                    offsets_pointer,
+                    count,
+                    key_pointer,
+                    key_length,
+                    out_pointer,
+                    output_length,
+                )
+            ),
+            data,
+            offsets,
+            output_length,
+        )
+
+    def hash_many(self, items, key=b"", output_length=32):
+        """Сырые хеши набора bytes-подобных объектов одним вызовом hash_packed."""
+        data, offsets = pack_items(items)
+        return self.hash_packed(data, offsets, key, output_length)
+
+    def stream(self, key, output_length):
+        """Создать потоковый хешер с тем же ключом и длиной вывода."""
+        return MD6Stream(self, key, output_length)
+
+    def with_key(self, key, **rules):
+        """Контекст для многих хешей с одним ключом (str или UTF-8 bytes).
+
+        Ключ один раз проверяется по правилам is_key_valid (rules - те же
+        ограничения, что в KeySettingsDialog: key_min_length,
+        exclude_digits...) и один раз разбирается библиотекой. Контекст
+        нужно закрыть через close() или with.
+        """
+        return MD6KeyedHash(self, validated_key(key, **rules))
+
+    def compute_md6_hash_from_file_streamed(
+        self, file_path, key, output_length, chunk_size=MD6_STREAM_CHUNK_SIZE
+    ):
+        """Хеш файла, читаемого по частям: память не зависит от размера файла."""
+        with self.stream(key, output_length) as hasher, open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+            return hasher.finalize()
+
+
+class MD6Stream:
+    """Инкрементальный хешер MD6: update() по частям, затем finalize().
+
+    Результат совпадает с MD6FromFile/MD6FromInput для тех же данных.
+    """
+
+    def __init__(self, md6, key, output_length, handle=None):
+        self.md6 = md6
+        self.lib = md6.lib
+        self.output_length = output_length
+        if handle is None:
+            handle = self.lib.MD6StreamInit(ctypes.c_char_p(key))
+        self.handle = handle
+
+    def update(self, data):
+        if self.handle is None:
+            raise ValueError("MD6Stream is already finalized")
+        data_pointer, data_length = as_buffer(data)
+        self.md6.call(self.lib.MD6StreamUpdate, self.handle, data_pointer, data_length)
+
+    def processed(self):
+        """Количество байт, уже обработанных библиотекой."""
+        if self.handle is None:
+            raise ValueError("MD6Stream is already finalized")
+        return self.lib.MD6StreamProcessed(self.handle)
+
+    def finalize(self):
+        if self.handle is None:
+            raise ValueError("MD6Stream is already finalized")
+        handle, self.handle = self.handle, None
+        pointer = self.md6.call(
+            self.lib.MD6StreamFinal, handle, ctypes.c_int(self.output_length)
+        )
+        if not pointer:
+            return None
+        try:
+            return ctypes.string_at(pointer)
+        finally:
+            self.lib.MD6FreeString(pointer)
+
+    def finalize_digest(self):
+        """Завершить хеширование и вернуть сырой хеш вместо hex-строки."""
+        if self.handle is None:
+            raise ValueError("MD6Stream is already finalized")
+        handle, self.handle = self.handle, None
+        out = bytearray(self.output_length)
+        out_pointer, out_length = as_writable_buffer(out)
+        written = self.md6.call(
+            self.lib.MD6StreamFinalBuffer, handle, out_pointer, out_length
+        )
+        return bytes(out[:written])
+
+    def close(self):
+        """Освободить состояние, если хеш так и не был получен."""
+        if self.handle is not None:
+            handle, self.handle = self.handle, None
+            self.lib.MD6StreamFree(handle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MD6KeyedHash:
+    """Хеширование с ключом, подготовленным один раз (см. MD6Hash.with_key).
+
+    Методы повторяют методы MD6Hash без аргумента key и используют один
+    дескриптор библиотеки со словами ключа; состояния хешера между
+    вызовами тоже переиспользуются. Объект можно использовать из
+    нескольких потоков, но close() вызывается после завершения всех вызовов.
+    """
+
+    def __init__(self, md6, key):
+        self.md6 = md6
+        self.lib = md6.lib
+        key_pointer, key_length = as_buffer(key)
+        self.handle = self.lib.MD6KeyInit(key_pointer, key_length)
+
+    def checked_handle(self):
+        if self.handle is None:
+            raise ValueError("MD6KeyedHash is closed")
+        return self.handle
+
+    def compute_md6_digest_into(self, data, out):
+        """Записать сырой хеш данных в out; длина хеша - len(out), до 128 байт."""
+        data_pointer, data_length = as_buffer(data)
+        out_pointer, out_length = as_writable_buffer(out)
+        return self.md6.call(
+            self.lib.MD6KeyHashBuffer,
+            self.checked_handle(),
+            data_pointer,
+            data_length,
+            out_pointer,
+            out_length,
+        )
+
+    def compute_md6_digest_from_input(self, data, output_length):
+        out = bytearray(output_length)
+        written = self.compute_md6_digest_into(data, out)
+        return bytes(out[:written])
+
+    def compute_md6_digest_from_file(self, file_path, output_length, use_mmap=False):
+        out = bytearray(output_length)
+        out_pointer, out_length = as_writable_buffer(out)
+        written = self.md6.call(
+            self.lib.MD6KeyHashFile,
+            self.checked_handle(),
+            os.fsencode(file_path),
+            1 if use_mmap else 0,
+            out_pointer,
+            out_length,
+        )
+        if written < 0:
+            raise OSError(f"MD6: cannot read file {file_path!r}")
+        return bytes(out[:written])
+
+    def hash_packed(self, data, offsets, output_length=32):
+        """Как MD6Hash.hash_packed: хеши сообщений data[offsets[i]:offsets[i + 1]]."""
+        handle = self.checked_handle()
+        return hash_packed_batch(
+            lambda data_pointer, data_length, offsets_pointer, count, out_pointer: (
+                self.md6.call(
+                    self.lib.MD6KeyHashBatch,
+                    handle,
+                    data_pointer,
+                    data_length,
+                    offsets_pointer,
+                    count,
+                    out_pointer,
+                    output_length,
+                )
+            ),
+            data,
+            offsets,
+            output_length,
+        )
+
+    def hash_many(self, items, output_length=32):
+        data, offsets = pack_items(items)
+        return self.hash_packed(data, offsets, output_length)
+
+    def stream(self, output_length):
+        """Потоковый хешер с этим ключом; он может пережить close() контекста."""
+        handle = self.lib.MD6KeyStreamInit(self.checked_handle())
+        return MD6Stream(self.md6, None, output_length, handle)
+
+    def close(self):
+        if self.handle is not None:
+            handle, self.handle = self.handle, None
+            self.lib.MD6KeyFree(handle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,20 +1,44 @@
 package main
 
 import (
+	"crypto/hmac"
+	"crypto/rand"
+	"crypto/sha256"
 	"encoding/binary"
 	"encoding/hex"
+	"errors"
 	"fmt"
+	"io"
 	"io/ioutil"
-	"math"
+	"math/bits"
+	"net"
+	"net/http"
 	_ "net/http/pprof" // Пакет для профилирования
+	"os"
+	"runtime"
+	"runtime/cgo"
+	"runtime/pprof"
+	"sort"
 	"sync"
+	"sync/atomic"
+	"syscall"
+	"time"
+	"unsafe"
 )
 
+/*
+#include <stddef.h>
+#include <stdint.h>
+#include <stdlib.h>
+*/
 import "C"
 
 // Константы для MD6
 const MD6BlockSize = 512
 
+// Число раундов сжатия: 40 + d/4 для хеша длины d = 512 бит
+const md6Rounds = 40 + 32*16/4
+
 // Константы для MD6
 var (
 	// Значения для ri−n (сдвиги для каждого раунда)
@@ -49,33 +73,90 @@ var S_star = uint64(0x7311c2812425cfa0)
 // Начальное значение S0
 var S0 = uint64(0x0123456789abcdef)
 
-// Глобальный массив для хранения предвычисленных значений Si
-var SiCache []uint64
+// Режим параллельной обработки блоков:
+// > 0 — пул из стольких воркеров (1 — последовательно),
+// 0 — пул размером GOMAXPROCS, -1 — отдельная горутина на каждый блок
+var parallelism int32
+
+// Статистика библиотеки (MD6StatsEnable). Пока она выключена, замеры
+// времени не выполняются; счётчики обновляются атомарно.
+var statsEnabled int32
+
+var stats struct {
+	calls      int64 // Вызовы экспортируемых функций хеширования
+	callNs     int64 // Время внутри этих вызовов
+	ioNs       int64 // Чтение файлов
+	leafNs     int64 // Сжатие листьев
+	treeNs     int64 // Свёртка дерева
+	hexNs      int64 // Кодирование хеша в hex
+	bytesRead  int64
+	blocks     int64 // Сжатые листья (блоки сообщения)
+	nodes      int64 // Сжатые внутренние узлы
+	levels     int64 // Уровни построенных деревьев
+	goroutines int64 // Горутины, запущенные forEachRange
+}
+
+// Показатели runtime.MemStats на момент сброса статистики
+var statsMemBase runtime.MemStats
+var statsMemLock sync.Mutex
+
+// Начало замера; нулевое время, если статистика выключена
+func statsStart() time.Time {
+	if atomic.LoadInt32(&statsEnabled) == 0 {
+		return time.Time{}
+	}
+	return time.Now()
+}
+
+// Добавление времени, прошедшего с начала замера, к счётчику
+func statsSince(counter *int64, start time.Time) {
+	if !start.IsZero() {
+		atomic.AddInt64(counter, int64(time.Since(start)))
+	}
+}
+
+func statsAdd(counter *int64, n int) {
+	if atomic.LoadInt32(&statsEnabled) != 0 {
+		atomic.AddInt64(counter, int64(n))
+	}
+}
+
+// Учёт вызова экспортируемой функции: defer statsCall(statsStart())
+func statsCall(start time.Time) {
+	if !start.IsZero() {
+		atomic.AddInt64(&stats.calls, 1)
+		statsSince(&stats.callNs, start)
+	}
+}
+
+// Предвычисленные значения Si для каждого количества раундов (rounds -> []uint64).
+// Таблица вычисляется один раз и после этого только читается, поэтому
+// хеши можно вычислять одновременно из нескольких потоков.
+var SiCache sync.Map
 
 // Функция для предвычисления всех значений Si для заданного количества раундов
-func precomputeSi(rounds int) {
-	SiCache = make([]uint64, rounds+1)
+func precomputeSi(rounds int) []uint64 {
+	Si := make([]uint64, rounds+1)
 	Sj := S0
 	for round := 0; round <= rounds; round++ {
-		SiCache[round] = Sj
+		Si[round] = Sj
 		Sj = rotateLeft(Sj, 1) ^ (Sj & S_star)
 	}
+	return Si
+}
+
+// Таблица Si для заданного количества раундов из SiCache
+func getSi(rounds int) []uint64 {
+	if Si, ok := SiCache.Load(rounds); ok {
+		return Si.([]uint64)
+	}
+	Si, _ := SiCache.LoadOrStore(rounds, precomputeSi(rounds))
+	return Si.([]uint64)
 }
 
 // Функция разбивки на блоки с дополнительным логированием
 func splitIntoBlocks(data []byte, blockSize int) [][]byte {
-	precomputeSi(40 + int(math.Floor(float64(32*16)/4)))
-	length := len(data)
-	paddingSize := blockSize - (length % blockSize)
-	if paddingSize < 8 {
-		paddingSize += blockSize
-	}
-	padding := make([]byte, paddingSize-8)
-	padding[0] = 0x80
-	lenBytes := make([]byte, 8)
-	binary.LittleEndian.PutUint64(lenBytes, uint64(length*8))
-	data = append(data, padding...)
-	data = append(data, lenBytes...)
+	data = append(data, md6Padding(uint64(len(data)), blockSize)...)
 
 	var blocks [][]byte
 	for len(data) > 0 {
@@ -86,6 +167,25 @@ func splitIntoBlocks(data []byte, blockSize int) [][]byte {
 	return blocks
 }
 
+// Паддинг сообщения длины length: байт 0x80, нули и длина в битах (8 байт).
+// Для байта 0x80 и длины нужно минимум 9 байт, иначе добавляется ещё один блок.
+func md6Padding(length uint64, blockSize int) []byte {
+	paddingSize := md6PaddingSize(length, blockSize)
+	padding := make([]byte, paddingSize)
+	padding[0] = 0x80
+	binary.LittleEndian.PutUint64(padding[paddingSize-8:], length*8)
+	return padding
+}
+
+// Размер паддинга для сообщения длины length
+func md6PaddingSize(length uint64, blockSize int) int {
+	paddingSize := blockSize - int(length%uint64(blockSize))
+	if paddingSize < 9 {
+		paddingSize += blockSize
+	}
+	return paddingSize
+}
+
 func rotateLeft(value uint64, shift uint) uint64 {
 	return (value << shift) | (value >> (64 - shift))
 }
@@ -107,43 +207,66 @@ func prepareKey(key []byte) []uint64 {
 	return K
 }
 
-func compressF(block []byte, key string, rounds int) []byte {
-	n := 89                // Количество фиксированных слов
-	c := 16                // Размер блока вывода
-	t_cycle := rounds * 16 // Количество циклов
+// Размер выходного узла compressF в байтах (16 слов)
+const md6NodeSize = 16 * 8
+
+// Максимальное число листьев, сжимаемых потоком за одну партию (8 МБ данных)
+const md6LeafBatch = 16384
+
+// Рабочие массивы A (*[]uint64), общие для всех вычислений хеша
+var scratchPool sync.Pool
+
+func getScratch(rounds int) *[]uint64 {
+	if A, ok := scratchPool.Get().(*[]uint64); ok && len(*A) == 89+rounds*16 {
+		return A
+	}
+	A := make([]uint64, 89+rounds*16)
+	return &A
+}
+
+// Подготовленный контекст одного вычисления хеша. Ключ разбирается один раз,
+// префикс массива A (Q, K, U, V) вычисляется заранее, а рабочие массивы A
+// берутся из scratchPool, поэтому сжатие блока не выделяет память.
+type md6Context struct {
+	rounds int
+	prefix []uint64 // Q, K, U, V — первые слова массива A
+	Si     []uint64 // Неизменяемая таблица из SiCache
+}
 
-	// Массив A для хранения всех данных: Q, K, U, V и блок
-	A := make([]uint64, 89+t_cycle)
+func newMD6Context(key string, rounds int) *md6Context {
+	K := prepareKey([]byte(key)) // Преобразуем байты в 8 слов (64 байта)
 
-	// 1. Заполнение первых 89 элементов массива A значениями из Q
-	copy(A[:len(Q)], Q)
+	prefix := make([]uint64, 0, len(Q)+len(K)+2)
+	prefix = append(prefix, Q...)
+	prefix = append(prefix, K...)
+	prefix = append(prefix, U, V)
 
-	// 2. Заполнение A значениями из ключа K
-	keyBytes := []byte(key)
-	K := prepareKey(keyBytes) // Преобразуем байты в 8 слов (64 байта)
-	copy(A[len(Q):len(Q)+len(K)], K)
+	return &md6Context{rounds: rounds, prefix: prefix, Si: getSi(rounds)}
+}
+
+// Сжатие блока в out (md6NodeSize байт) с рабочим массивом A.
+// out может совпадать с block: блок читается в A до записи результата.
+func (ctx *md6Context) compressInto(out, block []byte, A []uint64) {
+	n := 89                    // Количество фиксированных слов
+	c := 16                    // Размер блока вывода
+	t_cycle := ctx.rounds * 16 // Количество циклов
 
-	// 3. Заполнение значениями U и V
-	A[len(Q)+len(K)] = U
-	A[len(Q)+len(K)+1] = V
+	// 1-3. Заполнение A значениями Q, K, U и V
+	copy(A, ctx.prefix)
 
 	// 4. Заполнение A значениями из блока
 	blockWords := len(block) / 8
 	for i := 0; i < blockWords; i++ {
-		A[len(Q)+len(K)+2+i] = binary.LittleEndian.Uint64(block[i*8 : (i+1)*8])
+		A[len(ctx.prefix)+i] = binary.LittleEndian.Uint64(block[i*8 : (i+1)*8])
 	}
 
-	// 5. Добавление паддинга, если блок меньше 74 слов
-	if blockWords < 74 {
-		padding := make([]uint64, 74-blockWords) // Создаем массив паддинга
-		// Паддинг заполняем нулями (по умолчанию)
-		copy(A[len(Q)+len(K)+2+blockWords:], padding) // Копируем паддинг в A
-	}
+	// 5. Паддинг нулями, если блок меньше 64 слов
+	clear(A[len(ctx.prefix)+blockWords : n])
 
 	// 6. Основной цикл вычислений
 	for i := n; i < t_cycle; i++ {
 		siIndex := (i - n) % 16
-		x := (SiCache[siIndex] ^ A[i-n] ^ A[i-t[0]]) ^ (A[i-t[1]] & A[i-t[2]]) ^ (A[i-t[3]] & A[i-t[4]])
+		x := (ctx.Si[siIndex] ^ A[i-n] ^ A[i-t[0]]) ^ (A[i-t[1]] & A[i-t[2]]) ^ (A[i-t[3]] & A[i-t[4]])
 		x ^= x >> uint(r[(i-n)%16])
 		x ^= x << uint(shifts[(i-n)%16])
 
@@ -152,102 +275,1337 @@ func compressF(block []byte, key string, rounds int) []byte {
 
 	// 7. Подготовка вывода
 	startIndex := t_cycle - 16
-	output := make([]byte, c*8)
 	for i := 0; i < c; i++ {
-		value := A[startIndex+i]
-		binary.LittleEndian.PutUint64(output[i*8:(i+1)*8], value)
+		binary.LittleEndian.PutUint64(out[i*8:(i+1)*8], A[startIndex+i])
 	}
+}
+
+// Сжатие диапазона узлов с одним рабочим массивом A на вызов
+func (ctx *md6Context) compressRange(lo, hi int, fn func(i int, A []uint64)) {
+	A := getScratch(ctx.rounds)
+	for i := lo; i < hi; i++ {
+		fn(i, *A)
+	}
+	scratchPool.Put(A)
+}
 
+// Сжатие одного блока без подготовленного контекста
+func compressF(block []byte, key string, rounds int) []byte {
+	ctx := newMD6Context(key, rounds)
+	output := make([]byte, md6NodeSize)
+	ctx.compressInto(output, block, make([]uint64, 89+rounds*16))
 	return output
 }
 
-func buildTree(blocks [][]byte, key string, rounds int) []byte {
-	hashes := make([][]byte, len(blocks))
+// Вызов fn для диапазонов [lo, hi) из [0, n) согласно режиму parallelism.
+// В режиме пула каждый воркер обрабатывает один непрерывный диапазон,
+// поэтому число горутин не зависит от количества блоков.
+func forEachRange(n int, fn func(lo, hi int)) {
+	workers := int(atomic.LoadInt32(&parallelism))
 	var wg sync.WaitGroup
 
-	// Параллельная обработка блоков
-	for i, block := range blocks {
+	if workers < 0 {
+		statsAdd(&stats.goroutines, n)
+		for i := 0; i < n; i++ {
+			wg.Add(1)
+			go func(i int) {
+				defer wg.Done()
+				fn(i, i+1)
+			}(i)
+		}
+		wg.Wait()
+		return
+	}
+
+	if workers == 0 {
+		workers = runtime.GOMAXPROCS(0)
+	}
+	if workers > n {
+		workers = n
+	}
+	if workers <= 1 {
+		fn(0, n)
+		return
+	}
+
+	size := (n + workers - 1) / workers
+	statsAdd(&stats.goroutines, (n+size-1)/size)
+	for lo := 0; lo < n; lo += size {
 		wg.Add(1)
-		go func(i int, block []byte) {
+		go func(lo, hi int) {
 			defer wg.Done()
-			hashes[i] = compressF(block, key, rounds) // Прямое назначение в массив по индексу
-		}(i, block)
+			fn(lo, hi)
+		}(lo, min(lo+size, n))
 	}
+	wg.Wait()
+}
+
+// Узлы уровня хранятся подряд в одной области памяти (arena), поэтому
+// пара узлов для следующего уровня — это непрерывный срез без копирования.
+// Уровни записываются попеременно в две области.
+func buildTree(blocks [][]byte, key string, rounds int) []byte {
+	ctx := newMD6Context(key, rounds)
+	hashes := make([]byte, len(blocks)*md6NodeSize)
+
+	// Параллельная обработка блоков
+	start := statsStart()
+	forEachRange(len(blocks), func(lo, hi int) {
+		ctx.compressRange(lo, hi, func(i int, A []uint64) {
+			ctx.compressInto(hashes[i*md6NodeSize:(i+1)*md6NodeSize], blocks[i], A)
+		})
+	})
+	statsSince(&stats.leafNs, start)
+	statsAdd(&stats.blocks, len(blocks))
 
-	wg.Wait() // Ждём завершения всех горутин
+	return ctx.reduceLevels(hashes, len(blocks))
+}
 
+// Свёртка count узлов одного уровня, лежащих подряд в hashes, в корень.
+// hashes используется как рабочая область и перезаписывается.
+func (ctx *md6Context) reduceLevels(hashes []byte, count int) []byte {
 	// Объединение хэшей
-	for len(hashes) > 1 {
-		// Новый срез для хранения объединённых хэшей
-		newHashes := make([][]byte, (len(hashes)+1)/2)
+	defer statsSince(&stats.treeNs, statsStart())
+	root, levels := ctx.reduceInto(hashes, make([]byte, (count+1)/2*md6NodeSize), count)
+	statsAdd(&stats.levels, levels+1)
+	return root
+}
 
-		var subWG sync.WaitGroup
-		for i := 0; i < len(hashes); i += 2 {
-			subWG.Add(1)
-			go func(i int) {
-				defer subWG.Done()
-
-				// Объединяем текущий и следующий блоки
-				var combined []byte
-				if i+1 < len(hashes) {
-					combined = append(hashes[i], hashes[i+1]...)
-				} else {
-					combined = hashes[i] // Последний блок без пары
-				}
+// Свёртка, как в reduceLevels, с рабочей областью next не меньше
+// (count+1)/2 узлов. Возвращает корень (в hashes или next) и число
+// построенных уровней.
+func (ctx *md6Context) reduceInto(hashes, next []byte, count int) ([]byte, int) {
+	levels := 0
+	for count > 1 {
+		newCount := (count + 1) / 2
+		src, dst := hashes, next
 
-				// Хешируем объединённый блок
-				newHashes[i/2] = compressF(combined, key, rounds)
-			}(i)
+		forEachRange(newCount, func(lo, hi int) {
+			ctx.compressRange(lo, hi, func(j int, A []uint64) {
+				// Текущий и следующий узлы уже лежат подряд;
+				// последний узел без пары сжимается отдельно
+				end := min((2*j+2)*md6NodeSize, count*md6NodeSize)
+				ctx.compressInto(dst[j*md6NodeSize:(j+1)*md6NodeSize], src[2*j*md6NodeSize:end], A)
+			})
+		})
+
+		// Переходим на новый уровень
+		hashes, next = next, hashes
+		count = newCount
+		statsAdd(&stats.nodes, newCount)
+		levels++
+	}
+
+	return hashes[:md6NodeSize], levels
+}
+
+// Потоковое состояние MD6. В памяти хранится только хвост текущего блока
+// и открытый фронт дерева: не более одного узла без пары на каждом уровне,
+// поэтому расход памяти не зависит от размера входных данных.
+type md6Stream struct {
+	ctx        *md6Context
+	sequential bool                    // Сжимать блоки в текущей горутине (для пакетного режима)
+	length     uint64                  // Количество обработанных байт
+	tail       []byte                  // Неполный блок, ожидающий данных
+	pairs      [][2 * md6NodeSize]byte // Узел без пары на каждом уровне (первая половина)
+	pending    []bool                  // Есть ли на уровне узел без пары
+	counts     []uint64                // Количество узлов, построенных на каждом уровне
+	leaves     []byte                  // Хеши полных блоков из последнего write
+	nodes      []byte                  // Рабочая область свёртки поддеревьев из leaves
+	node       [md6NodeSize]byte       // Результат последнего сжатия
+	A          []uint64                // Рабочий массив для сжатия в самом потоке
+}
+
+func newMD6Stream(key string, rounds int) *md6Stream {
+	return newMD6StreamContext(newMD6Context(key, rounds))
+}
+
+func newMD6StreamContext(ctx *md6Context) *md6Stream {
+	return &md6Stream{
+		ctx:  ctx,
+		tail: make([]byte, 0, MD6BlockSize),
+		A:    make([]uint64, 89+ctx.rounds*16),
+	}
+}
+
+// Сброс состояния для хеширования нового сообщения с тем же контекстом;
+// выделенные буферы сохраняются
+func (s *md6Stream) reset() {
+	s.length = 0
+	s.tail = s.tail[:0]
+	s.pairs = s.pairs[:0]
+	s.pending = s.pending[:0]
+	s.counts = s.counts[:0]
+}
+
+// Добавление узла на уровень дерева. Пара узлов сразу сжимается
+// и поднимается на уровень выше, как в buildTree.
+func (s *md6Stream) pushNode(level int, hash []byte) {
+	for {
+		s.grow(level)
+		s.counts[level]++
+		pair := &s.pairs[level]
+		if !s.pending[level] {
+			copy(pair[:md6NodeSize], hash)
+			s.pending[level] = true
+			return
 		}
+		copy(pair[md6NodeSize:], hash)
+		s.pending[level] = false
+		s.ctx.compressInto(s.node[:], pair[:], s.A)
+		statsAdd(&stats.nodes, 1)
+		hash = s.node[:]
+		level++
+	}
+}
 
-		subWG.Wait() // Ждём завершения всех горутин
+// Добавление уровней фронта до level включительно
+func (s *md6Stream) grow(level int) {
+	for len(s.pairs) <= level {
+		s.pairs = append(s.pairs, [2 * md6NodeSize]byte{})
+		s.pending = append(s.pending, false)
+		s.counts = append(s.counts, 0)
+	}
+}
 
-		// Переходим на новый уровень
-		hashes = newHashes
+// Добавление корня полного поддерева из 2**level листьев. Поддерево должно
+// быть выровнено: число уже добавленных листьев кратно 2**level, поэтому
+// на уровнях ниже level нет узлов без пары. Счётчики нижних уровней
+// увеличиваются так же, как при добавлении листьев по одному.
+func (s *md6Stream) pushSubtree(level int, root []byte) {
+	s.grow(level)
+	for l := 0; l < level; l++ {
+		s.counts[l] += 1 << uint(level-l)
 	}
+	s.pushNode(level, root)
+}
 
-	return hashes[0]
+// Узел уровня level над всеми добавленными листьями. Узлы без пары
+// сжимаются отдельно и поднимаются выше, как в sum и buildTree, но свёртка
+// останавливается на уровне level, даже если узел на нём единственный.
+func (s *md6Stream) frontierNode(level int) []byte {
+	var carry [2 * md6NodeSize]byte
+	hasCarry := false
+	for l := 0; l < level; l++ {
+		pending := l < len(s.pairs) && s.pending[l]
+		switch {
+		case pending && hasCarry:
+			pair := &s.pairs[l]
+			copy(pair[md6NodeSize:], carry[:md6NodeSize])
+			s.ctx.compressInto(carry[:md6NodeSize], pair[:], s.A)
+		case pending:
+			s.ctx.compressInto(carry[:md6NodeSize], s.pairs[l][:md6NodeSize], s.A)
+			hasCarry = true
+		case hasCarry:
+			s.ctx.compressInto(carry[:md6NodeSize], carry[:md6NodeSize], s.A)
+		}
+	}
+	if level < len(s.pairs) && s.pending[level] {
+		return append([]byte(nil), s.pairs[level][:md6NodeSize]...)
+	}
+	return append([]byte(nil), carry[:md6NodeSize]...)
+}
+
+// Параллельное сжатие подряд идущих полных блоков
+func (s *md6Stream) pushBlocks(data []byte) {
+	count := len(data) / MD6BlockSize
+	statsAdd(&stats.blocks, count)
+	if s.sequential {
+		// Свёртка здесь чередуется со сжатием и учитывается вместе с ним
+		defer statsSince(&stats.leafNs, statsStart())
+		for i := 0; i < count; i++ {
+			s.ctx.compressInto(s.node[:], data[i*MD6BlockSize:(i+1)*MD6BlockSize], s.A)
+			s.pushNode(0, s.node[:])
+		}
+		return
+	}
+
+	// Блоки обрабатываются партиями, чтобы память под хеши листьев
+	// не зависела от размера data (например, отображённого файла)
+	for len(data) > 0 {
+		batch := min(count, md6LeafBatch)
+		if cap(s.leaves) < batch*md6NodeSize {
+			s.leaves = make([]byte, batch*md6NodeSize)
+		}
+		leaves := s.leaves[:batch*md6NodeSize]
+
+		start := statsStart()
+		forEachRange(batch, func(lo, hi int) {
+			s.ctx.compressRange(lo, hi, func(i int, A []uint64) {
+				s.ctx.compressInto(leaves[i*md6NodeSize:(i+1)*md6NodeSize], data[i*MD6BlockSize:(i+1)*MD6BlockSize], A)
+			})
+		})
+		statsSince(&stats.leafNs, start)
+
+		// Листья партии сворачиваются выровненными поддеревьями наибольшего
+		// размера, каждое параллельно через reduceInto; по одному
+		// добавляются только листья невыровненных начала и конца
+		start = statsStart()
+		if cap(s.nodes) < (batch+1)/2*md6NodeSize {
+			s.nodes = make([]byte, (batch+1)/2*md6NodeSize)
+		}
+		for i := 0; i < batch; {
+			var added uint64
+			if len(s.counts) > 0 {
+				added = s.counts[0]
+			}
+			level := bits.Len(uint(batch-i)) - 1
+			if added != 0 {
+				level = min(level, bits.TrailingZeros64(added))
+			}
+			size := 1 << uint(level)
+			subtree := leaves[i*md6NodeSize : (i+size)*md6NodeSize]
+			if size == 1 {
+				s.pushNode(0, subtree)
+			} else {
+				root, _ := s.ctx.reduceInto(subtree, s.nodes, size)
+				s.pushSubtree(level, root)
+			}
+			i += size
+		}
+		statsSince(&stats.treeNs, start)
+		data = data[batch*MD6BlockSize:]
+		count -= batch
+	}
+}
+
+func (s *md6Stream) write(data []byte) {
+	s.length += uint64(len(data))
+
+	// Сначала дополняем хвост, оставшийся с прошлого вызова
+	if len(s.tail) > 0 {
+		n := copy(s.tail[len(s.tail):MD6BlockSize], data)
+		s.tail = s.tail[:len(s.tail)+n]
+		data = data[n:]
+		if len(s.tail) < MD6BlockSize {
+			return
+		}
+		start := statsStart()
+		s.ctx.compressInto(s.node[:], s.tail, s.A)
+		s.pushNode(0, s.node[:])
+		statsSince(&stats.leafNs, start)
+		statsAdd(&stats.blocks, 1)
+		s.tail = s.tail[:0]
+	}
+
+	// Полные блоки сжимаются прямо из входного буфера, без копирования.
+	// Блок никогда не бывает последним: паддинг всегда добавляет данные.
+	full := len(data) - len(data)%MD6BlockSize
+	if full > 0 {
+		s.pushBlocks(data[:full])
+	}
+	s.tail = append(s.tail, data[full:]...)
+}
+
+// Завершение хеширования: паддинг хвоста и свёртка фронта дерева.
+// Узел без пары сжимается отдельно и переходит на уровень выше,
+// пока на уровне не останется единственный узел — корень.
+func (s *md6Stream) sum() []byte {
+	defer statsSince(&stats.treeNs, statsStart())
+	last := append(s.tail, md6Padding(s.length, MD6BlockSize)...)
+	statsAdd(&stats.blocks, len(last)/MD6BlockSize)
+	for len(last) > 0 {
+		s.ctx.compressInto(s.node[:], last[:MD6BlockSize], s.A)
+		s.pushNode(0, s.node[:])
+		last = last[MD6BlockSize:]
+	}
+
+	// carry — узел, переходящий на текущий уровень с предыдущего
+	var carry [2 * md6NodeSize]byte
+	hasCarry := false
+	for level := 0; ; level++ {
+		pending := level < len(s.pairs) && s.pending[level]
+		var total uint64
+		if level < len(s.counts) {
+			total = s.counts[level]
+		}
+		if hasCarry {
+			total++
+		}
+		if total == 1 {
+			statsAdd(&stats.levels, level+1)
+			if pending {
+				return append([]byte(nil), s.pairs[level][:md6NodeSize]...)
+			}
+			return append([]byte(nil), carry[:md6NodeSize]...)
+		}
+
+		if pending || hasCarry {
+			statsAdd(&stats.nodes, 1)
+		}
+		switch {
+		case pending && hasCarry:
+			pair := &s.pairs[level]
+			copy(pair[md6NodeSize:], carry[:md6NodeSize])
+			s.ctx.compressInto(carry[:md6NodeSize], pair[:], s.A)
+		case pending:
+			s.ctx.compressInto(carry[:md6NodeSize], s.pairs[level][:md6NodeSize], s.A)
+			hasCarry = true
+		case hasCarry:
+			s.ctx.compressInto(carry[:md6NodeSize], carry[:md6NodeSize], s.A)
+		}
+	}
 }
 
 // MD6 для данных из файла
 //
 //export MD6FromFile
 func MD6FromFile(filePath *C.char, key *C.char, outputLength C.int) *C.char {
+	defer statsCall(statsStart())
 	goFilePath := C.GoString(filePath)
 	goKey := C.GoString(key)
-	rounds := 40 + int(math.Floor(float64(32*16)/4))
+	start := statsStart()
 	data, err := ioutil.ReadFile(goFilePath)
 	if err != nil {
 		fmt.Println("Ошибка чтения файла:", err)
 		return nil
 	}
+	statsSince(&stats.ioNs, start)
+	statsAdd(&stats.bytesRead, len(data))
 
 	blocks := splitIntoBlocks(data, MD6BlockSize)
 
-	finalHash := buildTree(blocks, goKey, rounds)
+	finalHash := buildTree(blocks, goKey, md6Rounds)
 
 	if int(outputLength) > len(finalHash) {
 		outputLength = C.int(len(finalHash))
 	}
+	start = statsStart()
 	hash := hex.EncodeToString(finalHash[:outputLength])
+	statsSince(&stats.hexNs, start)
 	return C.CString(hash)
 }
 
 //export MD6FromInput
 func MD6FromInput(inputData *C.char, key *C.char, outputLength C.int) *C.char {
+	defer statsCall(statsStart())
 	goInputData := C.GoString(inputData)
 	goKey := C.GoString(key)
-	rounds := 40 + int(math.Floor(float64(32*16)/4))
 	data := []byte(goInputData)
 	blocks := splitIntoBlocks(data, MD6BlockSize)
 
-	finalHash := buildTree(blocks, goKey, rounds)
+	finalHash := buildTree(blocks, goKey, md6Rounds)
+
+	if int(outputLength) > len(finalHash) {
+		outputLength = C.int(len(finalHash))
+	}
+	start := statsStart()
+	hash := hex.EncodeToString(finalHash[:outputLength])
+	statsSince(&stats.hexNs, start)
+	return C.CString(hash)
+}
+
+// Потоковое хеширование: MD6StreamInit -> MD6StreamUpdate... -> MD6StreamFinal.
+// Возвращает дескриптор состояния, который освобождается в MD6StreamFinal
+// или MD6StreamFree.
+//
+//export MD6StreamInit
+func MD6StreamInit(key *C.char) C.uintptr_t {
+	goKey := C.GoString(key)
+	return C.uintptr_t(cgo.NewHandle(newMD6Stream(goKey, md6Rounds)))
+}
+
+//export MD6StreamUpdate
+func MD6StreamUpdate(handle C.uintptr_t, data *C.uint8_t, length C.size_t) {
+	defer statsCall(statsStart())
+	s := cgo.Handle(handle).Value().(*md6Stream)
+	// Буфер вызывающей стороны читается напрямую и не сохраняется после возврата
+	s.write(cBytes(data, length))
+}
+
+//export MD6StreamFinal
+func MD6StreamFinal(handle C.uintptr_t, outputLength C.int) *C.char {
+	defer statsCall(statsStart())
+	h := cgo.Handle(handle)
+	s := h.Value().(*md6Stream)
+	h.Delete()
+
+	finalHash := s.sum()
 
 	if int(outputLength) > len(finalHash) {
 		outputLength = C.int(len(finalHash))
 	}
+	start := statsStart()
 	hash := hex.EncodeToString(finalHash[:outputLength])
+	statsSince(&stats.hexNs, start)
 	return C.CString(hash)
 }
 
+// Количество байт, уже переданных в потоковый хешер (для индикатора прогресса)
+//
+//export MD6StreamProcessed
+func MD6StreamProcessed(handle C.uintptr_t) C.ulonglong {
+	s := cgo.Handle(handle).Value().(*md6Stream)
+	return C.ulonglong(s.length)
+}
+
+// Освобождение состояния без вычисления хеша (например, при отмене)
+//
+//export MD6StreamFree
+func MD6StreamFree(handle C.uintptr_t) {
+	cgo.Handle(handle).Delete()
+}
+
+// Выбор режима параллельности (см. parallelism); действует на все
+// последующие вычисления хеша в процессе
+//
+//export MD6SetParallelism
+func MD6SetParallelism(workers C.int) {
+	atomic.StoreInt32(&parallelism, int32(workers))
+}
+
+// Освобождение строки, возвращённой MD6FromFile, MD6FromInput или MD6StreamFinal
+//
+//export MD6FreeString
+func MD6FreeString(str *C.char) {
+	C.free(unsafe.Pointer(str))
+}
+
+// Срез поверх памяти вызывающей стороны, без копирования.
+// Срез нельзя сохранять после возврата из экспортируемой функции.
+func cBytes(data *C.uint8_t, length C.size_t) []byte {
+	if data == nil || length == 0 {
+		return nil
+	}
+	return unsafe.Slice((*byte)(unsafe.Pointer(data)), int(length))
+}
+
+// Запись сырого хеша в буфер вызывающей стороны; возвращает число записанных байт
+func writeDigest(out *C.uint8_t, outLength C.size_t, finalHash []byte) C.int {
+	return C.int(copy(cBytes(out, outLength), finalHash))
+}
+
+// MD6 для произвольных двоичных данных (в том числе с нулевыми байтами).
+// Ключ передаётся как (указатель, длина), сырой хеш записывается в out;
+// возвращается число записанных байт.
+//
+//export MD6HashBuffer
+func MD6HashBuffer(data *C.uint8_t, length C.size_t, key *C.uint8_t, keyLength C.size_t, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	s := newMD6Stream(string(cBytes(key, keyLength)), md6Rounds)
+	s.write(cBytes(data, length))
+	return writeDigest(out, outLength, s.sum())
+}
+
+// MD6 для файла, читаемого по частям; сырой хеш записывается в out.
+// Возвращает число записанных байт или -1 при ошибке чтения.
+//
+//export MD6HashFile
+func MD6HashFile(filePath *C.char, key *C.uint8_t, keyLength C.size_t, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	s := newMD6Stream(string(cBytes(key, keyLength)), md6Rounds)
+	if !readFileInto(s, C.GoString(filePath)) {
+		return -1
+	}
+	return writeDigest(out, outLength, s.sum())
+}
+
+// Чтение файла по частям в потоковый хешер; false при ошибке
+func readFileInto(s *md6Stream, filePath string) bool {
+	file, err := os.Open(filePath)
+	if err != nil {
+		fmt.Println("Ошибка чтения файла:", err)
+		return false
+	}
+	defer file.Close()
+
+	chunk := make([]byte, 1<<20)
+	for {
+		start := statsStart()
+		n, err := file.Read(chunk)
+		statsSince(&stats.ioNs, start)
+		statsAdd(&stats.bytesRead, n)
+		s.write(chunk[:n])
+		if err == io.EOF {
+			break
+		}
+		if err != nil {
+			fmt.Println("Ошибка чтения файла:", err)
+			return false
+		}
+	}
+	return true
+}
+
+// Пакетное хеширование: сообщение i — это data[offsets[i]:offsets[i+1]].
+// Сообщения распределяются между воркерами непрерывными диапазонами, каждый
+// воркер хеширует свои сообщения последовательно одним потоковым состоянием.
+// Хеш сообщения i (digestSize байт) записывается в out[i*digestSize:].
+func hashBatch(ctx *md6Context, data []byte, offsets []uint64, out []byte, digestSize int) {
+	forEachRange(len(offsets)-1, func(lo, hi int) {
+		s := newMD6StreamContext(ctx)
+		s.sequential = true
+		for i := lo; i < hi; i++ {
+			s.reset()
+			s.write(data[offsets[i]:offsets[i+1]])
+			copy(out[i*digestSize:(i+1)*digestSize], s.sum())
+		}
+	})
+}
+
+// MD6 для count сообщений, упакованных в один буфер, за один вызов.
+// offsets содержит count+1 неубывающих смещений в data (uint64, как в NumPy),
+// out — count*digestSize байт для сырых хешей. Возвращает 0 или -1, если
+// смещения или размер хеша некорректны.
+//
+//export MD6HashBatch
+func MD6HashBatch(data *C.uint8_t, length C.size_t, offsets *C.uint64_t, count C.size_t, key *C.uint8_t, keyLength C.size_t, out *C.uint8_t, digestSize C.size_t) C.int {
+	defer statsCall(statsStart())
+	ctx := newMD6Context(string(cBytes(key, keyLength)), md6Rounds)
+	return hashBatchChecked(ctx, data, length, offsets, count, out, digestSize)
+}
+
+// Проверка аргументов MD6HashBatch и пакетное хеширование с готовым контекстом
+func hashBatchChecked(ctx *md6Context, data *C.uint8_t, length C.size_t, offsets *C.uint64_t, count C.size_t, out *C.uint8_t, digestSize C.size_t) C.int {
+	if count == 0 {
+		return 0
+	}
+	if digestSize == 0 || digestSize > md6NodeSize {
+		return -1
+	}
+	goOffsets := unsafe.Slice((*uint64)(unsafe.Pointer(offsets)), int(count)+1)
+	for i := 0; i < int(count); i++ {
+		if goOffsets[i] > goOffsets[i+1] || goOffsets[i+1] > uint64(length) {
+			return -1
+		}
+	}
+
+	hashBatch(ctx, cBytes(data, length), goOffsets, cBytes(out, count*digestSize), int(digestSize))
+	return 0
+}
+
+// MD6 для файла, отображённого в память только для чтения. Полные блоки
+// сжимаются прямо из отображения, без копирования в кучу; отдельно
+// собирается только последний блок с паддингом. Файл не должен
+// укорачиваться во время хеширования. Возвращает число записанных байт
+// или -1 при ошибке.
+//
+//export MD6HashFileMmap
+func MD6HashFileMmap(filePath *C.char, key *C.uint8_t, keyLength C.size_t, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	s := newMD6Stream(string(cBytes(key, keyLength)), md6Rounds)
+	if !mmapFileInto(s, C.GoString(filePath)) {
+		return -1
+	}
+	return writeDigest(out, outLength, s.sum())
+}
+
+// Хеширование файла через отображение в память; false при ошибке
+func mmapFileInto(s *md6Stream, filePath string) bool {
+	file, err := os.Open(filePath)
+	if err != nil {
+		fmt.Println("Ошибка чтения файла:", err)
+		return false
+	}
+	defer file.Close()
+
+	info, err := file.Stat()
+	if err != nil {
+		fmt.Println("Ошибка чтения файла:", err)
+		return false
+	}
+
+	if info.Size() > 0 {
+		data, err := syscall.Mmap(int(file.Fd()), 0, int(info.Size()), syscall.PROT_READ, syscall.MAP_SHARED)
+		if err != nil {
+			fmt.Println("Ошибка отображения файла:", err)
+			return false
+		}
+		defer syscall.Munmap(data)
+		syscall.Madvise(data, syscall.MADV_SEQUENTIAL)
+		// Страницы читаются при обращении, поэтому чтение входит во время сжатия
+		statsAdd(&stats.bytesRead, len(data))
+		s.write(data)
+	}
+	return true
+}
+
+// Завершение потокового хеширования с записью сырого хеша в out
+//
+//export MD6StreamFinalBuffer
+func MD6StreamFinalBuffer(handle C.uintptr_t, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	h := cgo.Handle(handle)
+	s := h.Value().(*md6Stream)
+	h.Delete()
+	return writeDigest(out, outLength, s.sum())
+}
+
+// Ключ, подготовленный один раз для многих вычислений хеша. Слова ключа и
+// префикс массива A хранятся в ctx, потоковые состояния переиспользуются
+// между вызовами, поэтому хеширование короткого сообщения не разбирает
+// ключ и не выделяет память заново.
+type md6Keyed struct {
+	ctx     *md6Context
+	streams sync.Pool // *md6Stream с контекстом ctx
+}
+
+func (k *md6Keyed) getStream() *md6Stream {
+	if s, ok := k.streams.Get().(*md6Stream); ok {
+		s.reset()
+		return s
+	}
+	return newMD6StreamContext(k.ctx)
+}
+
+// Дескриптор подготовленного ключа для функций MD6Key*; освобождается
+// в MD6KeyFree
+//
+//export MD6KeyInit
+func MD6KeyInit(key *C.uint8_t, keyLength C.size_t) C.uintptr_t {
+	ctx := newMD6Context(string(cBytes(key, keyLength)), md6Rounds)
+	return C.uintptr_t(cgo.NewHandle(&md6Keyed{ctx: ctx}))
+}
+
+//export MD6KeyFree
+func MD6KeyFree(handle C.uintptr_t) {
+	cgo.Handle(handle).Delete()
+}
+
+// MD6HashBuffer с подготовленным ключом
+//
+//export MD6KeyHashBuffer
+func MD6KeyHashBuffer(handle C.uintptr_t, data *C.uint8_t, length C.size_t, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	k := cgo.Handle(handle).Value().(*md6Keyed)
+	s := k.getStream()
+	s.write(cBytes(data, length))
+	written := writeDigest(out, outLength, s.sum())
+	k.streams.Put(s)
+	return written
+}
+
+// MD6HashFile (useMmap == 0) или MD6HashFileMmap с подготовленным ключом
+//
+//export MD6KeyHashFile
+func MD6KeyHashFile(handle C.uintptr_t, filePath *C.char, useMmap C.int, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	k := cgo.Handle(handle).Value().(*md6Keyed)
+	s := k.getStream()
+	defer k.streams.Put(s)
+	readInto := readFileInto
+	if useMmap != 0 {
+		readInto = mmapFileInto
+	}
+	if !readInto(s, C.GoString(filePath)) {
+		return -1
+	}
+	return writeDigest(out, outLength, s.sum())
+}
+
+// MD6HashBatch с подготовленным ключом
+//
+//export MD6KeyHashBatch
+func MD6KeyHashBatch(handle C.uintptr_t, data *C.uint8_t, length C.size_t, offsets *C.uint64_t, count C.size_t, out *C.uint8_t, digestSize C.size_t) C.int {
+	defer statsCall(statsStart())
+	k := cgo.Handle(handle).Value().(*md6Keyed)
+	return hashBatchChecked(k.ctx, data, length, offsets, count, out, digestSize)
+}
+
+// MD6StreamInit с подготовленным ключом; поток не зависит от дескриптора
+// ключа и может пережить MD6KeyFree
+//
+//export MD6KeyStreamInit
+func MD6KeyStreamInit(handle C.uintptr_t) C.uintptr_t {
+	k := cgo.Handle(handle).Value().(*md6Keyed)
+	return C.uintptr_t(cgo.NewHandle(newMD6StreamContext(k.ctx)))
+}
+
+// Дерево хеша файла (sidecar) для инкрементального пересчёта. После
+// заголовка подряд лежат узлы всех уровней buildTree, от листьев к корню,
+// по md6NodeSize байт; число узлов на уровнях определяется длиной файла.
+// Заголовок: magic, флаги, длина файла, число раундов, соль и отпечаток ключа.
+const (
+	md6TreeMagic      = "MD6TREE\x01"
+	md6TreeHeaderSize = 96
+	md6TreeSaltSize   = 32
+	md6TreeIncomplete = 1 // Флаг: обновление на месте было прервано
+)
+
+// Дерево не подходит к файлу: другой ключ, повреждённый или недописанный файл
+var errTreeMismatch = errors.New("MD6 tree does not match the key or is damaged")
+
+// Диапазон номеров узлов [lo, hi) на одном уровне дерева
+type nodeRange struct{ lo, hi int }
+
+type md6Tree struct {
+	file        *os.File
+	flags       uint64
+	length      uint64 // Длина файла, по которому построено дерево
+	rounds      uint64
+	salt        [md6TreeSaltSize]byte
+	fingerprint [32]byte
+	counts      []int   // Число узлов на каждом уровне
+	offsets     []int64 // Смещение каждого уровня в файле дерева
+}
+
+// Отпечаток ключа и числа раундов: сам ключ в дереве не хранится. HMAC
+// со случайной солью дерева не даёт заранее вычислить отпечатки словаря
+// ключей или связать деревья с одним ключом.
+func treeFingerprint(salt []byte, key string, rounds int) [32]byte {
+	mac := hmac.New(sha256.New, salt)
+	fmt.Fprintf(mac, "md6-tree\x00%d\x00%s", rounds, key)
+	var fingerprint [32]byte
+	copy(fingerprint[:], mac.Sum(nil))
+	return fingerprint
+}
+
+// Новое дерево со случайной солью для ключа key
+func newTree(key string, rounds int) (*md6Tree, error) {
+	tree := &md6Tree{rounds: uint64(rounds)}
+	if _, err := rand.Read(tree.salt[:]); err != nil {
+		return nil, err
+	}
+	tree.fingerprint = treeFingerprint(tree.salt[:], key, rounds)
+	return tree, nil
+}
+
+// Разметка уровней дерева для сообщения длины length
+func (tree *md6Tree) layout(length uint64) {
+	tree.length = length
+	count := int((length + uint64(md6PaddingSize(length, MD6BlockSize))) / MD6BlockSize)
+	tree.counts = []int{count}
+	for count > 1 {
+		count = (count + 1) / 2
+		tree.counts = append(tree.counts, count)
+	}
+	tree.offsets = make([]int64, len(tree.counts))
+	offset := int64(md6TreeHeaderSize)
+	for level, count := range tree.counts {
+		tree.offsets[level] = offset
+		offset += int64(count) * md6NodeSize
+	}
+}
+
+func (tree *md6Tree) size() int64 {
+	last := len(tree.counts) - 1
+	return tree.offsets[last] + int64(tree.counts[last])*md6NodeSize
+}
+
+func (tree *md6Tree) writeHeader() error {
+	header := make([]byte, md6TreeHeaderSize)
+	copy(header, md6TreeMagic)
+	binary.LittleEndian.PutUint64(header[8:], tree.flags)
+	binary.LittleEndian.PutUint64(header[16:], tree.length)
+	binary.LittleEndian.PutUint64(header[24:], tree.rounds)
+	copy(header[32:], tree.salt[:])
+	copy(header[64:], tree.fingerprint[:])
+	_, err := tree.file.WriteAt(header, 0)
+	return err
+}
+
+// Открытие сохранённого дерева с проверкой заголовка, отпечатка и размера
+func openTree(path string, key string, rounds int) (*md6Tree, error) {
+	file, err := os.OpenFile(path, os.O_RDWR, 0)
+	if err != nil {
+		return nil, err
+	}
+	header := make([]byte, md6TreeHeaderSize)
+	if _, err := file.ReadAt(header, 0); err != nil {
+		file.Close()
+		if err == io.EOF {
+			return nil, errTreeMismatch
+		}
+		return nil, err
+	}
+
+	tree := &md6Tree{
+		file:   file,
+		flags:  binary.LittleEndian.Uint64(header[8:]),
+		rounds: binary.LittleEndian.Uint64(header[24:]),
+	}
+	copy(tree.salt[:], header[32:])
+	copy(tree.fingerprint[:], header[64:])
+	fingerprint := treeFingerprint(tree.salt[:], key, rounds)
+	tree.layout(binary.LittleEndian.Uint64(header[16:]))
+
+	info, err := file.Stat()
+	if err != nil {
+		file.Close()
+		return nil, err
+	}
+	if string(header[:8]) != md6TreeMagic || tree.flags&md6TreeIncomplete != 0 ||
+		tree.rounds != uint64(rounds) ||
+		!hmac.Equal(tree.fingerprint[:], fingerprint[:]) ||
+		info.Size() != tree.size() {
+		file.Close()
+		return nil, errTreeMismatch
+	}
+	return tree, nil
+}
+
+// Объединение пересекающихся и соседних диапазонов в отсортированный список
+func mergeRanges(ranges []nodeRange) []nodeRange {
+	sort.Slice(ranges, func(i, j int) bool { return ranges[i].lo < ranges[j].lo })
+	merged := ranges[:0]
+	for _, r := range ranges {
+		if r.lo >= r.hi {
+			continue
+		}
+		if n := len(merged); n > 0 && r.lo <= merged[n-1].hi {
+			merged[n-1].hi = max(merged[n-1].hi, r.hi)
+			continue
+		}
+		merged = append(merged, r)
+	}
+	return merged
+}
+
+// Сжатие входов src[i*stride:(i+1)*stride] в узлы dst; последний вход
+// может быть короче (узел без пары, как в buildTree)
+func (ctx *md6Context) compressStrided(dst, src []byte, stride int) {
+	count := (len(src) + stride - 1) / stride
+	forEachRange(count, func(lo, hi int) {
+		ctx.compressRange(lo, hi, func(i int, A []uint64) {
+			ctx.compressInto(dst[i*md6NodeSize:(i+1)*md6NodeSize], src[i*stride:min((i+1)*stride, len(src))], A)
+		})
+	})
+}
+
+// Блоки [lo, hi) дополненного сообщения в buf: данные файла, а в
+// последних блоках — паддинг
+func readLeafBlocks(file *os.File, length uint64, padding []byte, lo, hi int, buf []byte) error {
+	start, end := uint64(lo)*MD6BlockSize, uint64(hi)*MD6BlockSize
+	n := uint64(0)
+	if start < length {
+		n = min(length, end) - start
+		started := statsStart()
+		if _, err := file.ReadAt(buf[:n], int64(start)); err != nil {
+			return err
+		}
+		statsSince(&stats.ioNs, started)
+		statsAdd(&stats.bytesRead, int(n))
+	}
+	if n < end-start {
+		copy(buf[n:end-start], padding[start+n-length:])
+	}
+	return nil
+}
+
+// Пересчёт узлов уровня level в диапазонах dirty: листья сжимаются из
+// файла, внутренние узлы — из пар узлов предыдущего уровня tree
+func (tree *md6Tree) computeLevel(ctx *md6Context, file *os.File, padding []byte, level int, dirty []nodeRange) error {
+	if len(dirty) == 0 {
+		return nil
+	}
+	stride := 2 * md6NodeSize
+	if level == 0 {
+		stride = MD6BlockSize
+	}
+	src := make([]byte, md6LeafBatch*stride)
+	dst := make([]byte, md6LeafBatch*md6NodeSize)
+
+	for _, r := range dirty {
+		for lo := r.lo; lo < r.hi; lo += md6LeafBatch {
+			hi := min(lo+md6LeafBatch, r.hi)
+			var in []byte
+			if level == 0 {
+				in = src[:(hi-lo)*stride]
+				if err := readLeafBlocks(file, tree.length, padding, lo, hi, in); err != nil {
+					return err
+				}
+			} else {
+				children := min(2*hi, tree.counts[level-1]) - 2*lo
+				in = src[:children*md6NodeSize]
+				if _, err := tree.file.ReadAt(in, tree.offsets[level-1]+int64(2*lo)*md6NodeSize); err != nil {
+					return err
+				}
+			}
+			out := dst[:(hi-lo)*md6NodeSize]
+			start := statsStart()
+			ctx.compressStrided(out, in, stride)
+			if level == 0 {
+				statsSince(&stats.leafNs, start)
+				statsAdd(&stats.blocks, hi-lo)
+			} else {
+				statsSince(&stats.treeNs, start)
+				statsAdd(&stats.nodes, hi-lo)
+			}
+			if _, err := tree.file.WriteAt(out, tree.offsets[level]+int64(lo)*md6NodeSize); err != nil {
+				return err
+			}
+		}
+	}
+	return nil
+}
+
+// Копирование узлов уровня вне dirty из старого дерева в новое
+func copyCleanNodes(old, tree *md6Tree, level int, dirty []nodeRange) error {
+	copyRange := func(lo, hi int) error {
+		if lo >= hi {
+			return nil
+		}
+		size := int64(hi-lo) * md6NodeSize
+		src := io.NewSectionReader(old.file, old.offsets[level]+int64(lo)*md6NodeSize, size)
+		dst := io.NewOffsetWriter(tree.file, tree.offsets[level]+int64(lo)*md6NodeSize)
+		_, err := io.Copy(dst, src)
+		return err
+	}
+
+	end := min(old.counts[level], tree.counts[level])
+	lo := 0
+	for _, r := range dirty {
+		if err := copyRange(lo, min(r.lo, end)); err != nil {
+			return err
+		}
+		lo = max(lo, r.hi)
+	}
+	return copyRange(lo, end)
+}
+
+// Построение дерева для file в tree. Если есть старое дерево old, заново
+// сжимаются только листья из changed (пары смещение, длина в новом
+// содержимом), хвост начиная с меньшей из длин и пути от них к корню;
+// остальные узлы копируются из old или остаются на месте, если у old и
+// tree общий файл.
+// Возвращает корень — тот же хеш, что даёт buildTree.
+func updateTree(ctx *md6Context, file *os.File, old, tree *md6Tree, changed []uint64) ([]byte, error) {
+	leaves := tree.counts[0]
+	var dirty []nodeRange
+	if old == nil {
+		dirty = []nodeRange{{0, leaves}}
+	} else {
+		for i := 0; i+1 < len(changed); i += 2 {
+			offset, n := changed[i], changed[i+1]
+			if n == 0 || offset >= tree.length {
+				continue
+			}
+			end := min(offset+n, tree.length)
+			lo := int(offset / MD6BlockSize)
+			hi := int((end + MD6BlockSize - 1) / MD6BlockSize)
+			dirty = append(dirty, nodeRange{lo, min(hi, leaves)})
+		}
+		// Длина входит в паддинг, поэтому при её изменении меняется весь хвост
+		if old.length != tree.length {
+			lo := int(min(old.length, tree.length) / MD6BlockSize)
+			dirty = append(dirty, nodeRange{lo, max(old.counts[0], leaves)})
+		}
+	}
+	padding := md6Padding(tree.length, MD6BlockSize)
+
+	for level, count := range tree.counts {
+		if old != nil && level >= len(old.counts) {
+			dirty = []nodeRange{{0, count}}
+		}
+		dirty = mergeRanges(dirty)
+
+		// Узлы за концом уровня нужны только для распространения вверх
+		var compute []nodeRange
+		for _, r := range dirty {
+			if r.lo < count {
+				compute = append(compute, nodeRange{r.lo, min(r.hi, count)})
+			}
+		}
+		if old != nil && old.file != tree.file && level < len(old.counts) {
+			if err := copyCleanNodes(old, tree, level, compute); err != nil {
+				return nil, err
+			}
+		}
+		if err := tree.computeLevel(ctx, file, padding, level, compute); err != nil {
+			return nil, err
+		}
+
+		// Родитель зависит от двух детей; набор детей меняется вместе с длиной уровня
+		parents := make([]nodeRange, len(dirty))
+		for i, r := range dirty {
+			parents[i] = nodeRange{r.lo / 2, (r.hi + 1) / 2}
+		}
+		dirty = parents
+	}
+
+	statsAdd(&stats.levels, len(tree.counts))
+	root := make([]byte, md6NodeSize)
+	_, err := tree.file.ReadAt(root, tree.offsets[len(tree.offsets)-1])
+	return root, err
+}
+
+// Хеш файла с построением (update == false) или обновлением дерева в treePath.
+// Дерево с тем же числом листьев обновляется на месте, на время записи
+// в заголовке стоит флаг md6TreeIncomplete; иначе новое дерево пишется во
+// временный файл, который затем заменяет старый. Если дерева нет или оно
+// не подходит к ключу, файл хешируется полностью и дерево строится заново.
+// Возвращает корень и код ошибки: -1 — ошибка ввода-вывода.
+func hashFileTree(filePath, treePath, key string, changed []uint64, update bool) ([]byte, C.int) {
+	ctx := newMD6Context(key, md6Rounds)
+
+	file, err := os.Open(filePath)
+	if err != nil {
+		fmt.Println("Ошибка чтения файла:", err)
+		return nil, -1
+	}
+	defer file.Close()
+	info, err := file.Stat()
+	if err != nil {
+		fmt.Println("Ошибка чтения файла:", err)
+		return nil, -1
+	}
+
+	// Соль новая при каждой записи дерева, в том числе при обновлении на месте
+	tree, err := newTree(key, md6Rounds)
+	if err != nil {
+		fmt.Println("Ошибка записи дерева:", err)
+		return nil, -1
+	}
+	tree.layout(uint64(info.Size()))
+
+	var old *md6Tree
+	if update {
+		old, err = openTree(treePath, key, md6Rounds)
+		switch {
+		case err == nil:
+			defer old.file.Close()
+		case errors.Is(err, errTreeMismatch) || errors.Is(err, os.ErrNotExist):
+			// Полный пересчёт: changed не нужен, все листья сжимаются заново
+			old = nil
+		default:
+			fmt.Println("Ошибка чтения дерева:", err)
+			return nil, -1
+		}
+	}
+
+	tmpPath := treePath + ".tmp"
+	inPlace := old != nil && old.counts[0] == tree.counts[0]
+	if inPlace {
+		tree.file = old.file
+		tree.flags = md6TreeIncomplete
+		err = tree.writeHeader()
+	} else {
+		tree.file, err = os.OpenFile(tmpPath, os.O_RDWR|os.O_CREATE|os.O_TRUNC, 0o644)
+		if err == nil {
+			defer tree.file.Close()
+			defer os.Remove(tmpPath) // Не удастся после переименования
+			err = tree.file.Truncate(tree.size())
+		}
+	}
+
+	var root []byte
+	if err == nil {
+		root, err = updateTree(ctx, file, old, tree, changed)
+	}
+	if err == nil {
+		tree.flags = 0
+		err = tree.writeHeader()
+	}
+	if err == nil && !inPlace {
+		err = os.Rename(tmpPath, treePath)
+	}
+	if err != nil {
+		fmt.Println("Ошибка записи дерева:", err)
+		return nil, -1
+	}
+	return root, 0
+}
+
+// MD6 для файла с сохранением дерева узлов в treePath для последующих
+// вызовов MD6TreeUpdateFile. Сырой хеш записывается в out; возвращает
+// число записанных байт или -1 при ошибке ввода-вывода.
+//
+//export MD6TreeHashFile
+func MD6TreeHashFile(filePath *C.char, treePath *C.char, key *C.uint8_t, keyLength C.size_t, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	root, status := hashFileTree(C.GoString(filePath), C.GoString(treePath), string(cBytes(key, keyLength)), nil, false)
+	if status < 0 {
+		return status
+	}
+	return writeDigest(out, outLength, root)
+}
+
+// Пересчёт хеша изменённого файла по дереву из treePath. changed содержит
+// rangeCount пар (смещение, длина) изменённых байт; байты после прежней
+// длины файла учитываются автоматически. Заново сжимаются только
+// затронутые листья и пути от них к корню, дерево обновляется. Дерево,
+// построенное с другим ключом, повреждённое или с прерванным обновлением,
+// строится заново полным хешированием. Возвращает число записанных байт
+// или -1 при ошибке ввода-вывода.
+//
+//export MD6TreeUpdateFile
+func MD6TreeUpdateFile(filePath *C.char, treePath *C.char, key *C.uint8_t, keyLength C.size_t, changed *C.uint64_t, rangeCount C.size_t, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	var goChanged []uint64
+	if rangeCount > 0 {
+		goChanged = unsafe.Slice((*uint64)(unsafe.Pointer(changed)), 2*int(rangeCount))
+	}
+	root, status := hashFileTree(C.GoString(filePath), C.GoString(treePath), string(cBytes(key, keyLength)), goChanged, true)
+	if status < 0 {
+		return status
+	}
+	return writeDigest(out, outLength, root)
+}
+
+// Шардированное хеширование файла длины length: шард — выровненное
+// поддерево из 2^level листьев, начиная с листа first (кратного 2^level).
+// Записывает в out узел уровня level над листьями шарда (md6NodeSize байт);
+// последний шард включает паддинг сообщения, и его узлы без пары
+// поднимаются до уровня level, как в buildTree. Свёртка узлов всех шардов
+// через MD6CombineNodes даёт тот же хеш, что и хеширование файла целиком.
+// Если все листья файла умещаются в один шард, дерево ниже level и
+// записывается его корень. Возвращает число записанных байт или -1 при
+// ошибке.
+//
+//export MD6HashFileShard
+func MD6HashFileShard(filePath *C.char, key *C.uint8_t, keyLength C.size_t, length C.uint64_t, first C.uint64_t, level C.int, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	goLength := uint64(length)
+	leaves := (goLength + uint64(md6PaddingSize(goLength, MD6BlockSize))) / MD6BlockSize
+	if level < 0 || level > 40 || outLength < md6NodeSize || uint64(first)%(1<<uint(level)) != 0 || uint64(first) >= leaves {
+		return -1
+	}
+
+	file, err := os.Open(C.GoString(filePath))
+	if err != nil {
+		fmt.Println("Ошибка чтения файла:", err)
+		return -1
+	}
+	defer file.Close()
+
+	s := newMD6Stream(string(cBytes(key, keyLength)), md6Rounds)
+	padding := md6Padding(goLength, MD6BlockSize)
+	buf := make([]byte, md6LeafBatch*MD6BlockSize)
+	end := min(uint64(first)+1<<uint(level), leaves)
+	for lo := uint64(first); lo < end; lo += md6LeafBatch {
+		hi := min(lo+md6LeafBatch, end)
+		blocks := buf[:(hi-lo)*MD6BlockSize]
+		if err := readLeafBlocks(file, goLength, padding, int(lo), int(hi), blocks); err != nil {
+			fmt.Println("Ошибка чтения файла:", err)
+			return -1
+		}
+		s.pushBlocks(blocks)
+	}
+	// Единственный шард: узлы без пары выше корня не поднимаются
+	return writeDigest(out, outLength, s.frontierNode(min(int(level), bits.Len64(leaves-1))))
+}
+
+// Свёртка count узлов одного уровня (по md6NodeSize байт подряд) в корень
+// по правилу buildTree; сырой хеш записывается в out. Возвращает число
+// записанных байт или -1, если узлов нет.
+//
+//export MD6CombineNodes
+func MD6CombineNodes(nodes *C.uint8_t, count C.size_t, key *C.uint8_t, keyLength C.size_t, out *C.uint8_t, outLength C.size_t) C.int {
+	defer statsCall(statsStart())
+	if count == 0 {
+		return -1
+	}
+	ctx := newMD6Context(string(cBytes(key, keyLength)), md6Rounds)
+	hashes := append([]byte(nil), cBytes(nodes, count*md6NodeSize)...)
+	return writeDigest(out, outLength, ctx.reduceLevels(hashes, int(count)))
+}
+
+// Включение (enabled != 0) или выключение статистики. Включение сбрасывает
+// накопленные значения.
+//
+//export MD6StatsEnable
+func MD6StatsEnable(enabled C.int) {
+	if enabled != 0 {
+		MD6StatsReset()
+		atomic.StoreInt32(&statsEnabled, 1)
+	} else {
+		atomic.StoreInt32(&statsEnabled, 0)
+	}
+}
+
+// Сброс счётчиков, таймеров и базовой точки статистики памяти
+//
+//export MD6StatsReset
+func MD6StatsReset() {
+	for _, counter := range statsCounters() {
+		atomic.StoreInt64(counter, 0)
+	}
+	statsMemLock.Lock()
+	runtime.ReadMemStats(&statsMemBase)
+	statsMemLock.Unlock()
+}
+
+func statsCounters() []*int64 {
+	return []*int64{
+		&stats.calls, &stats.callNs, &stats.ioNs, &stats.leafNs, &stats.treeNs, &stats.hexNs,
+		&stats.bytesRead, &stats.blocks, &stats.nodes, &stats.levels, &stats.goroutines,
+	}
+}
+
+// Запись статистики в out (count значений uint64): счётчики в порядке
+// statsCounters, затем аллокации и выделенные байты с момента сброса,
+// текущий размер кучи и число сборок мусора с момента сброса.
+// Возвращает число записанных значений.
+//
+//export MD6StatsRead
+func MD6StatsRead(out *C.uint64_t, count C.size_t) C.int {
+	var mem runtime.MemStats
+	runtime.ReadMemStats(&mem)
+	statsMemLock.Lock()
+	base := statsMemBase
+	statsMemLock.Unlock()
+
+	var values []uint64
+	for _, counter := range statsCounters() {
+		values = append(values, uint64(atomic.LoadInt64(counter)))
+	}
+	values = append(values,
+		mem.Mallocs-base.Mallocs,
+		mem.TotalAlloc-base.TotalAlloc,
+		mem.HeapAlloc,
+		uint64(mem.NumGC-base.NumGC),
+	)
+	n := copy(unsafe.Slice((*uint64)(unsafe.Pointer(out)), int(count)), values)
+	return C.int(n)
+}
+
+// Файл профиля CPU, записываемого между MD6ProfileStart и MD6ProfileStop
+var cpuProfileFile *os.File
+
+// Профилирование: httpAddress (например, "127.0.0.1:6060") запускает
+// обработчики net/http/pprof, cpuProfile — запись профиля CPU до
+// MD6ProfileStop. Пустая строка пропускает соответствующую часть.
+// Возвращает 0 или -1 при ошибке.
+//
+//export MD6ProfileStart
+func MD6ProfileStart(httpAddress *C.char, cpuProfile *C.char) C.int {
+	if address := C.GoString(httpAddress); address != "" {
+		listener, err := net.Listen("tcp", address)
+		if err != nil {
+			fmt.Println("Ошибка запуска pprof:", err)
+			return -1
+		}
+		go http.Serve(listener, nil)
+	}
+	if path := C.GoString(cpuProfile); path != "" {
+		file, err := os.Create(path)
+		if err != nil {
+			fmt.Println("Ошибка записи профиля:", err)
+			return -1
+		}
+		if err := pprof.StartCPUProfile(file); err != nil {
+			file.Close()
+			fmt.Println("Ошибка записи профиля:", err)
+			return -1
+		}
+		cpuProfileFile = file
+	}
+	return 0
+}
+
+// Остановка профиля CPU и запись профиля кучи в heapProfile (если не пусто).
+// Возвращает 0 или -1 при ошибке.
+//
+//export MD6ProfileStop
+func MD6ProfileStop(heapProfile *C.char) C.int {
+	if cpuProfileFile != nil {
+		pprof.StopCPUProfile()
+		cpuProfileFile.Close()
+		cpuProfileFile = nil
+	}
+	if path := C.GoString(heapProfile); path != "" {
+		file, err := os.Create(path)
+		if err != nil {
+			fmt.Println("Ошибка записи профиля:", err)
+			return -1
+		}
+		defer file.Close()
+		runtime.GC() // Актуальные данные о живых объектах
+		if err := pprof.WriteHeapProfile(file); err != nil {
+			fmt.Println("Ошибка записи профиля:", err)
+			return -1
+		}
+	}
+	return 0
+}
+
 func main() {}
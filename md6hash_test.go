@@ -0,0 +1,319 @@
+package main
+
+import (
+	"bytes"
+	"crypto/sha256"
+	"flag"
+	"fmt"
+	"math"
+	"os"
+	"path/filepath"
+	"slices"
+	"strconv"
+	"strings"
+	"sync/atomic"
+	"testing"
+	"time"
+)
+
+// Тесты и бенчмарки запускаются так:
+//
+//	go test md6hash.go md6hash_test.go
+//	go test -run '^$' -bench . -benchmem md6hash.go md6hash_test.go -args -md6.sizes=64,64K
+
+const benchKey = "benchmark-key"
+
+// Хеш потокового хешера при записи data частями по chunk байт
+func streamDigest(data []byte, key string, chunk int) []byte {
+	s := newMD6Stream(key, md6Rounds)
+	for len(data) > chunk {
+		s.write(data[:chunk])
+		data = data[chunk:]
+	}
+	s.write(data)
+	return s.sum()
+}
+
+func testData(length int) []byte {
+	data := make([]byte, length)
+	for i := range data {
+		data[i] = byte(i*131 + i>>8)
+	}
+	return data
+}
+
+// Фронт потокового хешера должен давать тот же хеш, что и buildTree
+func TestStreamMatchesBuildTree(t *testing.T) {
+	lengths := make([]int, 0, 2049+3)
+	for length := 0; length <= 2048; length++ {
+		lengths = append(lengths, length)
+	}
+	if !testing.Short() {
+		// Границы партий pushBlocks
+		batch := md6LeafBatch * MD6BlockSize
+		lengths = append(lengths, batch-1, batch, batch+1)
+	}
+	data := testData(lengths[len(lengths)-1])
+
+	for _, key := range []string{"", benchKey} {
+		for _, length := range lengths {
+			want := buildTree(splitIntoBlocks(append([]byte(nil), data[:length]...), MD6BlockSize), key, md6Rounds)
+			// Одна запись целиком и запись частями, не кратными блоку
+			chunk := 1000
+			if length > 2048 {
+				chunk = 3 * md6LeafBatch * MD6BlockSize / 4
+			}
+			for _, chunk := range []int{length + 1, chunk} {
+				if got := streamDigest(data[:length], key, chunk); !bytes.Equal(got, want) {
+					t.Fatalf("key %q, length %d, chunk %d: stream %x, buildTree %x", key, length, chunk, got, want)
+				}
+			}
+		}
+	}
+}
+
+// Корень дерева из treePath после построения или обновления должен
+// совпадать с полным хешированием содержимого файла
+func checkTree(t *testing.T, step, filePath, treePath, key string, changed []uint64, update bool) {
+	t.Helper()
+	root, status := hashFileTree(filePath, treePath, key, changed, update)
+	if status != 0 {
+		t.Fatalf("%s: status %d", step, status)
+	}
+	data, err := os.ReadFile(filePath)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if want := streamDigest(data, key, len(data)+1); !bytes.Equal(root, want) {
+		t.Fatalf("%s: tree %x, full hash %x", step, root, want)
+	}
+}
+
+// Инкрементальный пересчёт после правки, дописывания и усечения файла
+func TestTreeUpdateMatchesFullHash(t *testing.T) {
+	for _, key := range []string{"", benchKey} {
+		dir := t.TempDir()
+		filePath := filepath.Join(dir, "data")
+		treePath := filepath.Join(dir, "data.md6tree")
+		data := testData(3*64*MD6BlockSize + 77)
+		if err := os.WriteFile(filePath, data, 0o644); err != nil {
+			t.Fatal(err)
+		}
+		checkTree(t, "build", filePath, treePath, key, nil, false)
+
+		// Правка на месте: число листьев не меняется
+		var changed []uint64
+		for _, offset := range []int{0, 5000, 60000, len(data) - 1} {
+			data[offset] ^= 0xff
+			changed = append(changed, uint64(offset), 1)
+		}
+		copy(data[20000:], "patched across a block boundary")
+		changed = append(changed, 20000, 31)
+		if err := os.WriteFile(filePath, data, 0o644); err != nil {
+			t.Fatal(err)
+		}
+		checkTree(t, "patch", filePath, treePath, key, changed, true)
+
+		steps := []struct {
+			name   string
+			length int
+		}{
+			{"append", len(data) + 5000},
+			{"append within the last block", len(data) + 5003},
+			{"truncate", len(data) - 20000},
+			{"truncate to a lone leaf", 100},
+			{"truncate to empty", 0},
+			{"append after empty", 70000},
+		}
+		// Дописанные байты учитываются сами, поэтому changed не нужен
+		full := append(data, testData(70000)...)
+		for _, step := range steps {
+			if err := os.WriteFile(filePath, full[:step.length], 0o644); err != nil {
+				t.Fatal(err)
+			}
+			checkTree(t, step.name, filePath, treePath, key, nil, true)
+		}
+	}
+}
+
+// Дерево с другим ключом, повреждённое или отсутствующее строится заново
+func TestTreeMismatchRebuilds(t *testing.T) {
+	dir := t.TempDir()
+	filePath := filepath.Join(dir, "data")
+	treePath := filepath.Join(dir, "data.md6tree")
+	data := testData(40*MD6BlockSize + 3)
+	if err := os.WriteFile(filePath, data, 0o644); err != nil {
+		t.Fatal(err)
+	}
+
+	checkTree(t, "build", filePath, treePath, "another-key", nil, false)
+	checkTree(t, "other key", filePath, treePath, benchKey, nil, true)
+	// Пересобранное дерево подходит к новому ключу
+	data[10] ^= 1
+	if err := os.WriteFile(filePath, data, 0o644); err != nil {
+		t.Fatal(err)
+	}
+	checkTree(t, "patch after rebuild", filePath, treePath, benchKey, []uint64{10, 1}, true)
+
+	if err := os.WriteFile(treePath, []byte("damaged"), 0o644); err != nil {
+		t.Fatal(err)
+	}
+	checkTree(t, "damaged", filePath, treePath, benchKey, nil, true)
+
+	if err := os.Remove(treePath); err != nil {
+		t.Fatal(err)
+	}
+	checkTree(t, "missing", filePath, treePath, benchKey, nil, true)
+}
+
+// Отпечаток ключа в дереве солёный: у деревьев одного ключа он разный
+// и не совпадает с несолёным SHA-256
+func TestTreeFingerprintIsSalted(t *testing.T) {
+	dir := t.TempDir()
+	filePath := filepath.Join(dir, "data")
+	if err := os.WriteFile(filePath, testData(1000), 0o644); err != nil {
+		t.Fatal(err)
+	}
+	var headers [2][]byte
+	for i := range headers {
+		treePath := filepath.Join(dir, fmt.Sprintf("data.%d.md6tree", i))
+		checkTree(t, "build", filePath, treePath, benchKey, nil, false)
+		tree, err := os.ReadFile(treePath)
+		if err != nil {
+			t.Fatal(err)
+		}
+		headers[i] = tree[:md6TreeHeaderSize]
+	}
+	if bytes.Equal(headers[0][32:], headers[1][32:]) {
+		t.Fatal("two trees of one key share the salt and fingerprint")
+	}
+	unsalted := sha256.Sum256([]byte(fmt.Sprintf("md6-tree\x00%d\x00%s", md6Rounds, benchKey)))
+	if bytes.Contains(headers[0], unsalted[:]) {
+		t.Fatal("tree header contains the unsalted key fingerprint")
+	}
+}
+
+// Сжатие одного блока на итерацию: compressF разбирает ключ и выделяет
+// память на каждый блок
+func BenchmarkCompressF(b *testing.B) {
+	block := make([]byte, MD6BlockSize)
+	b.SetBytes(MD6BlockSize)
+	b.ReportAllocs()
+	for i := 0; i < b.N; i++ {
+		compressF(block, benchKey, md6Rounds)
+	}
+}
+
+// Сжатие блока с подготовленным контекстом и одним рабочим массивом
+func BenchmarkCompressPrepared(b *testing.B) {
+	block := make([]byte, MD6BlockSize)
+	ctx := newMD6Context(benchKey, md6Rounds)
+	out := make([]byte, md6NodeSize)
+	A := make([]uint64, 89+md6Rounds*16)
+	b.SetBytes(MD6BlockSize)
+	b.ReportAllocs()
+	for i := 0; i < b.N; i++ {
+		ctx.compressInto(out, block, A)
+	}
+}
+
+// Сжатие блоков потоковым хешером, партиями по md6LeafBatch блоков
+func BenchmarkCompressStream(b *testing.B) {
+	data := make([]byte, md6LeafBatch*MD6BlockSize)
+	s := newMD6Stream(benchKey, md6Rounds)
+	s.write(data) // Прогрев: буферы потока выделяются при первой записи
+	b.SetBytes(int64(len(data)))
+	b.ReportAllocs()
+	b.ResetTimer()
+	for i := 0; i < b.N; i++ {
+		s.write(data)
+	}
+}
+
+// Матрица BenchmarkHash: размеры входа (с суффиксами K, M, G) и размеры
+// пула воркеров (0 — по GOMAXPROCS). bench.py suite передаёт их через -args
+// и сравнивает результаты с базовой линией.
+var (
+	benchSizes   = flag.String("md6.sizes", "64,64K,1G", "input sizes for BenchmarkHash")
+	benchWorkers = flag.String("md6.workers", "1,0", "worker pool sizes for BenchmarkHash")
+)
+
+func parseBenchList(b *testing.B, list string) []int {
+	units := map[byte]int{'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+	var values []int
+	for _, item := range strings.Split(list, ",") {
+		unit := 1
+		if n := len(item); n > 0 && units[item[n-1]] != 0 {
+			unit = units[item[n-1]]
+			item = item[:n-1]
+		}
+		value, err := strconv.Atoi(item)
+		if err != nil {
+			b.Fatalf("bad benchmark list %q: %v", list, err)
+		}
+		values = append(values, value*unit)
+	}
+	return values
+}
+
+// Значение по методу ближайшего ранга, как percentile в bench.py
+func benchPercentile(sorted []time.Duration, fraction float64) float64 {
+	index := max(int(math.Ceil(fraction*float64(len(sorted))))-1, 0)
+	return float64(sorted[index].Nanoseconds())
+}
+
+// Хеширование потоковым хешером (путь MD6HashBuffer и MD6HashFile) и
+// buildTree (путь MD6FromInput) по матрице размеров, ключа и воркеров.
+// Кроме ns/op сообщаются перцентили задержки одного хеша.
+func BenchmarkHash(b *testing.B) {
+	sizes := parseBenchList(b, *benchSizes)
+	workersList := parseBenchList(b, *benchWorkers)
+	data := testData(slices.Max(sizes))
+	defer atomic.StoreInt32(&parallelism, atomic.LoadInt32(&parallelism))
+
+	paths := []struct {
+		name string
+		hash func(data []byte, key string)
+	}{
+		{"native-stream", func(data []byte, key string) {
+			s := newMD6Stream(key, md6Rounds)
+			s.write(data)
+			s.sum()
+		}},
+		{"native-tree", func(data []byte, key string) {
+			buildTree(splitIntoBlocks(data, MD6BlockSize), key, md6Rounds)
+		}},
+	}
+	for _, path := range paths {
+		for _, size := range sizes {
+			// Без запаса ёмкости: паддинг в splitIntoBlocks не портит data
+			input := data[:size:size]
+			for _, key := range []string{"", benchKey} {
+				keyed := "nokey"
+				if key != "" {
+					keyed = "keyed"
+				}
+				for _, workers := range workersList {
+					name := fmt.Sprintf("%s/%d/%s/w%d", path.name, size, keyed, workers)
+					b.Run(name, func(b *testing.B) {
+						atomic.StoreInt32(&parallelism, int32(workers))
+						latencies := make([]time.Duration, 0, b.N)
+						b.SetBytes(int64(size))
+						b.ReportAllocs()
+						b.ResetTimer()
+						for i := 0; i < b.N; i++ {
+							start := time.Now()
+							path.hash(input, key)
+							latencies = append(latencies, time.Since(start))
+						}
+						b.StopTimer()
+						slices.Sort(latencies)
+						b.ReportMetric(benchPercentile(latencies, 0.5), "p50-ns")
+						b.ReportMetric(benchPercentile(latencies, 0.9), "p90-ns")
+						b.ReportMetric(benchPercentile(latencies, 0.99), "p99-ns")
+					})
+				}
+			}
+		}
+	}
+}
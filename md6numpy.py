@@ -0,0 +1,680 @@
+"""Запасная реализация MD6 на NumPy для хостов без libmd6.so.
+
+Повторяет compressF, splitIntoBlocks и buildTree из md6hash.go бит в бит
+и предоставляет тот же интерфейс, что и MD6Hash. Сжатие векторизовано по
+блокам: массив A хранится как (шаг, блок), и каждый шаг основного цикла -
+несколько операций NumPy над всеми блоками сразу. Служит также эталоном
+для сверки с библиотекой (test_md6.py, bench.py oracle). Дерево в файле
+(sidecar) имеет тот же формат, что и у библиотеки, поэтому деревья обеих
+реализаций взаимозаменяемы.
+"""
+
+import hashlib
+import hmac
+import mmap
+import os
+import secrets
+import struct
+
+import numpy as np
+
+from md6 import (
+    MD6_PARALLEL_PER_BLOCK,
+    MD6_PARALLEL_POOLED,
+    MD6_PARALLEL_SEQUENTIAL,
+    MD6_STREAM_CHUNK_SIZE,
+    MD6UnsupportedError,
+    offsets_buffer,
+    pack_items,
+    validated_key,
+)
+
+MD6_BLOCK_SIZE = 512
+MD6_NODE_WORDS = 16
+MD6_ROUNDS = 40 + 32 * 16 // 4
+
+# Количество блоков, сжимаемых одним вызовом: массив A занимает
+# MD6_ROUNDS * 16 * 8 байт на блок (около 21 КБ)
+MD6_NUMPY_BATCH = 1024
+
+MD6_NODE_SIZE = MD6_NODE_WORDS * 8
+
+# Заголовок дерева, как в md6hash.go: magic, флаги, длина файла, число
+# раундов, соль и HMAC-отпечаток ключа
+MD6_TREE_MAGIC = b"MD6TREE\x01"
+MD6_TREE_HEADER = struct.Struct("<8sQQQ32s32s")
+MD6_TREE_INCOMPLETE = 1
+MD6_TREE_SALT_SIZE = 32
+
+R = [10, 5, 13, 10, 11, 12, 2, 7, 14, 15, 7, 13, 11, 7, 6, 12]
+SHIFTS = [11, 24, 9, 16, 15, 9, 27, 15, 6, 2, 29, 8, 15, 5, 31, 9]
+T = [17, 18, 21, 31, 67]
+Q = [
+    0x7311C2812425CFA0, 0x6432286434AAC8E7, 0xB60450E9EF68B7C1, 0xE8FB23908D9F06F1,
+    0xDD2E76CBA691E5BF, 0x0CD0D63B2C30BC41, 0x1F8CCF6823058F8A, 0x54E5ED5B88E3775D,
+    0x4AD12AAE0A6D6031, 0x3E7F16BB88222E0D, 0x8AF8671D3FB50C2C, 0x995AD1178BD25C31,
+    0xC878C1DD04C4B633, 0x3B72066C7A1552AC, 0x0D6F3522631EFFCB,
+]  # fmt: skip
+U = 0x1234567890ABCDEF
+V = 0xABCDEF1234567890
+S_STAR = 0x7311C2812425CFA0
+S0 = 0x0123456789ABCDEF
+MASK = (1 << 64) - 1
+
+
+def precompute_si(rounds):
+    """Значения Si, как precomputeSi."""
+    si, sj = [], S0
+    for _ in range(rounds + 1):
+        si.append(sj)
+        sj = (((sj << 1) | (sj >> 63)) & MASK) ^ (sj & S_STAR)
+    return si
+
+
+def prepare_key(key):
+    """Ключ в 8 слов: дополняется нулями до 64 байт, лишнее отбрасывается."""
+    key = bytes(key[:64]).ljust(64, b"\0")
+    return list(np.frombuffer(key, dtype="<u8").tolist())
+
+
+def md6_padding(length):
+    """Паддинг сообщения длины length, как md6Padding."""
+    size = MD6_BLOCK_SIZE - length % MD6_BLOCK_SIZE
+    if size < 9:
+        size += MD6_BLOCK_SIZE
+    return b"\x80" + bytes(size - 9) + ((length * 8) & MASK).to_bytes(8, "little")
+
+
+class MD6Context:
+    """Подготовленный ключ и константы; аналог md6Context."""
+
+    def __init__(self, key, rounds=MD6_ROUNDS):
+        self.rounds = rounds
+        self.prefix = np.array(Q + prepare_key(key) + [U, V], dtype=np.uint64)
+        si = precompute_si(rounds)
+        self.si = [np.uint64(value) for value in si[:16]]
+        self.r = [np.uint64(value) for value in R]
+        self.shifts = [np.uint64(value) for value in SHIFTS]
+
+    def compress(self, words):
+        """Сжатие входов words (n, w), w <= 64 слов, в узлы (n, 16).
+
+        Вход короче 64 слов дополняется нулями, как в compressInto, поэтому
+        узел без пары сжимается так же, как пара с нулевым вторым узлом.
+        """
+        words = np.asarray(words, dtype=np.uint64)
+        out = np.empty((len(words), MD6_NODE_WORDS), dtype=np.uint64)
+        for start in range(0, len(words), MD6_NUMPY_BATCH):
+            batch = words[start : start + MD6_NUMPY_BATCH]
+            out[start : start + len(batch)] = self.compress_batch(batch)
+        return out
+
+    def compress_batch(self, words):
+        n = 89
+        t_cycle = self.rounds * 16
+        count, width = words.shape
+        prefix = len(self.prefix)
+
+        A = np.zeros((t_cycle, count), dtype=np.uint64)
+        A[:prefix] = self.prefix[:, None]
+        A[prefix : prefix + width] = words.T
+        tmp = np.empty(count, dtype=np.uint64)
+
+        t0, t1, t2, t3, t4 = T
+        for i in range(n, t_cycle):
+            step = (i - n) % 16
+            x = A[i]
+            np.bitwise_xor(A[i - n], A[i - t0], out=x)
+            x ^= self.si[step]
+            np.bitwise_and(A[i - t1], A[i - t2], out=tmp)
+            x ^= tmp
+            np.bitwise_and(A[i - t3], A[i - t4], out=tmp)
+            x ^= tmp
+            np.right_shift(x, self.r[step], out=tmp)
+            x ^= tmp
+            np.left_shift(x, self.shifts[step], out=tmp)
+            x ^= tmp
+
+        return A[t_cycle - MD6_NODE_WORDS :].T
+
+
+def words_of(data):
+    """Слова little-endian из байт, длина которых кратна 8."""
+    return np.frombuffer(data, dtype="<u8").astype(np.uint64)
+
+
+def split_into_blocks(data):
+    """Сообщение с паддингом как массив блоков (n, 64), как splitIntoBlocks."""
+    data = bytes(data)
+    return words_of(data + md6_padding(len(data))).reshape(-1, MD6_BLOCK_SIZE // 8)
+
+
+def pair_nodes(nodes):
+    """Пары соседних узлов (k, 32); узел без пары дополняется нулями."""
+    if len(nodes) % 2:
+        nodes = np.vstack([nodes, np.zeros((1, MD6_NODE_WORDS), dtype=np.uint64)])
+    return nodes.reshape(-1, 2 * MD6_NODE_WORDS)
+
+
+def build_trees(context, block_lists):
+    """Корни деревьев нескольких сообщений, как buildTree для каждого.
+
+    Листья всех сообщений сжимаются вместе, затем уровни всех деревьев
+    сворачиваются одновременно, чтобы каждое сжатие было векторным.
+    """
+    sizes = [len(blocks) for blocks in block_lists]
+    nodes = np.split(context.compress(np.vstack(block_lists)), np.cumsum(sizes)[:-1])
+    while any(len(level) > 1 for level in nodes):
+        active = [i for i, level in enumerate(nodes) if len(level) > 1]
+        pairs = [pair_nodes(nodes[i]) for i in active]
+        parents = np.split(
+            context.compress(np.vstack(pairs)), np.cumsum([len(p) for p in pairs])[:-1]
+        )
+        for i, level in zip(active, parents):
+            nodes[i] = level
+    return [level[0] for level in nodes]
+
+
+def build_tree(blocks, key):
+    """Корень дерева для блоков из split_into_blocks, как buildTree."""
+    return node_bytes(build_trees(MD6Context(key), [blocks])[0])
+
+
+def compress_f(block, key):
+    """Сжатие одного блока (до 512 байт), как compressF."""
+    block = bytes(block)
+    words = words_of(block[: len(block) // 8 * 8])[None, :]
+    return node_bytes(MD6Context(key).compress(words)[0])
+
+
+def node_bytes(node):
+    return np.asarray(node, dtype="<u8").tobytes()
+
+
+def hash_file_into(hasher, file_path, use_mmap=False):
+    """Передать файл в потоковый хешер частями, при use_mmap - из отображения."""
+    with open(file_path, "rb") as f:
+        if use_mmap and os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for start in range(0, len(data), MD6_STREAM_CHUNK_SIZE):
+                    hasher.update(data[start : start + MD6_STREAM_CHUNK_SIZE])
+        else:
+            for chunk in iter(lambda: f.read(MD6_STREAM_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+
+
+def hash_packed_with(context, data, offsets, output_length):
+    """Хеши сообщений data[offsets[i]:offsets[i + 1]], как MD6HashBatch."""
+    offsets = offsets_buffer(offsets).tolist()
+    data = memoryview(data).cast("B")
+    count = max(len(offsets) - 1, 0)
+    if count and (
+        not 0 < output_length <= MD6_NODE_WORDS * 8
+        or any(a > b for a, b in zip(offsets, offsets[1:]))
+        or offsets[-1] > data.nbytes
+    ):
+        raise ValueError("Invalid offsets or output length for MD6 batch")
+
+    out = bytearray(count * output_length)
+    if count:
+        blocks = [split_into_blocks(data[a:b]) for a, b in zip(offsets, offsets[1:])]
+        roots = build_trees(context, blocks)
+        for i, root in enumerate(roots):
+            out[i * output_length : (i + 1) * output_length] = node_bytes(root)[:output_length]
+    return out
+
+
+def read_leaf_blocks(f, length, padding, lo, hi):
+    """Блоки [lo, hi) сообщения с паддингом: байты файла, затем паддинга."""
+    start, stop = lo * MD6_BLOCK_SIZE, hi * MD6_BLOCK_SIZE
+    f.seek(min(start, length))
+    data = f.read(max(min(stop, length) - start, 0))
+    data += padding[max(start - length, 0) : max(stop - length, 0)]
+    if len(data) != stop - start:
+        raise OSError(f"MD6: file is shorter than {length} bytes")
+    return words_of(data).reshape(-1, 64)
+
+
+def tree_fingerprint(salt, key, rounds=MD6_ROUNDS):
+    """Отпечаток ключа дерева, как treeFingerprint."""
+    message = b"md6-tree\0" + str(rounds).encode() + b"\0" + bytes(key)
+    return hmac.new(salt, message, hashlib.sha256).digest()
+
+
+class TreeLayout:
+    """Число узлов и смещение каждого уровня дерева, как md6Tree.layout."""
+
+    def __init__(self, length):
+        self.length = length
+        self.counts = [(length + len(md6_padding(length))) // MD6_BLOCK_SIZE]
+        while self.counts[-1] > 1:
+            self.counts.append((self.counts[-1] + 1) // 2)
+        self.offsets = []
+        offset = MD6_TREE_HEADER.size
+        for count in self.counts:
+            self.offsets.append(offset)
+            offset += count * MD6_NODE_SIZE
+        self.size = offset
+
+
+def open_tree(tree_path, key):
+    """Файл и разметка сохранённого дерева или None, если дерева нет, оно
+    построено с другим ключом или повреждено."""
+    try:
+        f = open(tree_path, "rb")
+    except FileNotFoundError:
+        return None
+    header = f.read(MD6_TREE_HEADER.size)
+    if len(header) == MD6_TREE_HEADER.size:
+        magic, flags, length, rounds, salt, fingerprint = MD6_TREE_HEADER.unpack(header)
+        layout = TreeLayout(length)
+        if (
+            magic == MD6_TREE_MAGIC
+            and not flags & MD6_TREE_INCOMPLETE
+            and rounds == MD6_ROUNDS
+            and hmac.compare_digest(fingerprint, tree_fingerprint(salt, key))
+            and os.fstat(f.fileno()).st_size == layout.size
+        ):
+            return f, layout
+    f.close()
+    return None
+
+
+def merge_ranges(ranges):
+    """Объединение пересекающихся и соседних диапазонов, как mergeRanges."""
+    merged = []
+    for lo, hi in sorted(ranges):
+        if lo >= hi:
+            continue
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+def clean_ranges(dirty, end):
+    """Диапазоны [0, end) вне dirty."""
+    lo = 0
+    for r_lo, r_hi in dirty:
+        if lo < min(r_lo, end):
+            yield lo, min(r_lo, end)
+        lo = max(lo, r_hi)
+    if lo < end:
+        yield lo, end
+
+
+def hash_file_tree(context, file_path, tree_path, key, changed=(), update=False):
+    """Корень файла с построением или обновлением дерева, как hashFileTree.
+
+    Новое дерево пишется во временный файл, который затем заменяет старый;
+    узлы вне изменённых диапазонов копируются из старого дерева.
+    """
+    old = open_tree(tree_path, key) if update else None
+    tmp_path = os.fspath(tree_path) + ".tmp"
+    try:
+        with open(file_path, "rb") as f, open(tmp_path, "w+b") as out:
+            layout = TreeLayout(os.fstat(f.fileno()).st_size)
+            out.truncate(layout.size)
+            root = update_tree(context, f, old, layout, out, changed)
+            salt = secrets.token_bytes(MD6_TREE_SALT_SIZE)
+            out.seek(0)
+            out.write(
+                MD6_TREE_HEADER.pack(
+                    MD6_TREE_MAGIC, 0, layout.length, MD6_ROUNDS, salt, tree_fingerprint(salt, key)
+                )
+            )
+        os.replace(tmp_path, tree_path)
+    finally:
+        if old is not None:
+            old[0].close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return root
+
+
+def update_tree(context, f, old, layout, out, changed):
+    """Узлы всех уровней в out; заново сжимаются только изменённые, как updateTree."""
+    leaves = layout.counts[0]
+    if old is None:
+        dirty = [(0, leaves)]
+    else:
+        old_file, old_layout = old
+        dirty = []
+        for offset, size in changed:
+            if size == 0 or offset >= layout.length:
+                continue
+            end = min(offset + size, layout.length)
+            lo, hi = offset // MD6_BLOCK_SIZE, -(-end // MD6_BLOCK_SIZE)
+            dirty.append((lo, min(hi, leaves)))
+        # Длина входит в паддинг, поэтому при её изменении меняется весь хвост
+        if old_layout.length != layout.length:
+            lo = min(old_layout.length, layout.length) // MD6_BLOCK_SIZE
+            dirty.append((lo, max(old_layout.counts[0], leaves)))
+    padding = md6_padding(layout.length)
+
+    for level, count in enumerate(layout.counts):
+        if old is not None and level >= len(old_layout.counts):
+            dirty = [(0, count)]
+        dirty = merge_ranges(dirty)
+        compute = [(lo, min(hi, count)) for lo, hi in dirty if lo < count]
+
+        if old is not None and level < len(old_layout.counts):
+            end = min(old_layout.counts[level], count)
+            for lo, hi in clean_ranges(compute, end):
+                for start in range(lo, hi, MD6_NUMPY_BATCH):
+                    stop = min(start + MD6_NUMPY_BATCH, hi)
+                    old_file.seek(old_layout.offsets[level] + start * MD6_NODE_SIZE)
+                    out.seek(layout.offsets[level] + start * MD6_NODE_SIZE)
+                    out.write(old_file.read((stop - start) * MD6_NODE_SIZE))
+
+        for lo, hi in compute:
+            for start in range(lo, hi, MD6_NUMPY_BATCH):
+                stop = min(start + MD6_NUMPY_BATCH, hi)
+                if level == 0:
+                    words = read_leaf_blocks(f, layout.length, padding, start, stop)
+                else:
+                    # Узел без пары в конце уровня дополняется нулями, как в compressInto
+                    children = min(2 * stop, layout.counts[level - 1]) - 2 * start
+                    out.seek(layout.offsets[level - 1] + 2 * start * MD6_NODE_SIZE)
+                    nodes = words_of(out.read(children * MD6_NODE_SIZE))
+                    words = pair_nodes(nodes.reshape(-1, MD6_NODE_WORDS))
+                out.seek(layout.offsets[level] + start * MD6_NODE_SIZE)
+                out.write(node_bytes(context.compress(words)))
+
+        # Родитель зависит от двух детей
+        dirty = [(lo // 2, (hi + 1) // 2) for lo, hi in dirty]
+
+    out.seek(layout.offsets[-1])
+    return out.read(MD6_NODE_SIZE)
+
+
+def c_string(data):
+    """Данные до первого нулевого байта, как при передаче через c_char_p."""
+    data = bytes(data)
+    end = data.find(b"\0")
+    return data if end < 0 else data[:end]
+
+
+class MD6NumpyStream:
+    """Потоковый хешер с интерфейсом MD6Stream.
+
+    Полные блоки сжимаются партиями; на каждом уровне сразу сворачиваются
+    все полные пары, поэтому хранится не больше одного узла на уровень.
+    """
+
+    def __init__(self, key, output_length, context=None):
+        self.context = context or MD6Context(c_string(key))
+        self.output_length = output_length
+        self.length = 0
+        self.tail = bytearray()
+        self.pending = []  # Узел без пары (0 или 1 строка) на каждом уровне
+        self.counts = []  # Количество узлов, построенных на каждом уровне
+        self.finished = False
+
+    def check(self):
+        if self.finished:
+            raise ValueError("MD6Stream is already finalized")
+
+    def push_nodes(self, level, nodes):
+        while len(nodes):
+            if level == len(self.pending):
+                self.pending.append(nodes[:0])
+                self.counts.append(0)
+            self.counts[level] += len(nodes)
+            nodes = np.vstack([self.pending[level], nodes])
+            paired = len(nodes) // 2 * 2
+            self.pending[level] = nodes[paired:]
+            nodes = self.context.compress(nodes[:paired].reshape(-1, 2 * MD6_NODE_WORDS))
+            level += 1
+
+    def update(self, data):
+        self.check()
+        data = memoryview(data).cast("B")
+        self.length += data.nbytes
+        self.tail += data
+        # Полный блок никогда не бывает последним: паддинг всегда добавляет данные
+        full = len(self.tail) // MD6_BLOCK_SIZE * MD6_BLOCK_SIZE
+        batch = MD6_NUMPY_BATCH * MD6_BLOCK_SIZE
+        for start in range(0, full, batch):
+            blocks = words_of(bytes(self.tail[start : min(start + batch, full)]))
+            self.push_nodes(0, self.context.compress(blocks.reshape(-1, 64)))
+        del self.tail[:full]
+
+    def processed(self):
+        self.check()
+        return self.length
+
+    def root(self):
+        self.check()
+        self.finished = True
+        last = words_of(bytes(self.tail) + md6_padding(self.length))
+        self.push_nodes(0, self.context.compress(last.reshape(-1, 64)))
+
+        # Как md6Stream.sum: узел без пары сжимается отдельно и переходит выше
+        carry = None
+        level = 0
+        while True:
+            pending = None
+            if level < len(self.pending) and len(self.pending[level]):
+                pending = self.pending[level][0]
+            total = (self.counts[level] if level < len(self.counts) else 0) + (
+                carry is not None
+            )
+            if total == 1:
+                return node_bytes(pending if pending is not None else carry)
+            if pending is not None and carry is not None:
+                carry = self.context.compress(np.concatenate([pending, carry])[None, :])[0]
+            elif pending is not None or carry is not None:
+                node = pending if pending is not None else carry
+                carry = self.context.compress(node[None, :])[0]
+            level += 1
+
+    def frontier_node(self, level):
+        """Узел уровня level над добавленными листьями, как md6Stream.frontierNode."""
+        carry = None
+        for lower in range(level):
+            pending = None
+            if lower < len(self.pending) and len(self.pending[lower]):
+                pending = self.pending[lower][0]
+            if pending is not None and carry is not None:
+                carry = self.context.compress(np.concatenate([pending, carry])[None, :])[0]
+            elif pending is not None or carry is not None:
+                node = pending if pending is not None else carry
+                carry = self.context.compress(node[None, :])[0]
+        if level < len(self.pending) and len(self.pending[level]):
+            return node_bytes(self.pending[level][0])
+        return node_bytes(carry)
+
+    def finalize(self):
+        return self.root()[: self.output_length].hex().encode()
+
+    def finalize_digest(self):
+        return self.root()[: self.output_length]
+
+    def close(self):
+        self.finished = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MD6NumpyHash:
+    """Реализация интерфейса MD6Hash без libmd6.so.
+
+    Статистика и профилирование есть только в библиотеке: enable_stats,
+    reset_stats, stats, start_profiling и stop_profiling вызывают
+    MD6UnsupportedError, а instrumented равен False.
+    """
+
+    backend = "numpy"
+    instrumented = False
+
+    def set_parallelism(self, mode=MD6_PARALLEL_POOLED, workers=0):
+        """Проверить режим; вычисления и так векторизованы по блокам."""
+        if mode == MD6_PARALLEL_POOLED and workers < 0:
+            raise ValueError("workers must be >= 0")
+        if mode not in (MD6_PARALLEL_SEQUENTIAL, MD6_PARALLEL_POOLED, MD6_PARALLEL_PER_BLOCK):
+            raise ValueError(f"Unknown parallelism mode: {mode!r}")
+
+    def digest(self, data, key, output_length):
+        context = MD6Context(key)
+        root = build_trees(context, [split_into_blocks(data)])[0]
+        return node_bytes(root)[:output_length]
+
+    def compute_md6_hash_from_file(self, file_path, key, output_length):
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            print("Ошибка чтения файла:", e)
+            return None
+        return self.digest(data, c_string(key), max(output_length, 0)).hex().encode()
+
+    def compute_md6_hash_from_input(self, data, key, output_length):
+        return self.digest(c_string(data), c_string(key), max(output_length, 0)).hex().encode()
+
+    def compute_md6_digest_into(self, data, key, out):
+        out = memoryview(out).cast("B")
+        if out.readonly:
+            raise TypeError("output buffer must be writable")
+        digest = self.digest(memoryview(data).cast("B"), bytes(key), out.nbytes)
+        out[: len(digest)] = digest
+        return len(digest)
+
+    def compute_md6_digest_from_input(self, data, key, output_length):
+        return self.digest(memoryview(data).cast("B"), bytes(key), output_length)
+
+    def compute_md6_digest_from_file(self, file_path, key, output_length, use_mmap=False):
+        with self.stream_raw(key, output_length) as hasher:
+            hash_file_into(hasher, file_path, use_mmap)
+            return hasher.finalize_digest()
+
+    def hash_packed(self, data, offsets, key=b"", output_length=32):
+        return hash_packed_with(MD6Context(bytes(key)), data, offsets, output_length)
+
+    def hash_many(self, items, key=b"", output_length=32):
+        data, offsets = pack_items(items)
+        return self.hash_packed(data, offsets, key, output_length)
+
+    def stream(self, key, output_length):
+        return MD6NumpyStream(key, output_length)
+
+    def stream_raw(self, key, output_length):
+        """Потоковый хешер с ключом произвольных байт (как у MD6HashFile)."""
+        return MD6NumpyStream(b"", output_length, MD6Context(bytes(key)))
+
+    def with_key(self, key, **rules):
+        """Контекст с одним MD6Context для многих хешей, как MD6Hash.with_key."""
+        return MD6NumpyKeyedHash(validated_key(key, **rules))
+
+    def compute_md6_hash_from_file_streamed(
+        self, file_path, key, output_length, chunk_size=MD6_STREAM_CHUNK_SIZE
+    ):
+        with self.stream(key, output_length) as hasher, open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+            return hasher.finalize()
+
+    def hash_file_shard(self, file_path, key, length, first, level):
+        """Узел уровня level над листьями [first, first + 2**level), как MD6HashFileShard."""
+        padding = md6_padding(length)
+        leaves = (length + len(padding)) // MD6_BLOCK_SIZE
+        if not 0 <= level <= 40 or first % (1 << level) or not 0 <= first < leaves:
+            raise OSError(f"MD6: cannot hash leaves {first}.. of {file_path!r}")
+        end = min(first + (1 << level), leaves)
+
+        hasher = self.stream_raw(key, MD6_NODE_SIZE)
+        with open(file_path, "rb") as f:
+            for start in range(first, end, MD6_NUMPY_BATCH):
+                blocks = read_leaf_blocks(
+                    f, length, padding, start, min(start + MD6_NUMPY_BATCH, end)
+                )
+                hasher.push_nodes(0, hasher.context.compress(blocks))
+        # Единственный шард: узлы без пары выше корня не поднимаются
+        return hasher.frontier_node(min(level, (leaves - 1).bit_length()))
+
+    def combine_nodes(self, nodes, key, output_length):
+        """Сырой хеш из узлов одного уровня, как MD6CombineNodes."""
+        nodes = bytes(nodes)
+        if not nodes or len(nodes) % (MD6_NODE_WORDS * 8):
+            raise ValueError(f"nodes must be a non-empty multiple of {MD6_NODE_WORDS * 8} bytes")
+        context = MD6Context(bytes(key))
+        level = words_of(nodes).reshape(-1, MD6_NODE_WORDS)
+        while len(level) > 1:
+            level = context.compress(pair_nodes(level))
+        return node_bytes(level[0])[:output_length]
+
+    def compute_md6_digest_with_tree(self, file_path, tree_path, key, output_length):
+        """Сырой хеш файла с деревом в tree_path, как MD6Hash."""
+        root = hash_file_tree(MD6Context(bytes(key)), file_path, tree_path, bytes(key))
+        return root[:output_length]
+
+    def update_md6_digest_with_tree(
+        self, file_path, tree_path, key, output_length, changed=()
+    ):
+        """Пересчёт хеша по дереву из tree_path, как MD6Hash."""
+        root = hash_file_tree(
+            MD6Context(bytes(key)), file_path, tree_path, bytes(key), changed, update=True
+        )
+        return root[:output_length]
+
+    def native_only(self, *args, **kwargs):
+        raise MD6UnsupportedError("statistics and profiling require libmd6.so")
+
+    enable_stats = native_only
+    reset_stats = native_only
+    stats = native_only
+    start_profiling = native_only
+    stop_profiling = native_only
+
+
+class MD6NumpyKeyedHash:
+    """Интерфейс MD6KeyedHash: ключ разобран один раз в общем MD6Context."""
+
+    def __init__(self, key):
+        self.context = MD6Context(key)
+
+    def checked_context(self):
+        if self.context is None:
+            raise ValueError("MD6KeyedHash is closed")
+        return self.context
+
+    def compute_md6_digest_into(self, data, out):
+        out = memoryview(out).cast("B")
+        if out.readonly:
+            raise TypeError("output buffer must be writable")
+        digest = self.compute_md6_digest_from_input(data, out.nbytes)
+        out[: len(digest)] = digest
+        return len(digest)
+
+    def compute_md6_digest_from_input(self, data, output_length):
+        blocks = split_into_blocks(memoryview(data).cast("B"))
+        return node_bytes(build_trees(self.checked_context(), [blocks])[0])[:output_length]
+
+    def compute_md6_digest_from_file(self, file_path, output_length, use_mmap=False):
+        with self.stream(output_length) as hasher:
+            hash_file_into(hasher, file_path, use_mmap)
+            return hasher.finalize_digest()
+
+    def hash_packed(self, data, offsets, output_length=32):
+        return hash_packed_with(self.checked_context(), data, offsets, output_length)
+
+    def hash_many(self, items, output_length=32):
+        data, offsets = pack_items(items)
+        return self.hash_packed(data, offsets, output_length)
+
+    def stream(self, output_length):
+        return MD6NumpyStream(b"", output_length, self.checked_context())
+
+    def close(self):
+        self.context = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
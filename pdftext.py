@@ -0,0 +1,109 @@
+"""Извлечение текста PDF по страницам (fitz) без сборки всего текста в памяти.
+
+Модуль не зависит от PyQt5. Текст документа совпадает с конкатенацией
+page.get_text("text") всех страниц, а его UTF-8 - с конкатенацией частей
+из iter_pdf_text.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+# Количество страниц, извлекаемых процессом пула за одно задание
+PDF_PAGES_PER_TASK = 16
+
+# Количество страниц, добавляемых в предпросмотр за раз
+PDF_PREVIEW_PAGES = 20
+
+
+# Документ, открытый в процессе пула на время одного iter_pdf_text
+_worker_document = None
+
+
+def pdf_page_count(file_path):
+    with fitz.open(file_path) as doc:
+        return len(doc)
+
+
+def pages_text(doc, start, stop):
+    """UTF-8 текста страниц [start, stop) открытого документа."""
+    return "".join(doc.load_page(i).get_text("text") for i in range(start, stop)).encode(
+        "utf-8"
+    )
+
+
+def open_worker_document(file_path):
+    """Инициализатор процесса пула: документ открывается один раз на процесс."""
+    global _worker_document
+    _worker_document = fitz.open(file_path)
+
+
+def extract_worker_pages(start, stop):
+    return pages_text(_worker_document, start, stop)
+
+
+def iter_pdf_text(file_path, workers=None, pages_per_task=PDF_PAGES_PER_TASK):
+    """Пары (число обработанных страниц, UTF-8 очередной части текста) по порядку.
+
+    Страницы извлекаются пулом процессов; заданий в работе не больше, чем
+    2 * workers, поэтому память не зависит от числа страниц. Процессы
+    запускаются через spawn: fork из программы с потоками Qt небезопасен.
+    """
+    page_count = pdf_page_count(file_path)
+    workers = workers or os.cpu_count() or 1
+    starts = range(0, page_count, pages_per_task)
+
+    if workers == 1 or len(starts) <= 2:
+        # Документ открывается заново на каждый запуск, чтобы изменённый
+        # файл не хешировался по старому тексту
+        with fitz.open(file_path) as doc:
+            for start in starts:
+                stop = min(start + pages_per_task, page_count)
+                yield stop, pages_text(doc, start, stop)
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=open_worker_document,
+        initargs=(file_path,),
+    )
+    pending = deque()
+    try:
+        for start in starts:
+            stop = min(start + pages_per_task, page_count)
+            if len(pending) >= 2 * workers:
+                done_stop, future = pending.popleft()
+                yield done_stop, future.result()
+            pending.append((stop, executor.submit(extract_worker_pages, start, stop)))
+        while pending:
+            done_stop, future = pending.popleft()
+            yield done_stop, future.result()
+    finally:
+        # При отмене хеширования незапущенные задания отбрасываются
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PdfPreview:
+    """Предпросмотр PDF: страницы извлекаются частями по мере прокрутки."""
+
+    def __init__(self, file_path, pages=PDF_PREVIEW_PAGES):
+        self.document = fitz.open(file_path)
+        self.pages = pages
+        self.next_page = 0
+
+    def read_more(self):
+        """Текст следующих страниц или пустая строка в конце документа."""
+        stop = min(self.next_page + self.pages, len(self.document))
+        text = "".join(
+            self.document.load_page(i).get_text("text")
+            for i in range(self.next_page, stop)
+        )
+        self.next_page = stop
+        return text
+
+    def close(self):
+        self.document.close()
@@ -0,0 +1,41 @@
+"""Предпросмотр больших текстовых файлов без чтения их целиком.
+
+Модуль не зависит от PyQt5. Файл отображается в память, а в текст
+декодируется только следующее окно, когда его запрашивает интерфейс.
+"""
+
+import codecs
+import mmap
+
+# Количество байт, декодируемых за один запрос read_more
+PREVIEW_WINDOW_SIZE = 256 * 1024
+
+
+class FilePreview:
+    """Предпросмотр файла в UTF-8: окна декодируются по мере прокрутки.
+
+    Символ, разрезанный границей окна, дописывается в следующем окне.
+    read_more бросает UnicodeDecodeError, если окно не является UTF-8.
+    """
+
+    def __init__(self, file_path, window_size=PREVIEW_WINDOW_SIZE):
+        self.window_size = window_size
+        self.position = 0
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        with open(file_path, "rb") as f:
+            # mmap не отображает пустые файлы
+            f.seek(0, 2)
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if f.tell() else b""
+
+    def read_more(self):
+        """Текст следующего окна или пустая строка в конце файла."""
+        if self.position >= len(self.data):
+            return ""
+        end = min(self.position + self.window_size, len(self.data))
+        text = self.decoder.decode(self.data[self.position : end], final=end == len(self.data))
+        self.position = end
+        return text
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
@@ -0,0 +1,100 @@
+"""Хеширование больших файлов несколькими процессами.
+
+Файл делится на шарды по границам выровненных поддеревьев MD6: шард
+размером 2**level листов хешируется в отдельном процессе до узла уровня
+level, а родитель сворачивает узлы шардов по правилу buildTree. Хеш
+совпадает с MD6Hash.compute_md6_digest_from_file. Каждый процесс читает
+файл своим дескриптором со своего смещения, поэтому скорость не
+ограничена одним GIL и одним потоком чтения. Модуль не зависит от PyQt5
+и fitz.
+"""
+
+import multiprocessing
+import os
+import threading
+
+from md6 import MD6_BLOCK_SIZE, MD6_PARALLEL_POOLED, get_md6
+
+# Размер шарда по умолчанию; должен быть степенью двойки не меньше блока
+MD6_SHARD_SIZE = 1 << 30
+
+
+def md6_leaf_count(length):
+    """Число листовых блоков сообщения длины length с учётом паддинга."""
+    padding = MD6_BLOCK_SIZE - length % MD6_BLOCK_SIZE
+    if padding < 9:
+        padding += MD6_BLOCK_SIZE
+    return (length + padding) // MD6_BLOCK_SIZE
+
+
+def init_shard_worker(workers):
+    """Процесс пула делит ядра с остальными процессами."""
+    get_md6().set_parallelism(MD6_PARALLEL_POOLED, workers)
+
+
+def hash_shard(task):
+    file_path, key, length, first, level = task
+    return get_md6().hash_file_shard(file_path, key, length, first, level)
+
+
+class ShardedMD6:
+    """compute_md6_digest_from_file с шардами в пуле процессов.
+
+    Файлы не больше одного шарда хешируются в текущем процессе через md6.
+    Пул создаётся при первом большом файле и переиспользуется; процессы
+    запускаются через spawn, так как fork процесса с загруженной средой
+    Go небезопасен. Объект можно передавать вместо MD6Hash в cli и
+    DigestCache.
+    """
+
+    def __init__(self, md6=None, processes=None, shard_size=MD6_SHARD_SIZE):
+        if shard_size < MD6_BLOCK_SIZE or shard_size & (shard_size - 1):
+            raise ValueError(
+                f"shard size must be a power of two of at least {MD6_BLOCK_SIZE} bytes"
+            )
+        self.md6 = md6 or get_md6()
+        self.processes = processes or os.cpu_count() or 1
+        if self.processes < 1:
+            raise ValueError("processes must be >= 1")
+        self.level = (shard_size // MD6_BLOCK_SIZE).bit_length() - 1
+        self.pool = None
+        self.pool_lock = threading.Lock()
+
+    def get_pool(self):
+        with self.pool_lock:
+            if self.pool is None:
+                workers = max(1, (os.cpu_count() or 1) // self.processes)
+                self.pool = multiprocessing.get_context("spawn").Pool(
+                    self.processes, initializer=init_shard_worker, initargs=(workers,)
+                )
+            return self.pool
+
+    def compute_md6_digest_from_file(self, file_path, key, output_length, use_mmap=False):
+        """Сырой хеш файла; use_mmap учитывается только для файлов из одного шарда."""
+        length = os.path.getsize(file_path)
+        leaves = md6_leaf_count(length)
+        shard_leaves = 1 << self.level
+        if self.processes == 1 or leaves <= shard_leaves:
+            return self.md6.compute_md6_digest_from_file(
+                file_path, key, output_length, use_mmap
+            )
+
+        tasks = [
+            (os.fspath(file_path), bytes(key), length, first, self.level)
+            for first in range(0, leaves, shard_leaves)
+        ]
+        nodes = b"".join(self.get_pool().imap(hash_shard, tasks))
+        return self.md6.combine_nodes(nodes, key, output_length)
+
+    def close(self):
+        with self.pool_lock:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+                self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,164 @@
+"""Проверки md6 через libmd6.so; тесты пропускаются, если библиотеки нет.
+
+Запуск: python -m pytest -q (libmd6.so собирается командой из md6hash.go).
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from md6 import MD6Hash, find_md6_library
+from md6numpy import MD6NumpyHash
+from sharded import ShardedMD6, md6_leaf_count
+
+KEY = b"Abcdefgh12!"
+
+# Длины около границ блока: при len % 512 > 503 паддинг занимает ещё один блок
+ORACLE_LENGTHS = [
+    0, 1, 8, 503, 504, 505, 511, 512, 513, 1015, 1016, 1017, 1024,
+    2047, 2048, 2049, 2 * 512 + 504, 33 * 512 + 504, 64 * 512 + 1, 200_000,
+]  # fmt: skip
+
+
+@pytest.fixture(scope="module")
+def native():
+    try:
+        return MD6Hash(find_md6_library())
+    except OSError as e:
+        pytest.skip(f"libmd6.so is not available: {e}")
+
+
+@pytest.fixture(scope="module")
+def oracle():
+    return MD6NumpyHash()
+
+
+@pytest.fixture(params=["native", "numpy"])
+def backend(request):
+    return request.getfixturevalue("native" if request.param == "native" else "oracle")
+
+
+def oracle_data(length):
+    return bytes((i * 131 + (i >> 8)) & 0xFF for i in range(length))
+
+
+@pytest.mark.parametrize("key", [b"", KEY], ids=["nokey", "keyed"])
+@pytest.mark.parametrize("length", ORACLE_LENGTHS)
+def test_native_matches_numpy_oracle(native, oracle, length, key):
+    data = oracle_data(length)
+    expected = oracle.compute_md6_digest_from_input(data, key, 128)
+    assert native.compute_md6_digest_from_input(data, key, 128) == expected
+    with native.stream(key, 128) as hasher:
+        # Части, не кратные блоку, проходят через хвост потока
+        for start in range(0, length, 1000):
+            hasher.update(data[start : start + 1000])
+        assert hasher.finalize_digest() == expected
+
+
+@pytest.mark.parametrize("key", [b"", KEY], ids=["nokey", "keyed"])
+def test_batch_matches_numpy_oracle(native, oracle, key):
+    items = [oracle_data(length) for length in ORACLE_LENGTHS[:-1]]
+    assert native.hash_many(items, key, 64) == oracle.hash_many(items, key, 64)
+    with native.with_key(KEY) as keyed, oracle.with_key(KEY) as keyed_oracle:
+        assert keyed.hash_many(items, 64) == keyed_oracle.hash_many(items, 64)
+
+
+def test_c_string_entry_points_match_numpy_oracle(native, oracle, tmp_path):
+    """MD6FromInput и MD6FromFile: хеш в hex, данные через c_char_p и файл."""
+    for length in (0, 504, 1016, 5000):
+        data = oracle_data(length).replace(b"\0", b"\1")
+        path = tmp_path / f"data{length}"
+        path.write_bytes(data)
+        for key in (b"", KEY):
+            expected = oracle.compute_md6_hash_from_input(data, key, 64)
+            assert native.compute_md6_hash_from_input(data, key, 64) == expected
+            assert native.compute_md6_hash_from_file(os.fsencode(path), key, 64) == expected
+
+
+def test_concurrent_hashing_is_deterministic(native):
+    """Все точки входа, включая MD6FromInput, из многих потоков Python."""
+    # Без нулевых байтов: MD6FromInput получает данные через c_char_p
+    inputs = [
+        os.urandom(size).replace(b"\0", b"\1")
+        for size in (0, 1, 504, 512, 4096, 100_000)
+    ]
+    cases = [(data, key) for data in inputs for key in (b"", KEY)]
+    expected = [native.compute_md6_digest_from_input(d, k, 64) for d, k in cases]
+
+    def run(index):
+        data, key = cases[index % len(cases)]
+        if index % 3 == 0:
+            return bytes.fromhex(native.compute_md6_hash_from_input(data, key, 64).decode())
+        if index % 3 == 1:
+            with native.stream(key, 64) as hasher:
+                hasher.update(data)
+                return hasher.finalize_digest()
+        return native.compute_md6_digest_from_input(data, key, 64)
+
+    rounds = 20 * len(cases)
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(run, range(rounds)))
+    for index, result in enumerate(results):
+        assert result == expected[index % len(cases)], len(cases[index % len(cases)][0])
+
+
+@pytest.mark.parametrize("key", [b"", KEY], ids=["nokey", "keyed"])
+def test_numpy_tree_interchanges_with_native(native, oracle, tmp_path, key):
+    """Дерево одной реализации обновляется другой, хеш равен полному."""
+    path, tree = tmp_path / "data", tmp_path / "data.md6tree"
+    data = bytearray(oracle_data(70_000))
+    path.write_bytes(data)
+    expected = oracle.compute_md6_digest_from_input(bytes(data), key, 128)
+    assert oracle.compute_md6_digest_with_tree(path, tree, key, 128) == expected
+
+    steps = [
+        (native, "patch", lambda: data.__setitem__(slice(1000, 1003), b"xyz"), [(1000, 3)]),
+        (oracle, "patch", lambda: data.__setitem__(slice(33_000, 34_000), bytes(1000)), [(33_000, 1000)]),
+        (native, "append", lambda: data.extend(oracle_data(5000)), []),
+        (oracle, "truncate", lambda: data.__delitem__(slice(40_504, None)), []),
+        (oracle, "empty", data.clear, []),
+        (native, "grow", lambda: data.extend(oracle_data(3000)), []),
+    ]  # fmt: skip
+    for md6, step, change, changed in steps:
+        change()
+        path.write_bytes(data)
+        expected = oracle.compute_md6_digest_from_input(bytes(data), key, 128)
+        assert md6.update_md6_digest_with_tree(path, tree, key, 128, changed) == expected, step
+
+    # Дерево с другим ключом строится заново
+    other = b"Other1234!?"
+    expected = oracle.compute_md6_digest_from_input(bytes(data), other, 128)
+    assert oracle.update_md6_digest_with_tree(path, tree, other, 128) == expected
+    assert native.update_md6_digest_with_tree(path, tree, other, 128) == expected
+
+
+# Длины файлов для шардов: нечётное число шардов, неполный последний шард
+# и шард из одного блока паддинга (len % 512 > 503)
+SHARD_LENGTHS = [0, 504, 511, 2048, 3 * 1024, 3 * 2048 + 1000, 5 * 1024 + 504, 9 * 1024 + 1]
+
+
+@pytest.mark.parametrize("key", [b"", KEY], ids=["nokey", "keyed"])
+@pytest.mark.parametrize("length", SHARD_LENGTHS)
+def test_shards_combine_to_full_hash(backend, oracle, tmp_path, length, key):
+    """Узлы шардов любого уровня, свёрнутые combine_nodes, дают полный хеш."""
+    path = tmp_path / "data"
+    path.write_bytes(oracle_data(length))
+    expected = oracle.compute_md6_digest_from_input(oracle_data(length), key, 128)
+    leaves = md6_leaf_count(length)
+    for level in range(4):
+        nodes = b"".join(
+            backend.hash_file_shard(os.fspath(path), key, length, first, level)
+            for first in range(0, leaves, 1 << level)
+        )
+        assert backend.combine_nodes(nodes, key, 128) == expected, level
+
+
+def test_sharded_pool_matches_full_hash(native, tmp_path):
+    with ShardedMD6(native, processes=2, shard_size=4 * 512) as sharded:
+        for length in (5 * 2048 + 504, 3 * 2048 + 1000):
+            path = tmp_path / f"data{length}"
+            path.write_bytes(oracle_data(length))
+            for key in (b"", KEY):
+                expected = native.compute_md6_digest_from_file(path, key, 64)
+                assert sharded.compute_md6_digest_from_file(path, key, 64) == expected